@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+准入控制压力测试
+
+在进程内启动服务器（内存传输），注册两个模拟工具，共享一个只有 --backend-workers 个并发的后端:
+- bench_light: 交互式工具，每次占用后端 --light-ms 毫秒
+- bench_heavy: 重量级工具，每次占用后端 --heavy-ms 毫秒
+
+客户端按泊松过程以饱和容量的不同倍数发起调用（两种工具各占一半），每次调用最多等待 --slo 秒。
+有效吞吐（goodput）只统计在 --slo 秒内成功返回的调用。
+
+- off: 不做准入控制，所有调用都在后端前排队，超过容量后排队时间无限增长，有效吞吐下降
+- on:  全局名额等于后端并发数，排队时间有上限，超出的调用被立即拒绝，有效吞吐保持在容量附近，
+       并且交互式工具优先于重量级工具
+
+每个负载等级使用一个新的服务器实例，上一等级积压的调用不影响下一等级。
+
+用法: python benchmarks/bench_admission.py [--duration 5] [--loads 0.5 1 1.5 2 3]
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+from datetime import timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import mcp.types as types
+from mcp.shared.exceptions import McpError
+from mcp.shared.memory import create_connected_server_and_client_session
+
+from server.admission import SERVER_OVERLOADED, configure_admission
+from server.logs import configure_logging
+from server.server import create_app
+from tools import register_tool
+
+TOOLS = ("bench_light", "bench_heavy")
+
+
+def register_bench_tools(workers: int, light_ms: float, heavy_ms: float):
+    backend = asyncio.Semaphore(workers)
+
+    def handler(service_time: float):
+        async def call(name: str, arguments: dict) -> list[types.TextContent]:
+            async with backend:
+                await asyncio.sleep(service_time)
+            return [types.TextContent(type="text", text="ok")]
+        return call
+
+    schema = {"type": "object", "properties": {}}
+    register_tool(types.Tool(name="bench_light", description="压力测试: 轻量工具", inputSchema=schema),
+                  handler(light_ms / 1000))
+    register_tool(types.Tool(name="bench_heavy", description="压力测试: 重量级工具", inputSchema=schema),
+                  handler(heavy_ms / 1000))
+
+
+async def run_level(rate: float, duration: float, slo: float) -> dict:
+    results = {tool: {"ok": 0, "late": 0, "shed": 0, "timeout": 0, "latencies": []} for tool in TOOLS}
+    app = create_app()
+    async with create_connected_server_and_client_session(app) as session:
+
+        async def one_call(tool: str):
+            stats = results[tool]
+            started = time.perf_counter()
+            try:
+                result = await session.call_tool(tool, {}, read_timeout_seconds=timedelta(seconds=slo))
+            except McpError as e:
+                stats["shed" if e.error.code == SERVER_OVERLOADED else "timeout"] += 1
+                return
+            elapsed = time.perf_counter() - started
+            if result.isError:
+                stats["timeout"] += 1
+            elif elapsed <= slo:
+                stats["ok"] += 1
+                stats["latencies"].append(elapsed)
+            else:
+                stats["late"] += 1
+
+        tasks = []
+        stop_at = time.perf_counter() + duration
+        while time.perf_counter() < stop_at:
+            tasks.append(asyncio.create_task(one_call(random.choice(TOOLS))))
+            await asyncio.sleep(random.expovariate(rate))
+        await asyncio.gather(*tasks)
+    return results
+
+
+def percentile(values: list[float], q: float) -> float:
+    if not values:
+        return float("nan")
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * q))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--duration", type=float, default=5, help="每个负载等级的持续时间（秒）")
+    parser.add_argument("--loads", type=float, nargs="+", default=[0.5, 1, 1.5, 2, 3], help="相对饱和容量的负载倍数")
+    parser.add_argument("--backend-workers", type=int, default=4)
+    parser.add_argument("--light-ms", type=float, default=10)
+    parser.add_argument("--heavy-ms", type=float, default=100)
+    parser.add_argument("--slo", type=float, default=2, help="调用的时限（秒），超过的调用不计入有效吞吐")
+    args = parser.parse_args()
+
+    configure_logging(level="WARNING")
+    random.seed(0)
+    capacity = args.backend_workers / ((args.light_ms + args.heavy_ms) / 2 / 1000)
+    classes = {
+        "interactive": {"tools": ["bench_light"], "max_wait": 0.5, "share": 1.0},
+        "default": {"max_wait": 1, "share": 1.0},
+        "heavy": {"tools": ["bench_heavy"], "max_wait": 1, "share": 0.5},
+    }
+
+    print(f"饱和容量约 {capacity:.0f} 次/秒，时限 {args.slo}s，每个等级 {args.duration}s")
+    print(
+        f"{'准入':<6}{'负载':>6}{'发起/秒':>10}{'有效/秒':>10}{'拒绝/秒':>10}{'超时/秒':>10}"
+        f"{'轻量p99(ms)':>14}{'重量p99(ms)':>14}"
+    )
+    for mode in ("off", "on"):
+        # 每个模式一个新的事件循环，后端信号量与之绑定
+        async def run_mode():
+            register_bench_tools(args.backend_workers, args.light_ms, args.heavy_ms)
+            configure_admission(
+                max_in_flight=args.backend_workers if mode == "on" else 0, max_queue=4 * args.backend_workers,
+                classes=classes,
+            )
+            for load in args.loads:
+                results = await run_level(capacity * load, args.duration, args.slo)
+                total = {key: sum(r[key] for r in results.values()) for key in ("ok", "late", "shed", "timeout")}
+                sent = sum(total.values())
+                print(
+                    f"{mode:<6}{load:>6g}{sent / args.duration:>10.1f}{total['ok'] / args.duration:>10.1f}"
+                    f"{total['shed'] / args.duration:>10.1f}"
+                    f"{(total['timeout'] + total['late']) / args.duration:>10.1f}"
+                    f"{percentile(results['bench_light']['latencies'], 0.99) * 1000:>14.1f}"
+                    f"{percentile(results['bench_heavy']['latencies'], 0.99) * 1000:>14.1f}"
+                )
+
+        asyncio.run(run_mode())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+批量调用基准测试
+
+通过stdio启动服务器，对一个本地HTTP服务（每个请求延迟 --delay 秒，模拟上游服务）发起N次 fetch：
+分别用N次逐个的 tools/call 和一次包含N个子调用的 batch 调用完成，比较总耗时。
+
+用法: python benchmarks/bench_batch.py [--calls 50] [--delay 0.1]
+"""
+
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import anyio
+from mcp import ClientSession, StdioServerParameters
+from mcp.client.stdio import stdio_client
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def start_upstream(delay: float) -> ThreadingHTTPServer:
+    """启动一个每个请求都延迟delay秒再响应的HTTP服务"""
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            time.sleep(delay)
+            body = f"ok {self.path}".encode()
+            self.send_response(200)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+async def run(calls: int, delay: float):
+    upstream = start_upstream(delay)
+    base = f"http://127.0.0.1:{upstream.server_address[1]}"
+    params = StdioServerParameters(command=sys.executable, args=["-m", "server.server"], cwd=ROOT)
+    async with stdio_client(params) as (read, write):
+        async with ClientSession(read, write) as session:
+            await session.initialize()
+            # 预热：导入工具模块
+            await session.call_tool("fetch", {"url": f"{base}/warmup"})
+
+            # fetch 的结果会被缓存，两种方式使用不同的URL
+            started = time.perf_counter()
+            for i in range(calls):
+                result = await session.call_tool("fetch", {"url": f"{base}/sequential/{i}"})
+                assert not result.isError, result.content
+            sequential = time.perf_counter() - started
+
+            started = time.perf_counter()
+            result = await session.call_tool("batch", {
+                "calls": [
+                    {"name": "fetch", "arguments": {"url": f"{base}/batch/{i}"}}
+                    for i in range(calls)
+                ],
+            })
+            batch = time.perf_counter() - started
+            report = json.loads(result.content[0].text)
+            assert report["succeeded"] == calls, report
+    upstream.shutdown()
+
+    print(f"{calls} 次 fetch，上游延迟 {delay * 1000:.0f}ms")
+    print(f"{'sequential':>12}: {sequential * 1000:9.1f}ms")
+    print(f"{'batch':>12}: {batch * 1000:9.1f}ms  ({sequential / batch:.1f}x)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--calls", type=int, default=50, help="调用次数")
+    parser.add_argument("--delay", type=float, default=0.1, help="模拟的上游延迟（秒）")
+    args = parser.parse_args()
+    anyio.run(run, args.calls, args.delay)
+
+
+if __name__ == "__main__":
+    main()
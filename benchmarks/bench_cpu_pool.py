@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+CPU密集型工具负载测试
+
+持续并发地调用 code_formatter 格式化大段代码，同时每隔固定时间调用一次 echo，
+统计 echo 的延迟分布（从计划发出时刻到返回的时间，包含事件循环被阻塞的等待时间）。
+分别在启用进程池和 MCP_PROCESS_POOL_WORKERS=0（在事件循环上直接执行）两种模式下运行。
+
+用法: python benchmarks/bench_cpu_pool.py [--duration 10] [--formatters 4]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+def make_large_code(functions: int = 300) -> str:
+    """生成一段格式不规范的大段Python代码"""
+    lines = []
+    for i in range(functions):
+        lines.append(f"def func_{i}( a,b ,c = {i} ):")
+        lines.append(f"  x=[a,b,c,{i}*2 ,  {{ 'k':a ,'v' : b}}]")
+        lines.append("  if a>b : return x")
+        lines.append("  return  [ y  for y in x if y ]")
+    return "\n".join(lines)
+
+
+async def formatter_loop(call_tool, code: str, deadline: float, counter: list):
+    while time.perf_counter() < deadline:
+        await call_tool("code_formatter", {"code": code, "formatter": "black"})
+        counter[0] += 1
+
+
+async def echo_probe(call_tool, deadline: float, interval: float) -> list[float]:
+    latencies = []
+    next_send = time.perf_counter()
+    while next_send < deadline:
+        await asyncio.sleep(max(0.0, next_send - time.perf_counter()))
+        await call_tool("echo", {"message": "ping"})
+        latencies.append((time.perf_counter() - next_send) * 1000)
+        next_send += interval
+    return latencies
+
+
+async def run_mode(duration: float, formatters: int, interval: float) -> dict:
+    from tools import call_tool
+
+    code = make_large_code()
+    # 预热：启动工作进程并导入black
+    await call_tool("code_formatter", {"code": "x=1"})
+
+    counter = [0]
+    deadline = time.perf_counter() + duration
+    results = await asyncio.gather(
+        echo_probe(call_tool, deadline, interval),
+        *(formatter_loop(call_tool, code, deadline, counter) for _ in range(formatters)),
+    )
+    latencies = sorted(results[0])
+    return {
+        "echo_calls": len(latencies),
+        "echo_p50_ms": round(statistics.median(latencies), 2),
+        "echo_p99_ms": round(latencies[int(len(latencies) * 0.99) - 1], 2),
+        "echo_max_ms": round(latencies[-1], 2),
+        "formatter_calls": counter[0],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--duration", type=float, default=10, help="每种模式的测试时长（秒）")
+    parser.add_argument("--formatters", type=int, default=4, help="并发的code_formatter调用数")
+    parser.add_argument("--interval", type=float, default=0.02, help="echo调用间隔（秒）")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        result = asyncio.run(run_mode(args.duration, args.formatters, args.interval))
+        print(json.dumps(result))
+        return
+
+    print(f"{'mode':>8} {'echo p50':>9} {'echo p99':>9} {'echo max':>9} {'formats':>8}")
+    for mode, workers in (("inline", "0"), ("pool", os.environ.get("MCP_PROCESS_POOL_WORKERS", "4"))):
+        output = subprocess.run(
+            [sys.executable, __file__, "--child",
+             "--duration", str(args.duration),
+             "--formatters", str(args.formatters),
+             "--interval", str(args.interval)],
+            env={**os.environ, "MCP_PROCESS_POOL_WORKERS": workers},
+            cwd=ROOT,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        print(
+            f"{mode:>8} {result['echo_p50_ms']:>8.1f}ms {result['echo_p99_ms']:>8.1f}ms "
+            f"{result['echo_max_ms']:>8.1f}ms {result['formatter_calls']:>8}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+工具分发延迟基准测试
+
+对比两种分发方式在 15 个和 500 个合成工具下的单次调用延迟:
+- legacy: 旧的实现，每次调用都列目录、遍历模块、逐个尝试 *_tool 函数直到不再抛出ValueError
+- registry: 启动时建立的 工具名 -> 调用函数 注册表，一次字典查找
+
+用法: python benchmarks/bench_dispatch.py [--calls 2000]
+"""
+
+import argparse
+import asyncio
+import inspect
+import os
+import sys
+import time
+import types as pytypes
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import mcp.types as types
+
+import tools
+from tools import call_tool, register_tool, unregister_tool
+
+
+def make_synthetic_modules(count: int) -> list[pytypes.ModuleType]:
+    """生成 count 个与真实工具模块结构相同的合成模块"""
+    modules = []
+    for i in range(count):
+        tool_name = f"bench_tool_{i}"
+        module = pytypes.ModuleType(f"bench_tools.m{i}")
+
+        async def handler(name: str, arguments: dict, _tool_name=tool_name):
+            if name != _tool_name:
+                raise ValueError(f"Unknown tool: {name}")
+            return [types.TextContent(type="text", text=arguments["message"])]
+
+        handler.__name__ = f"{tool_name}_tool"
+        handler.__module__ = module.__name__
+        setattr(module, handler.__name__, handler)
+        module.get_tools = (
+            lambda _tool_name=tool_name: [
+                types.Tool(
+                    name=_tool_name,
+                    description="synthetic",
+                    inputSchema={"type": "object", "properties": {}},
+                )
+            ]
+        )
+        modules.append(module)
+    return modules
+
+
+async def legacy_call_tool(modules, name, arguments):
+    """旧版 call_tool 的等价实现"""
+    tools_dir = os.path.dirname(os.path.abspath(tools.__file__))
+    os.listdir(tools_dir)
+    for module in modules:
+        for obj_name, obj in inspect.getmembers(module):
+            if obj_name.endswith('_tool') and inspect.iscoroutinefunction(obj):
+                try:
+                    return await obj(name, arguments)
+                except ValueError:
+                    continue
+    raise ValueError(f"Unknown tool: {name}")
+
+
+async def measure(dispatch, names, calls: int) -> float:
+    """返回平均单次调用耗时（微秒）"""
+    arguments = {"message": "hi"}
+    start = time.perf_counter()
+    for i in range(calls):
+        # 用质数步长在所有工具间均匀取样，避免只命中排在前面的模块
+        await dispatch(names[(i * 7919) % len(names)], arguments)
+    return (time.perf_counter() - start) / calls * 1e6
+
+
+async def run(calls: int):
+    print(f"{'tools':>6} {'legacy(us)':>12} {'registry(us)':>13} {'speedup':>9}")
+    for count in (15, 500):
+        modules = make_synthetic_modules(count)
+        names = [module.get_tools()[0].name for module in modules]
+        for module, name in zip(modules, names):
+            register_tool(module.get_tools()[0], getattr(module, f"{name}_tool"))
+        try:
+            # 旧实现的代价与工具数相关，调用次数相应减少
+            legacy_calls = max(calls * 15 // count, 20)
+            legacy = await measure(
+                lambda n, a: legacy_call_tool(modules, n, a), names, legacy_calls
+            )
+            registry = await measure(call_tool, names, calls)
+        finally:
+            for name in names:
+                unregister_tool(name)
+        print(f"{count:>6} {legacy:>12.1f} {registry:>13.2f} {legacy / registry:>8.0f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--calls", type=int, default=2000, help="每种配置的调用次数")
+    args = parser.parse_args()
+    asyncio.run(run(args.calls))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+日志开销基准测试
+
+在进程内连续调用 text_summary（每次调用产生一条DEBUG日志和一条调用结束的INFO日志），
+比较不同日志配置下的平均单次调用耗时:
+- off: 级别为WARNING，不输出任何日志
+- info: 级别为INFO，经后台队列写入文件
+- debug: 级别为DEBUG，经后台队列写入文件
+- debug-sampled: 级别为DEBUG，DEBUG日志按 --sample-rate 采样
+- sync: 级别为INFO，在调用方线程中同步格式化并写入文件（不使用队列，作为对照）
+
+每种配置在独立的子进程中运行，互不影响。
+
+用法: python benchmarks/bench_logging.py [--calls 20000] [--format text|json] [--sample-rate 0.1]
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+MODES = ("off", "info", "debug", "debug-sampled", "sync")
+
+
+def configure(mode: str, fmt: str, sample_rate: float, filename: str):
+    from server.logs import ContextFilter, JsonFormatter, TextFormatter, configure_logging
+
+    if mode == "sync":
+        handler = logging.FileHandler(filename, encoding="utf-8")
+        handler.setFormatter(JsonFormatter() if fmt == "json" else TextFormatter())
+        handler.addFilter(ContextFilter())
+        root = logging.getLogger()
+        root.handlers[:] = [handler]
+        root.setLevel(logging.INFO)
+        return
+    level = {"off": "WARNING", "info": "INFO"}.get(mode, "DEBUG")
+    rate = sample_rate if mode == "debug-sampled" else 1.0
+    configure_logging(level=level, fmt=fmt, filename=filename, debug_sample_rate=rate)
+
+
+async def measure(calls: int) -> float:
+    """返回平均单次调用耗时（微秒）"""
+    from tools import call_tool
+
+    arguments = {"text": "第一句。第二句。第三句。", "max_sentences": 2}
+    for _ in range(200):
+        await call_tool("text_summary", arguments)
+    started = time.perf_counter()
+    for _ in range(calls):
+        await call_tool("text_summary", arguments)
+    return (time.perf_counter() - started) / calls * 1e6
+
+
+def run_mode(mode: str, calls: int, fmt: str, sample_rate: float):
+    """子进程：按mode配置日志并测量，结果以JSON输出到stdout"""
+    with tempfile.TemporaryDirectory() as tmp:
+        filename = os.path.join(tmp, "bench.log")
+        configure(mode, fmt, sample_rate, filename)
+        per_call = asyncio.run(measure(calls))
+
+        from server.logs import shutdown_logging
+
+        shutdown_logging()
+        logging.shutdown()
+        with open(filename, encoding="utf-8") as f:
+            lines = sum(1 for _ in f)
+    print(json.dumps({"mode": mode, "us_per_call": per_call, "lines": lines}))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=20000)
+    parser.add_argument("--format", choices=("text", "json"), default="text")
+    parser.add_argument("--sample-rate", type=float, default=0.1)
+    parser.add_argument("--mode", choices=MODES, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.mode:
+        run_mode(args.mode, args.calls, args.format, args.sample_rate)
+        return
+
+    results = {}
+    for mode in MODES:
+        output = subprocess.run(
+            [
+                sys.executable, os.path.abspath(__file__), "--mode", mode, "--calls", str(args.calls),
+                "--format", args.format, "--sample-rate", str(args.sample_rate),
+            ],
+            cwd=ROOT,
+            check=True,
+            capture_output=True,
+            text=True,
+        ).stdout
+        results[mode] = json.loads(output.strip().splitlines()[-1])
+
+    baseline = results["off"]["us_per_call"]
+    print(f"{args.calls} 次 text_summary 调用，日志格式 {args.format}")
+    print(f"{'模式':<16}{'单次耗时(µs)':>14}{'日志开销(µs)':>14}{'日志行数':>10}")
+    for mode in MODES:
+        result = results[mode]
+        overhead = result["us_per_call"] - baseline
+        print(f"{mode:<16}{result['us_per_call']:>14.1f}{overhead:>14.1f}{result['lines']:>10}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+PostgreSQL异步驱动并发测试
+
+在进程内同时发起 --concurrency 次 postgres 工具调用，每次执行 SELECT pg_sleep(--sleep)。
+驱动不阻塞事件循环时，总耗时约等于一次查询的时间（50 × pg_sleep(1) 约 1 秒），而不是所有查询时间之和；
+同时每 10ms 唤醒一次的计时任务记录事件循环的最大延迟，阻塞的驱动会让它接近单次查询的时间。
+总耗时超过单次查询时间的两倍时以非0状态退出。tests/test_pg_async.py 在pytest中检查同样的性质。
+
+连接池的最大连接数设为 --concurrency（默认的 MCP_PG_POOL_MAX_SIZE 为 10），
+数据库的 max_connections 也需要足够大。
+
+需要一个可以连接的PostgreSQL，例如:
+    docker run --rm -e POSTGRES_PASSWORD=postgres -p 5432:5432 postgres:16
+
+用法: python benchmarks/bench_pg_async.py [--concurrency 50] [--sleep 1] [--host 127.0.0.1] [--port 5432]
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from tools.postgres import postgres_tool
+from tools.runtime import pg_pool
+
+
+async def measure_lag(stop: asyncio.Event, interval: float = 0.01) -> float:
+    worst = 0.0
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(interval)
+        worst = max(worst, time.perf_counter() - started - interval)
+    return worst
+
+
+async def run(arguments: dict, concurrency: int, sleep: float):
+    pg_pool.MAX_SIZE = pg_pool.MAX_CONNECTIONS = concurrency
+    query = dict(arguments, action="execute_query", query=f"SELECT pg_sleep({sleep})")
+
+    # 预热：先建立所有连接，只测量查询本身
+    warmup = dict(arguments, action="execute_query", query="SELECT 1")
+    await asyncio.gather(*(postgres_tool("postgres", warmup) for _ in range(concurrency)))
+
+    stop = asyncio.Event()
+    lag = asyncio.create_task(measure_lag(stop))
+    started = time.perf_counter()
+    results = await asyncio.gather(*(postgres_tool("postgres", query) for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    stop.set()
+    worst_lag = await lag
+    await pg_pool.close_pools()
+
+    failed = [r[0].text for r in results if "出错" in r[0].text or "失败" in r[0].text]
+    if failed:
+        raise SystemExit(failed[0])
+    print(f"{concurrency} × pg_sleep({sleep:g})")
+    print(f"总耗时:           {elapsed:.2f}s（串行执行约 {concurrency * sleep:g}s）")
+    print(f"事件循环最大延迟: {worst_lag * 1000:.1f}ms")
+    if elapsed > sleep * 2:
+        raise SystemExit(f"查询没有并发执行：总耗时 {elapsed:.2f}s 超过单次查询时间的两倍")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=5432)
+    parser.add_argument("--database", default="postgres")
+    parser.add_argument("--user", default="postgres")
+    parser.add_argument("--password", default="postgres")
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--sleep", type=float, default=1)
+    args = parser.parse_args()
+
+    arguments = {
+        "host": args.host,
+        "port": args.port,
+        "database": args.database,
+        "user": args.user,
+        "password": args.password,
+    }
+    asyncio.run(run(arguments, args.concurrency, args.sleep))
+
+
+if __name__ == "__main__":
+    main()
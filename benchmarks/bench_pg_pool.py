@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+PostgreSQL连接池基准测试
+
+在进程内直接调用 postgres 工具的 table_schema 操作，--duration 秒内不断重复，比较每秒完成的调用数:
+- unpooled: 每次调用都新建连接、用完关闭（连接的最长使用时间设为0，归还时立即关闭，与连接池之前的行为相同）
+- pooled:   连接归还到池中，后续调用复用同一个连接
+table_schema 平时从目录缓存返回，这里把缓存的有效期设为0，每次调用都经连接池检查目录签名。
+
+需要一个可以连接的PostgreSQL，例如:
+    docker run --rm -e POSTGRES_PASSWORD=postgres -p 5432:5432 postgres:16
+
+用法: python benchmarks/bench_pg_pool.py [--host 127.0.0.1] [--port 5432] [--database postgres]
+                                         [--user postgres] [--password postgres] [--table pg_class --schema pg_catalog]
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from tools.postgres import postgres_tool
+from tools.runtime import pg_pool, pg_schema
+
+
+async def run_mode(mode: str, arguments: dict, duration: float) -> tuple[int, float]:
+    pg_pool.MAX_LIFETIME = 0 if mode == "unpooled" else 3600
+    pg_schema.TTL = 0
+    await pg_pool.close_pools()
+    calls = 0
+    started = time.perf_counter()
+    while time.perf_counter() - started < duration:
+        result = await postgres_tool("postgres", arguments)
+        if result[0].text.startswith("PostgreSQL查询失败"):
+            raise SystemExit(result[0].text)
+        calls += 1
+    elapsed = time.perf_counter() - started
+    await pg_pool.close_pools()
+    return calls, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=5432)
+    parser.add_argument("--database", default="postgres")
+    parser.add_argument("--user", default="postgres")
+    parser.add_argument("--password", default="postgres")
+    parser.add_argument("--table", default="pg_class")
+    parser.add_argument("--schema", default="pg_catalog")
+    parser.add_argument("--duration", type=float, default=10)
+    args = parser.parse_args()
+
+    arguments = {
+        "action": "table_schema",
+        "host": args.host,
+        "port": args.port,
+        "database": args.database,
+        "user": args.user,
+        "password": args.password,
+        "table_name": args.table,
+        "schema": args.schema,
+    }
+    print(f"table_schema {args.schema}.{args.table}，每种模式 {args.duration}s")
+    print(f"{'模式':<12}{'调用数':>10}{'调用/秒':>10}{'平均(ms)':>10}")
+    for mode in ("unpooled", "pooled"):
+        calls, elapsed = asyncio.run(run_mode(mode, arguments, args.duration))
+        print(f"{mode:<12}{calls:>10}{calls / elapsed:>10.1f}{elapsed / calls * 1000:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+服务器调优配置基准测试
+
+分别以默认配置和 --performance 启动SSE服务器，--clients 个客户端会话在 --duration 秒内
+不间断地调用 echo，比较每秒完成的调用数和单次调用延迟。
+
+- default:     asyncio事件循环、h11解析器、Starlette debug、访问日志
+- performance: 已安装时使用uvloop和httptools，关闭debug和访问日志
+
+两种配置都使用默认的日志级别（INFO），日志写到 /dev/null。
+客户端与服务器运行在同一台机器上，吞吐量同时受客户端CPU的限制，适合用来比较两种配置的相对差异。
+安装可选依赖: pip install ".[performance]"
+
+用法: python benchmarks/bench_profiles.py [--clients 10] [--duration 10]
+"""
+
+import argparse
+import contextlib
+import os
+import socket
+import subprocess
+import sys
+import time
+
+import anyio
+from mcp import ClientSession
+from mcp.client.sse import sse_client
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PROFILES = {
+    "default": [],
+    "performance": ["--performance"],
+}
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(args: list[str], port: int) -> subprocess.Popen:
+    process = subprocess.Popen(
+        [sys.executable, "-m", "server.server", "--transport", "sse", "--port", str(port), *args],
+        cwd=ROOT,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        with contextlib.suppress(OSError), socket.create_connection(("127.0.0.1", port), timeout=0.2):
+            return process
+        time.sleep(0.1)
+    process.kill()
+    raise RuntimeError("server did not start")
+
+
+@contextlib.asynccontextmanager
+async def open_session(port: int):
+    async with sse_client(f"http://127.0.0.1:{port}/sse") as streams:
+        async with ClientSession(streams[0], streams[1]) as session:
+            await session.initialize()
+            yield session
+
+
+def percentile(values: list[float], q: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * q))]
+
+
+async def run_profile(name: str, clients: int, duration: float) -> dict:
+    port = free_port()
+    process = start_server(PROFILES[name], port)
+    latencies = []
+    try:
+        async with contextlib.AsyncExitStack() as stack:
+            sessions = [await stack.enter_async_context(open_session(port)) for _ in range(clients)]
+            # 预热：导入echo所在的工具模块
+            for session in sessions:
+                await session.call_tool("echo", {"message": "warmup"})
+
+            stop_at = time.perf_counter() + duration
+
+            async def worker(session: ClientSession):
+                while time.perf_counter() < stop_at:
+                    started = time.perf_counter()
+                    await session.call_tool("echo", {"message": "hi"})
+                    latencies.append(time.perf_counter() - started)
+
+            started = time.perf_counter()
+            async with anyio.create_task_group() as tg:
+                for session in sessions:
+                    tg.start_soon(worker, session)
+            elapsed = time.perf_counter() - started
+    finally:
+        process.terminate()
+        process.wait(timeout=60)
+    return {
+        "throughput": len(latencies) / elapsed,
+        "p50": percentile(latencies, 0.5) * 1000,
+        "p99": percentile(latencies, 0.99) * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, default=10)
+    parser.add_argument("--duration", type=float, default=10)
+    parser.add_argument("--profiles", nargs="+", choices=list(PROFILES), default=list(PROFILES))
+    args = parser.parse_args()
+
+    print(f"{args.clients} 个并发SSE客户端调用echo，每种配置持续 {args.duration}s")
+    print(f"{'配置':<14}{'调用/秒':>10}{'p50(ms)':>10}{'p99(ms)':>10}")
+    for name in args.profiles:
+        result = anyio.run(run_profile, name, args.clients, args.duration)
+        print(f"{name:<14}{result['throughput']:>10.1f}{result['p50']:>10.2f}{result['p99']:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+服务器冷启动基准测试
+
+以stdio模式启动服务器子进程，测量从启动进程到收到第一个 tools/list 响应的时间，
+对比按需导入工具模块（默认）和启动时预加载全部工具模块（MCP_PRELOAD_TOOLS=1）。
+
+用法: python benchmarks/bench_startup.py [--runs 5]
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+import anyio
+from mcp import ClientSession, StdioServerParameters
+from mcp.client.stdio import stdio_client
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+async def cold_start(env: dict) -> tuple[float, float]:
+    """返回 (启动到initialize完成的秒数, 启动到tools/list响应的秒数)"""
+    params = StdioServerParameters(
+        command=sys.executable,
+        args=["-m", "server.server"],
+        env={**os.environ, **env},
+        cwd=ROOT,
+    )
+    start = time.perf_counter()
+    async with stdio_client(params) as (read_stream, write_stream):
+        async with ClientSession(read_stream, write_stream) as session:
+            await session.initialize()
+            initialized = time.perf_counter() - start
+            await session.list_tools()
+            listed = time.perf_counter() - start
+    return initialized, listed
+
+
+async def run(runs: int):
+    modes = {
+        "lazy": {"MCP_PRELOAD_TOOLS": "0"},
+        "eager": {"MCP_PRELOAD_TOOLS": "1"},
+    }
+    print(f"{'mode':>6} {'initialize(s)':>14} {'tools/list(s)':>14}")
+    for mode, env in modes.items():
+        results = [await cold_start(env) for _ in range(runs)]
+        initialized = statistics.median(r[0] for r in results)
+        listed = statistics.median(r[1] for r in results)
+        print(f"{mode:>6} {initialized:>14.3f} {listed:>14.3f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=5, help="每种模式启动的次数（取中位数）")
+    args = parser.parse_args()
+    anyio.run(run, args.runs)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+传输方式基准测试
+
+分别以 SSE、Streamable HTTP（有状态）和 Streamable HTTP（无状态）方式启动服务器，
+同时保持 --clients 个客户端会话，比较:
+- 每个客户端占用的服务器内存：所有会话建立后服务器RSS的增量 / 客户端数
+- 持续吞吐量：所有客户端在 --duration 秒内不间断调用 echo，每秒完成的调用数
+
+客户端与服务器运行在同一台机器上，吞吐量同时受客户端CPU的限制，适合用来比较不同传输方式的相对差异。
+
+用法: python benchmarks/bench_transports.py [--clients 20] [--duration 10]
+"""
+
+import argparse
+import contextlib
+import os
+import socket
+import subprocess
+import sys
+import time
+
+import anyio
+import psutil
+from mcp import ClientSession
+from mcp.client.sse import sse_client
+from mcp.client.streamable_http import streamablehttp_client
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 名称 -> (服务器参数, 客户端连接方式)
+MODES = {
+    "sse": (["--transport", "sse"], "sse"),
+    "streamable-http": (["--transport", "streamable-http"], "http"),
+    "streamable-http --stateless": (["--transport", "streamable-http", "--stateless"], "http"),
+}
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(args: list[str], port: int) -> subprocess.Popen:
+    env = dict(os.environ, MCP_LOG_LEVEL="WARNING")
+    process = subprocess.Popen(
+        [sys.executable, "-m", "server.server", "--port", str(port), *args],
+        cwd=ROOT,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        with contextlib.suppress(OSError), socket.create_connection(("127.0.0.1", port), timeout=0.2):
+            return process
+        time.sleep(0.1)
+    process.kill()
+    raise RuntimeError("server did not start")
+
+
+@contextlib.asynccontextmanager
+async def open_session(kind: str, port: int):
+    if kind == "sse":
+        transport = sse_client(f"http://127.0.0.1:{port}/sse")
+    else:
+        transport = streamablehttp_client(f"http://127.0.0.1:{port}/mcp/")
+    async with transport as streams:
+        async with ClientSession(streams[0], streams[1]) as session:
+            await session.initialize()
+            await session.call_tool("echo", {"message": "warmup"})
+            yield session
+
+
+async def run_mode(name: str, clients: int, duration: float) -> dict:
+    server_args, kind = MODES[name]
+    port = free_port()
+    process = start_server(server_args, port)
+    server = psutil.Process(process.pid)
+    try:
+        # 预热：导入工具模块，建立第一个会话后再测基线内存
+        async with open_session(kind, port):
+            pass
+        await anyio.sleep(0.5)
+        baseline = server.memory_info().rss
+
+        calls = 0
+        async with contextlib.AsyncExitStack() as stack:
+            sessions = [await stack.enter_async_context(open_session(kind, port)) for _ in range(clients)]
+            await anyio.sleep(0.5)
+            rss = server.memory_info().rss
+
+            stop_at = time.perf_counter() + duration
+
+            async def worker(session: ClientSession):
+                nonlocal calls
+                while time.perf_counter() < stop_at:
+                    await session.call_tool("echo", {"message": "hi"})
+                    calls += 1
+
+            started = time.perf_counter()
+            async with anyio.create_task_group() as tg:
+                for session in sessions:
+                    tg.start_soon(worker, session)
+            elapsed = time.perf_counter() - started
+            peak = server.memory_info().rss
+    finally:
+        process.terminate()
+        process.wait(timeout=30)
+    return {
+        "throughput": calls / elapsed,
+        "kb_per_client": (rss - baseline) / clients / 1024,
+        "rss_mb": peak / 1024 / 1024,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, default=20)
+    parser.add_argument("--duration", type=float, default=10)
+    parser.add_argument("--modes", nargs="+", choices=list(MODES), default=list(MODES))
+    args = parser.parse_args()
+
+    print(f"{args.clients} 个并发客户端，每种方式持续 {args.duration}s")
+    print(f"{'传输方式':<30}{'调用/秒':>10}{'每客户端内存(KB)':>18}{'服务器RSS(MB)':>16}")
+    for name in args.modes:
+        result = anyio.run(run_mode, name, args.clients, args.duration)
+        print(
+            f"{name:<30}{result['throughput']:>10.1f}{result['kb_per_client']:>18.1f}{result['rss_mb']:>16.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
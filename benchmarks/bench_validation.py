@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+参数校验开销基准测试
+
+对每个已注册工具，用一组有代表性的参数测量编译后的inputSchema校验函数的单次耗时。
+
+用法: python benchmarks/bench_validation.py [--calls 100000]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tools import _REGISTERED_TOOLS
+
+# 每个工具的示例参数，包含需要类型转换的字符串数字
+SAMPLE_ARGUMENTS = {
+    "echo": {"message": "hello"},
+    "calculator": {"expression": "2+2", "mode": "basic"},
+    "code_formatter": {"code": "x=1", "formatter": "black"},
+    "data_converter": {"data": "{}", "from_format": "json", "to_format": "yaml"},
+    "fetch": {"url": "https://example.com"},
+    "http_client": {"url": "https://example.com", "method": "POST", "timeout": "10"},
+    "image_gen": {"width": "200", "height": 100, "text": "hi"},
+    "ip_info": {"ip_address": "8.8.8.8"},
+    "pdf_llm": {"pdf_url": "https://example.com/a.pdf", "max_pages": "5"},
+    "postgres": {
+        "action": "execute_query", "host": "localhost", "database": "db",
+        "user": "u", "password": "p", "query": "select 1", "limit": "50",
+    },
+    "text_summary": {"text": "a. b. c.", "max_sentences": "2"},
+    "translator": {"text": "hello", "target_lang": "zh"},
+    "weather": {"city": "Beijing"},
+    "web_scraper": {"url": "https://example.com", "extract_type": "links"},
+    "browser_use": {"message": "open example.com"},
+    "batch": {
+        "calls": [
+            {"name": "echo", "arguments": {"message": "hello"}},
+            {"name": "weather", "arguments": {"city": "Beijing"}, "timeout": 5},
+        ],
+        "max_concurrency": "4",
+    },
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--calls", type=int, default=100000, help="每个工具的校验次数")
+    args = parser.parse_args()
+
+    print(f"{'tool':>16} {'us/call':>9}")
+    for name, entry in sorted(_REGISTERED_TOOLS.items()):
+        if name not in SAMPLE_ARGUMENTS:
+            print(f"{name:>16} {'(没有示例参数，跳过)':>9}")
+            continue
+        arguments = SAMPLE_ARGUMENTS[name]
+        validate = entry.validator
+        validate(arguments)
+        start = time.perf_counter()
+        for _ in range(args.calls):
+            validate(arguments)
+        elapsed = (time.perf_counter() - start) / args.calls * 1e6
+        print(f"{name:>16} {elapsed:>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,13 @@
 import importlib
 import inspect
+import logging
 import sys
 import os
 import mcp.types as types
 from typing import Callable, Dict, List, Optional
 
+logger = logging.getLogger(__name__)
+
 # Prompt注册表
 _REGISTERED_PROMPTS = {}
 
@@ -21,7 +24,7 @@ def _import_all_prompt_modules():
             try:
                 importlib.import_module(module_path)
             except ImportError as e:
-                print(f"无法导入模块 {module_path}: {e}")
+                logger.warning("无法导入模块 %s: %s", module_path, e)
 
 def register_all_prompts():
     """获取所有注册的prompts"""
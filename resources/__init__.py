@@ -1,11 +1,14 @@
 import importlib
 import inspect
+import logging
 import sys
 import os
 import mcp.types as types
 from typing import Callable, Dict, List, Optional
 from pydantic import FileUrl
 
+logger = logging.getLogger(__name__)
+
 # 资源注册表
 _REGISTERED_RESOURCES = {}
 
@@ -22,7 +25,7 @@ def _import_all_resource_modules():
             try:
                 importlib.import_module(module_path)
             except ImportError as e:
-                print(f"无法导入模块 {module_path}: {e}")
+                logger.warning("无法导入模块 %s: %s", module_path, e)
 
 def register_all_resources() -> list[types.Resource]:
     """获取所有注册的resources"""
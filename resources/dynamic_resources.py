@@ -40,6 +40,46 @@ def get_resources() -> list[types.Resource]:
         )
     )
     
+    # 工具并发限制（隔舱）状态资源
+    resources.append(
+        types.Resource(
+            uri=FileUrl("file:///tool_limits.json"),
+            name="tool_limits",
+            description="工具并发限制的执行数、排队深度和等待时间",
+            mimeType="application/json",
+        )
+    )
+    
+    # 工具结果缓存统计资源
+    resources.append(
+        types.Resource(
+            uri=FileUrl("file:///tool_cache.json"),
+            name="tool_cache",
+            description="工具结果缓存的命中率、淘汰次数和内存占用",
+            mimeType="application/json",
+        )
+    )
+    
+    # SSE会话状态资源
+    resources.append(
+        types.Resource(
+            uri=FileUrl("file:///sse_sessions.json"),
+            name="sse_sessions",
+            description="当前进程中SSE会话的空闲时间、进行中的请求和心跳延迟",
+            mimeType="application/json",
+        )
+    )
+    
+    # PostgreSQL连接池状态资源
+    resources.append(
+        types.Resource(
+            uri=FileUrl("file:///pg_pools.json"),
+            name="pg_pools",
+            description="当前进程中各PostgreSQL连接池的空闲连接数和使用中的连接数",
+            mimeType="application/json",
+        )
+    )
+    
     return resources
 
 def read_resource(name: str) -> str | bytes:
@@ -76,4 +116,21 @@ def read_resource(name: str) -> str | bytes:
         }
         return json.dumps(memory_data, indent=2)
     
+    elif name == "tool_limits" or name == "tool_limits.json":
+        # 工具并发限制状态
+        from tools import get_limit_stats
+        return json.dumps(get_limit_stats(), indent=2)
+    elif name == "tool_cache" or name == "tool_cache.json":
+        # 工具结果缓存统计
+        from tools import get_cache_stats
+        return json.dumps(get_cache_stats(), indent=2)
+    elif name == "sse_sessions" or name == "sse_sessions.json":
+        # SSE会话状态
+        from server.sessions import get_session_stats
+        return json.dumps(get_session_stats(), indent=2)
+    elif name == "pg_pools" or name == "pg_pools.json":
+        # PostgreSQL连接池状态
+        from tools.runtime.pg_pool import get_pool_stats
+        return json.dumps(get_pool_stats(), indent=2)
+    
     return None 
\ No newline at end of file
@@ -0,0 +1,253 @@
+"""
+服务器级准入控制
+
+所有传输方式的 tools/call 请求在进入SDK和工具之前都要先获得一个全局名额:
+- MCP_ADMISSION_MAX_IN_FLIGHT: 同时执行的工具调用总数上限（0表示不限制）
+- MCP_ADMISSION_MAX_QUEUE:     所有优先级共享的等待队列长度
+- 每个优先级有自己的最长排队时间（max_wait），超时的请求被拒绝而不是继续等待
+
+名额空出时按优先级放行：同一优先级内先来先服务，高优先级的等待者总是先于低优先级。
+低优先级只能使用全局上限的一部分（share），为交互式的轻量工具保留余量。
+队列已满时，新请求会挤掉队列中优先级更低的最新等待者；没有可挤掉的等待者时直接拒绝。
+被拒绝的请求立即以JSON-RPC错误 SERVER_OVERLOADED 返回，error.data.retry_after 为建议的重试间隔（秒），
+客户端可以稍后重试或改投其他服务器。
+
+工具各自的并发限制（tools.runtime.limits）在获得全局名额之后才生效。
+batch等只负责分发子调用的工具（UNMETERED_TOOLS）本身不占名额，由子调用各自获得名额，
+否则外层请求占住的名额会让它自己的子调用排不上队。
+"""
+
+import asyncio
+import json
+import os
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Optional
+
+import mcp.types as types
+from mcp.shared.exceptions import McpError
+
+from tools.runtime import metrics
+
+MAX_IN_FLIGHT = int(os.environ.get("MCP_ADMISSION_MAX_IN_FLIGHT", 128))
+MAX_QUEUE = int(os.environ.get("MCP_ADMISSION_MAX_QUEUE", 256))
+RETRY_AFTER = float(os.environ.get("MCP_ADMISSION_RETRY_AFTER", 1))
+
+# JSON-RPC错误码（实现自定义的服务器错误范围 -32000 ~ -32099）
+SERVER_OVERLOADED = -32005
+
+# 优先级配置，按优先级从高到低排列
+#   tools:     属于该优先级的工具，没有列出的工具使用 default
+#   max_wait:  在队列中等待的最长时间（秒）
+#   share:     该优先级最多可以占用的全局名额比例
+#
+# 可以通过环境变量 MCP_ADMISSION_CLASSES 传入JSON覆盖或补充这里的配置，例如:
+#   MCP_ADMISSION_CLASSES='{"heavy": {"max_wait": 30, "share": 0.25}}'
+PRIORITY_CLASSES = {
+    # 本地执行、毫秒级完成的工具
+    "interactive": {
+        "tools": ["echo", "calculator", "text_summary", "data_converter", "code_formatter"],
+        "max_wait": 1,
+        "share": 1.0,
+    },
+    "default": {"max_wait": 3, "share": 0.9},
+    # 调用LLM或浏览器、单次占用数十秒的工具
+    "heavy": {"tools": ["pdf_llm", "browser_use", "image_gen"], "max_wait": 10, "share": 0.5},
+}
+
+# 自身不做实际工作、由子调用各自获取名额的工具
+UNMETERED_TOOLS = frozenset({"batch"})
+
+ADMITTED = metrics.counter("mcp_admission_admitted_total", "Tool calls admitted, by priority", ("priority",))
+REJECTED = metrics.counter(
+    "mcp_admission_rejected_total", "Tool calls shed by admission control, by priority and reason", ("priority", "reason")
+)
+QUEUE_WAIT = metrics.histogram(
+    "mcp_admission_queue_seconds",
+    "Time admitted tool calls spent waiting for a global slot",
+    ("priority",),
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+
+
+class ServerOverloaded(McpError):
+    """服务器过载，调用在执行之前被拒绝，稍后重试或改投其他服务器即可"""
+
+    def __init__(self, tool_name: str, priority: "PriorityClass", controller: "AdmissionController", reason: str):
+        self.tool_name = tool_name
+        self.priority = priority.name
+        self.reason = reason
+        detail = {
+            "queue_full": "queue full",
+            "queue_timeout": f"queued more than {priority.max_wait}s",
+            "displaced": "displaced by higher priority calls",
+        }[reason]
+        super().__init__(types.ErrorData(
+            code=SERVER_OVERLOADED,
+            message=(
+                f"Server overloaded ({detail}; {controller.active}/{controller.max_in_flight} in flight, "
+                f"{controller.queued}/{controller.max_queue} queued), tool '{tool_name}' was not admitted, "
+                f"retry after {RETRY_AFTER:g}s"
+            ),
+            data={"retry_after": RETRY_AFTER, "priority": priority.name, "reason": reason},
+        ))
+
+
+class PriorityClass:
+    def __init__(self, name: str, rank: int, limit: int, max_wait: Optional[float]):
+        self.name = name
+        self.rank = rank
+        self.limit = limit
+        self.max_wait = max_wait
+        self.waiters: deque[asyncio.Future] = deque()
+
+
+class AdmissionController:
+    """全局并发上限 + 按优先级放行的有限等待队列"""
+
+    def __init__(self, max_in_flight: int, max_queue: int, classes: dict):
+        self.max_in_flight = max_in_flight
+        self.max_queue = max_queue
+        self.active = 0
+        self.classes: list[PriorityClass] = []
+        self._tool_classes: dict[str, PriorityClass] = {}
+        for rank, (name, config) in enumerate(classes.items()):
+            limit = max(1, int(max_in_flight * config.get("share", 1.0)))
+            priority = PriorityClass(name, rank, limit, config.get("max_wait"))
+            self.classes.append(priority)
+            for tool_name in config.get("tools", ()):
+                self._tool_classes[tool_name] = priority
+        self._default = next((c for c in self.classes if c.name == "default"), self.classes[-1])
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_in_flight > 0
+
+    @property
+    def queued(self) -> int:
+        return sum(len(priority.waiters) for priority in self.classes)
+
+    def classify(self, tool_name: str) -> PriorityClass:
+        return self._tool_classes.get(tool_name, self._default)
+
+    async def acquire(self, tool_name: str) -> PriorityClass:
+        priority = self.classify(tool_name)
+        if self.active < priority.limit and not any(c.waiters for c in self.classes[: priority.rank + 1]):
+            self.active += 1
+            ADMITTED.inc(priority.name)
+            return priority
+        if self.queued >= self.max_queue and not self._shed_lower(priority):
+            REJECTED.inc(priority.name, "queue_full")
+            raise ServerOverloaded(tool_name, priority, self, "queue_full")
+
+        waiter = asyncio.get_running_loop().create_future()
+        priority.waiters.append(waiter)
+        started = time.monotonic()
+        try:
+            admitted = await asyncio.wait_for(asyncio.shield(waiter), priority.max_wait)
+        except asyncio.TimeoutError:
+            admitted = self._abandon(priority, waiter)
+            if not admitted:
+                REJECTED.inc(priority.name, "queue_timeout")
+                raise ServerOverloaded(tool_name, priority, self, "queue_timeout")
+        except BaseException:
+            if self._abandon(priority, waiter):
+                # 被取消的同时拿到了名额，转交给下一个等待者
+                self.release()
+            raise
+        if not admitted:
+            REJECTED.inc(priority.name, "displaced")
+            raise ServerOverloaded(tool_name, priority, self, "displaced")
+        QUEUE_WAIT.observe(time.monotonic() - started, priority.name)
+        ADMITTED.inc(priority.name)
+        return priority
+
+    def _shed_lower(self, priority: PriorityClass) -> bool:
+        """队列已满：拒绝优先级最低的类中最新的一个等待者，为更高优先级的请求腾出位置"""
+        for lower in reversed(self.classes[priority.rank + 1:]):
+            while lower.waiters:
+                waiter = lower.waiters.pop()
+                if not waiter.done():
+                    # 等待者收到False后自行抛出ServerOverloaded
+                    waiter.set_result(False)
+                    return True
+        return False
+
+    def _abandon(self, priority: PriorityClass, waiter: asyncio.Future) -> bool:
+        """放弃排队。名额已经分配给这个等待者时返回True，已被挤出队列时返回False"""
+        if waiter.done() and not waiter.cancelled():
+            return waiter.result()
+        waiter.cancel()
+        try:
+            priority.waiters.remove(waiter)
+        except ValueError:
+            pass
+        return False
+
+    def release(self):
+        self.active -= 1
+        # 从最高优先级开始放行；某个优先级还有等待者但已到达它的上限时，不让更低的优先级越过它
+        for priority in self.classes:
+            while priority.waiters and self.active < priority.limit:
+                waiter = priority.waiters.popleft()
+                if not waiter.done():
+                    self.active += 1
+                    waiter.set_result(True)
+            if priority.waiters:
+                return
+
+    @asynccontextmanager
+    async def slot(self, tool_name: str):
+        """获取一个全局名额，退出时释放；未启用准入控制或工具属于 UNMETERED_TOOLS 时直接放行"""
+        if not self.enabled or tool_name in UNMETERED_TOOLS:
+            yield
+            return
+        await self.acquire(tool_name)
+        try:
+            yield
+        finally:
+            self.release()
+
+
+def _load_classes() -> dict:
+    classes = {name: dict(config) for name, config in PRIORITY_CLASSES.items()}
+    override = os.environ.get("MCP_ADMISSION_CLASSES")
+    if override:
+        for name, config in json.loads(override).items():
+            classes.setdefault(name, {}).update(config)
+    return classes
+
+
+_CONTROLLER: Optional[AdmissionController] = None
+
+
+def configure_admission(max_in_flight: int = None, max_queue: int = None, classes: dict = None) -> AdmissionController:
+    """按配置（默认使用环境变量和 PRIORITY_CLASSES）创建进程内的准入控制器"""
+    global _CONTROLLER
+    _CONTROLLER = AdmissionController(
+        MAX_IN_FLIGHT if max_in_flight is None else max_in_flight,
+        MAX_QUEUE if max_queue is None else max_queue,
+        _load_classes() if classes is None else classes,
+    )
+    return _CONTROLLER
+
+
+def get_admission_controller() -> AdmissionController:
+    return _CONTROLLER or configure_admission()
+
+
+def _in_flight() -> list[tuple[tuple, float]]:
+    return [((), _CONTROLLER.active)] if _CONTROLLER else []
+
+
+def _queued() -> list[tuple[tuple, float]]:
+    return [((p.name,), len(p.waiters)) for p in _CONTROLLER.classes] if _CONTROLLER else []
+
+
+metrics.register(metrics.CallbackMetric(
+    "mcp_admission_in_flight", "Tool calls holding a global admission slot", (), _in_flight
+))
+metrics.register(metrics.CallbackMetric(
+    "mcp_admission_queued", "Tool calls waiting for a global admission slot", ("priority",), _queued
+))
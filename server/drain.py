@@ -0,0 +1,123 @@
+"""
+优雅排空与关闭
+
+收到SIGTERM（或SIGINT）后 GracefulServer 按以下顺序关闭，用于滚动发布时不让客户端看到错误:
+1. 停止监听端口，新的连接由负载均衡或其他worker接收
+2. 进入排空状态：新的SSE会话返回503，新的工具调用立即以 SERVER_OVERLOADED（reason为shutting_down）拒绝，
+   客户端可以马上改投其他服务器
+3. 等待进行中的工具调用结束，最多 MCP_DRAIN_TIMEOUT 秒（默认30）；超时仍未结束的调用被取消，
+   客户端收到同样的shutting_down错误
+4. 通知各传输关闭已有会话（SSE会话在最后一个响应发送后结束），再由uvicorn关闭剩余连接
+5. 执行 tools.runtime.shutdown 中登记的清理函数：进程池、数据库连接、浏览器等
+
+排空期间再次收到信号时立即跳过等待。
+"""
+
+import asyncio
+import logging
+import os
+from contextlib import asynccontextmanager
+from typing import Awaitable, Callable
+
+import anyio
+import mcp.types as types
+import uvicorn
+from mcp.shared.exceptions import McpError
+
+from server.admission import SERVER_OVERLOADED
+from tools.runtime.shutdown import close_resources
+
+logger = logging.getLogger(__name__)
+
+DRAIN_TIMEOUT = float(os.environ.get("MCP_DRAIN_TIMEOUT", 30))
+
+# 取消超时调用后，等待它们完成清理的最长时间（秒）
+_CANCEL_GRACE = 5
+
+_DRAINING = False
+# 进行中的工具调用，每个调用一个取消范围
+_CALLS: set[anyio.CancelScope] = set()
+# 排空结束时调用的回调，例如关闭所有SSE会话
+_DRAIN_LISTENERS: list[Callable[[], Awaitable[None]]] = []
+
+
+class ServerShuttingDown(McpError):
+    """服务器正在关闭，调用没有执行或被中止，应改投其他服务器重试"""
+
+    def __init__(self, tool_name: str, cancelled: bool = False):
+        self.tool_name = tool_name
+        detail = "cancelled at drain deadline" if cancelled else "not accepting new calls"
+        super().__init__(types.ErrorData(
+            code=SERVER_OVERLOADED,
+            message=f"Server is shutting down ({detail}), tool '{tool_name}' should be retried on another server",
+            data={"retry_after": 0, "reason": "shutting_down"},
+        ))
+
+
+def is_draining() -> bool:
+    return _DRAINING
+
+
+def add_drain_listener(listener: Callable[[], Awaitable[None]]):
+    """登记一个在进行中的调用排空后执行的回调"""
+    _DRAIN_LISTENERS.append(listener)
+
+
+@asynccontextmanager
+async def call_scope(tool_name: str):
+    """登记一次进行中的工具调用；排空期间拒绝新调用，排空超时时取消调用并抛出ServerShuttingDown"""
+    if _DRAINING:
+        raise ServerShuttingDown(tool_name)
+    scope = anyio.CancelScope()
+    _CALLS.add(scope)
+    try:
+        with scope:
+            yield
+    finally:
+        _CALLS.discard(scope)
+    if scope.cancelled_caught:
+        raise ServerShuttingDown(tool_name, cancelled=True)
+
+
+async def _wait_calls(timeout: float, abort: Callable[[], bool]):
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    while _CALLS and loop.time() < deadline and not abort():
+        await asyncio.sleep(0.1)
+
+
+async def drain(timeout: float = DRAIN_TIMEOUT, abort: Callable[[], bool] = lambda: False):
+    """进入排空状态，等待进行中的调用结束，超时后取消剩余调用，然后通知各传输关闭会话"""
+    global _DRAINING
+    _DRAINING = True
+    if _CALLS:
+        logger.info("等待 %d 个进行中的工具调用结束（最多 %ss）", len(_CALLS), timeout)
+        await _wait_calls(timeout, abort)
+    if _CALLS:
+        logger.warning("排空超时，取消 %d 个仍在进行的工具调用", len(_CALLS))
+        for scope in list(_CALLS):
+            scope.cancel()
+        await _wait_calls(_CANCEL_GRACE, abort)
+    for listener in _DRAIN_LISTENERS:
+        try:
+            await listener()
+        except Exception:
+            logger.exception("关闭会话失败")
+
+
+class GracefulServer(uvicorn.Server):
+    """先排空进行中的工具调用再关闭连接的uvicorn服务器"""
+
+    def __init__(self, config: uvicorn.Config, drain_timeout: float = DRAIN_TIMEOUT):
+        super().__init__(config)
+        self.drain_timeout = drain_timeout
+
+    async def shutdown(self, sockets=None):
+        logger.info("停止接受新连接，开始排空")
+        for server in self.servers:
+            server.close()
+        for sock in sockets or []:
+            sock.close()
+        await drain(self.drain_timeout, abort=lambda: self.force_exit)
+        await super().shutdown(sockets)
+        await close_resources()
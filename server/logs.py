@@ -0,0 +1,195 @@
+"""
+日志配置
+
+所有模块通过 logging.getLogger(__name__) 记录日志，这里统一配置输出：
+调用方只把日志记录放进内存队列，格式化和写入由后台线程完成，不会在请求处理路径上做同步I/O；
+日志只写到stderr或文件，不会污染stdio模式下作为协议通道的stdout。
+
+每条日志自动带上当前调用的上下文（工具名、会话、请求ID）。通过环境变量配置:
+    MCP_LOG_LEVEL              日志级别，默认 INFO
+    MCP_LOG_FORMAT             text 或 json，默认 text
+    MCP_LOG_FILE               日志文件路径，默认写到stderr
+    MCP_LOG_DEBUG_SAMPLE_RATE  DEBUG日志的采样比例（0-1），默认 1，即全部输出
+"""
+
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+from typing import Optional
+
+from tools.runtime.context import CURRENT_TOOL, REQUEST_ID, SESSION_ID
+
+# 日志记录中可以出现的额外字段（通过 extra={...} 传入），JSON格式下原样输出
+_EXTRA_FIELDS = ("duration_ms", "outcome", "error")
+
+
+class ContextFilter(logging.Filter):
+    """在产生日志的任务中读取调用上下文，写入日志记录"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.tool = CURRENT_TOOL.get()
+        record.session = SESSION_ID.get()
+        record.request_id = REQUEST_ID.get()
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """按比例丢弃DEBUG日志，WARNING以上的日志总是保留"""
+
+    def __init__(self, rate: float):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno > logging.DEBUG or self.rate >= 1:
+            return True
+        return random.random() < self.rate
+
+
+class JsonFormatter(logging.Formatter):
+    """每条日志输出一行JSON"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": round(record.created, 6),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        for field in ("tool", "session", "request_id") + _EXTRA_FIELDS:
+            value = getattr(record, field, None)
+            if value is not None:
+                entry[field] = value
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    """可读的单行文本格式，有调用上下文时附在级别之后"""
+
+    def __init__(self):
+        super().__init__("%(asctime)s %(levelname)s %(name)s%(context)s %(message)s")
+
+    def format(self, record: logging.LogRecord) -> str:
+        parts = [
+            f"{field}={value}"
+            for field in ("tool", "session", "request_id") + _EXTRA_FIELDS
+            if (value := getattr(record, field, None)) is not None
+        ]
+        record.context = " [" + " ".join(parts) + "]" if parts else ""
+        return super().format(record)
+
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    """
+    只在调用方线程中合并消息参数和格式化异常，完整的格式化留给后台线程
+
+    标准的QueueHandler会在调用方线程中执行完整的format，这里把这部分开销移到了后台。
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+class _BufferedStreamHandler(logging.StreamHandler):
+    """写入时不逐条flush，由后台线程在队列清空时统一flush，高负载下大幅减少write系统调用"""
+
+    def emit(self, record: logging.LogRecord):
+        try:
+            self.stream.write(self.format(record) + self.terminator)
+        except Exception:
+            self.handleError(record)
+
+
+class _QueueListener(logging.handlers.QueueListener):
+    """后台线程：队列中暂时没有新记录时才flush输出"""
+
+    def dequeue(self, block: bool) -> logging.LogRecord:
+        try:
+            return self.queue.get_nowait()
+        except queue.Empty:
+            for handler in self.handlers:
+                handler.flush()
+            return self.queue.get(block)
+
+
+_LISTENER: Optional[logging.handlers.QueueListener] = None
+
+
+def configure_logging(
+    level: str = None,
+    fmt: str = None,
+    filename: str = None,
+    debug_sample_rate: float = None,
+):
+    """配置根日志记录器（重复调用时替换之前的配置）"""
+    global _LISTENER
+    level = (level or os.environ.get("MCP_LOG_LEVEL", "INFO")).upper()
+    fmt = fmt or os.environ.get("MCP_LOG_FORMAT", "text")
+    filename = filename or os.environ.get("MCP_LOG_FILE")
+    if debug_sample_rate is None:
+        debug_sample_rate = float(os.environ.get("MCP_LOG_DEBUG_SAMPLE_RATE", 1))
+
+    if filename:
+        stream = open(filename, "a", encoding="utf-8", buffering=65536)
+    else:
+        # stderr是行缓冲的，每行一次write；日志使用自己的缓冲写入同一个文件描述符
+        stream = open(sys.stderr.fileno(), "w", encoding="utf-8", buffering=65536, closefd=False)
+    output = _BufferedStreamHandler(stream)
+    output.setFormatter(JsonFormatter() if fmt == "json" else TextFormatter())
+
+    log_queue = queue.SimpleQueue()
+    handler = _QueueHandler(log_queue)
+    handler.addFilter(SamplingFilter(debug_sample_rate))
+    handler.addFilter(ContextFilter())
+
+    shutdown_logging()
+    root = logging.getLogger()
+    for existing in list(root.handlers):
+        root.removeHandler(existing)
+    root.addHandler(handler)
+    root.setLevel(level)
+    # 第三方库每个请求都会记录INFO日志（例如mcp的"Processing request"、httpx的每个请求），
+    # 只在DEBUG级别下输出
+    noisy_level = logging.DEBUG if level == "DEBUG" else logging.WARNING
+    for noisy in ("httpx", "httpcore", "mcp", "sse_starlette"):
+        logging.getLogger(noisy).setLevel(noisy_level)
+
+    # 格式化时不使用调用位置、进程和线程信息，省去每条记录在调用方线程中查找栈帧等开销
+    logging._srcfile = None
+    logging.logThreads = False
+    logging.logProcesses = False
+    logging.logMultiprocessing = False
+
+    _LISTENER = _QueueListener(log_queue, output, respect_handler_level=True)
+    _LISTENER.start()
+
+
+def shutdown_logging():
+    """停止后台线程，写出队列中剩余的日志"""
+    global _LISTENER
+    if _LISTENER is not None:
+        _LISTENER.stop()
+        for handler in _LISTENER.handlers:
+            handler.flush()
+            handler.close()
+            if handler.stream is not sys.stderr:
+                handler.stream.close()
+        _LISTENER = None
+
+
+atexit.register(shutdown_logging)
+
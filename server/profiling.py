@@ -0,0 +1,219 @@
+"""
+启动性能分析
+
+在一个全新的Python进程中从头启动服务器，记录从进程创建到各个启动阶段的耗时：
+导入tools、prompts、resources，构建工具/prompt/资源目录，以及处理第一个请求。
+同时记录每个模块的导入耗时和常驻内存(RSS)增量，以JSON格式输出，便于在发布之间对比冷启动，
+或发现新工具模块引入的重量级依赖。
+
+用法:
+    server --profile-startup [--profile-output startup.json]
+    python -m server.profiling [--output startup.json]
+"""
+
+import argparse
+import importlib
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from importlib.abc import MetaPathFinder
+
+import psutil
+
+_PROCESS = psutil.Process()
+
+
+def _rss() -> int:
+    return _PROCESS.memory_info().rss
+
+
+class ImportProfiler(MetaPathFinder):
+    """
+    记录每个模块的导入耗时和RSS增量
+
+    作为sys.meta_path中的第一个查找器，把实际查找委托给其余查找器，然后替换加载器实例上的
+    exec_module，在模块执行前后计时。self_ms/self_rss 不含嵌套导入的子模块，
+    cumulative_ms/cumulative_rss 包含。
+    """
+
+    def __init__(self):
+        self.records: dict[str, dict] = {}
+        self._stack: list[dict] = []
+
+    def install(self):
+        sys.meta_path.insert(0, self)
+
+    def uninstall(self):
+        if self in sys.meta_path:
+            sys.meta_path.remove(self)
+
+    def find_spec(self, fullname, path, target=None):
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, "find_spec"):
+                continue
+            spec = finder.find_spec(fullname, path, target)
+            if spec is not None:
+                self._wrap_loader(spec)
+                return spec
+        return None
+
+    def _wrap_loader(self, spec):
+        loader = spec.loader
+        # 内置和冻结模块的加载器是类本身，不能在上面打补丁，它们的导入开销也可以忽略
+        if loader is None or isinstance(loader, type) or not hasattr(loader, "exec_module"):
+            return
+        exec_module = loader.exec_module
+        profiler = self
+
+        def timed_exec_module(module):
+            frame = {"children_ms": 0.0, "children_rss": 0}
+            profiler._stack.append(frame)
+            rss_before = _rss()
+            start = time.perf_counter()
+            try:
+                exec_module(module)
+            finally:
+                elapsed = (time.perf_counter() - start) * 1000
+                rss_delta = _rss() - rss_before
+                profiler._stack.pop()
+                if profiler._stack:
+                    parent = profiler._stack[-1]
+                    parent["children_ms"] += elapsed
+                    parent["children_rss"] += rss_delta
+                profiler.records[spec.name] = {
+                    "module": spec.name,
+                    "self_ms": round(elapsed - frame["children_ms"], 3),
+                    "cumulative_ms": round(elapsed, 3),
+                    "self_rss_kb": (rss_delta - frame["children_rss"]) // 1024,
+                    "cumulative_rss_kb": rss_delta // 1024,
+                }
+
+        try:
+            loader.exec_module = timed_exec_module
+        except (AttributeError, TypeError):
+            pass
+
+
+class StartupProfile:
+    """按阶段记录启动时间线"""
+
+    def __init__(self):
+        # 进程创建时间（由操作系统记录，包含解释器自身的启动时间）
+        self.process_start = _PROCESS.create_time()
+        self.phases: list[dict] = []
+
+    def since_start_ms(self) -> float:
+        return round((time.time() - self.process_start) * 1000, 3)
+
+    def mark(self, name: str, started: float):
+        self.phases.append({
+            "phase": name,
+            "duration_ms": round((time.perf_counter() - started) * 1000, 3),
+            "since_start_ms": self.since_start_ms(),
+            "rss_kb": _rss() // 1024,
+        })
+
+
+async def _serve_first_request(app):
+    """通过内存中的连接完成initialize和第一个tools/list请求"""
+    from mcp.shared.memory import create_connected_server_and_client_session
+
+    async with create_connected_server_and_client_session(app) as client:
+        result = await client.list_tools()
+    return len(result.tools)
+
+
+def run_profile() -> dict:
+    """在当前进程中执行一次带分析的启动，返回报告字典（应在全新的进程中调用）"""
+    profile = StartupProfile()
+    profile.phases.append({
+        "phase": "interpreter_ready",
+        "duration_ms": None,
+        "since_start_ms": profile.since_start_ms(),
+        "rss_kb": _rss() // 1024,
+    })
+
+    profiler = ImportProfiler()
+    profiler.install()
+    try:
+        for package in ("tools", "prompts", "resources", "server.server"):
+            started = time.perf_counter()
+            importlib.import_module(package)
+            profile.mark(f"import_{package.replace('.', '_')}", started)
+
+        import anyio
+        from prompts import register_all_prompts
+        from resources import register_all_resources
+        from server.server import create_app
+        from tools import register_all_tools
+
+        started = time.perf_counter()
+        tool_count = len(register_all_tools())
+        prompt_count = len(register_all_prompts())
+        resource_count = len(register_all_resources())
+        profile.mark("build_catalogues", started)
+
+        started = time.perf_counter()
+        app = create_app()
+        listed = anyio.run(_serve_first_request, app)
+        profile.mark("first_request", started)
+    finally:
+        profiler.uninstall()
+
+    modules = sorted(
+        profiler.records.values(), key=lambda record: record["cumulative_ms"], reverse=True
+    )
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "pid": os.getpid(),
+        "phases": profile.phases,
+        "catalogues": {
+            "tools": tool_count,
+            "prompts": prompt_count,
+            "resources": resource_count,
+            "tools_listed": listed,
+        },
+        "modules": modules,
+    }
+
+
+def profile_in_subprocess(output: str | None = None) -> int:
+    """在全新的子进程中执行启动分析，保证测到的是冷启动"""
+    command = [sys.executable, "-m", "server.profiling"]
+    if output:
+        # 子进程在包根目录下运行，相对路径要按调用者的工作目录解析
+        command += ["--output", os.path.abspath(output)]
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    result = subprocess.run(command, cwd=root)
+    if result.returncode != 0:
+        raise SystemExit(result.returncode)
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Profile MCP server cold start")
+    parser.add_argument("--output", default=None, help="写入报告的文件路径，默认输出到stdout")
+    args = parser.parse_args()
+
+    # 工具模块在导入时可能会print，避免污染JSON输出
+    stdout = sys.stdout
+    sys.stdout = sys.stderr
+    try:
+        report = run_profile()
+    finally:
+        sys.stdout = stdout
+
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text)
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,36 +1,95 @@
+import asyncio
+import importlib.util
+import uuid
+import weakref
+
 import anyio
 import click
 import mcp.types as types
 from mcp.server import Server
+from mcp.server.lowlevel import NotificationOptions
 from pydantic import FileUrl
 
 # 导入工具模块
-from tools import call_tool, register_all_tools
+from tools import call_tool, register_all_tools, add_tools_changed_listener
 # 导入prompt模块
 from prompts import register_all_prompts, execute_prompt
 # 导入resource模块
 from resources import register_all_resources, get_resource_by_uri
+from tools.batch import set_admission as set_batch_admission
+from tools.runtime.context import REQUEST_ID, SESSION_ID
+from server.admission import get_admission_controller
+from server.drain import call_scope
+from server.logs import configure_logging
 
 
-@click.command()
-@click.option("--port", default=8000, help="Port to listen on for SSE")
-@click.option(
-    "--transport",
-    type=click.Choice(["stdio", "sse"]),
-    default="stdio",
-    help="Transport type",
-)
-def main(port: int, transport: str) -> int:
+def create_app() -> Server:
+    """创建MCP服务器并注册工具、prompt和资源的处理函数"""
     app = Server("mcp-website-fetcher")
 
-    @app.call_tool()
+    # 请求过工具列表的会话，工具注册表变化时向它们发送 tools/list_changed
+    tool_list_sessions = weakref.WeakSet()
+    pending_notifications = set()
+
+    async def send_tool_list_changed(session):
+        try:
+            await session.send_tool_list_changed()
+        except Exception:
+            # 会话已经断开
+            tool_list_sessions.discard(session)
+
+    def notify_tools_changed():
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        for session in list(tool_list_sessions):
+            task = loop.create_task(send_tool_list_changed(session))
+            pending_notifications.add(task)
+            task.add_done_callback(pending_notifications.discard)
+
+    add_tools_changed_listener(notify_tools_changed)
+
+    # 会话 -> 日志中使用的简短会话ID
+    session_ids = weakref.WeakKeyDictionary()
+
+    def session_id(session) -> str:
+        value = session_ids.get(session)
+        if value is None:
+            value = session_ids[session] = uuid.uuid4().hex[:8]
+        return value
+
+    # 参数由 tools.call_tool 按编译后的inputSchema校验（并做类型转换），不再由SDK重复校验
+    @app.call_tool(validate_input=False)
     async def call_tool_handler(
         name: str, arguments: dict
     ) -> list[types.TextContent | types.ImageContent | types.EmbeddedResource]:
-        return await call_tool(name, arguments)
+        # 客户端可以在请求的 _meta.timeout 中指定本次调用的时限（秒）
+        meta = app.request_context.meta
+        timeout = getattr(meta, "timeout", None) if meta is not None else None
+        # 每个请求在独立的任务中处理，这里设置的上下文只对本次调用可见；
+        # SSE会话由 SseSessionManager 预先设置了会话ID，与 sse_sessions.json 中的一致
+        if SESSION_ID.get() is None:
+            SESSION_ID.set(session_id(app.request_context.session))
+        REQUEST_ID.set(str(app.request_context.request_id))
+        return await call_tool(name, arguments, timeout=timeout)
+
+    # 准入控制包在SDK的tools/call处理函数外面：被拒绝的调用不做任何参数处理，以JSON-RPC错误返回。
+    # 关闭服务器时等待进行中的调用结束，排空期间的新调用同样以错误返回。
+    # batch请求本身不占名额，它的子调用经注入的 admission.slot 各自获得名额
+    admission = get_admission_controller()
+    set_batch_admission(admission.slot)
+    handle_call_tool = app.request_handlers[types.CallToolRequest]
+
+    async def admit_call_tool(request: types.CallToolRequest):
+        async with call_scope(request.params.name), admission.slot(request.params.name):
+            return await handle_call_tool(request)
+
+    app.request_handlers[types.CallToolRequest] = admit_call_tool
 
     @app.list_tools()
     async def list_tools() -> list[types.Tool]:
+        tool_list_sessions.add(app.request_context.session)
         return register_all_tools()
 
     # 注册所有prompts
@@ -66,42 +125,261 @@ def main(port: int, transport: str) -> int:
         except ValueError as e:
             raise ValueError(f"读取资源失败: {str(e)}")
 
-    if transport == "sse":
-        from mcp.server.sse import SseServerTransport
-        from starlette.applications import Starlette
-        from starlette.routing import Route, Mount
+    return app
 
-        sse = SseServerTransport("/messages/")
 
-        async def handle_sse(request):
-            async with sse.connect_sse(
-                request.scope, request.receive, request._send
-            ) as streams:
-                return await app.run(
-                    streams[0], streams[1], app.create_initialization_options()
-                )
+def create_init_options(app: Server):
+    """服务器初始化选项：声明工具列表变化时会发送通知"""
+    return app.create_initialization_options(
+        notification_options=NotificationOptions(tools_changed=True)
+    )
 
-        starlette_app = Starlette(
-            debug=True,
-            routes=[
-                Route("/sse", endpoint=handle_sse),
-                Mount("/messages/", app=sse.handle_post_message),
-            ],
-        )
 
+def create_sse_app(app: Server, init_options, endpoint: str = "/messages/", routes=(), debug: bool = True):
+    """
+    创建SSE模式的Starlette应用
+
+    客户端连接 /sse 建立会话，之后把消息POST到endpoint；routes是额外的路由，排在endpoint之后匹配。
+    会话数上限、空闲淘汰和心跳由 server.sessions.SseSessionManager 负责。
+    """
+    from mcp.server.sse import SseServerTransport
+    from starlette.applications import Starlette
+    from starlette.routing import Route, Mount
+
+    from starlette.responses import Response
+    from server.sessions import SseSessionManager
+    from tools.runtime import metrics
+    from tools.runtime.watchdog import start_watchdog_from_env
+
+    sse = SseServerTransport(endpoint)
+
+    async def handle_metrics(request):
+        return Response(metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+    return Starlette(
+        debug=debug,
+        routes=[
+            Route("/sse", endpoint=SseSessionManager(sse, app, init_options)),
+            Route("/metrics", endpoint=handle_metrics),
+            Mount(endpoint, app=sse.handle_post_message),
+            *routes,
+        ],
+        on_startup=[metrics.start_loop_lag_monitor, start_watchdog_from_env],
+    )
+
+
+def create_streamable_http_app(app: Server, stateless: bool = False, json_response: bool = False, debug: bool = True):
+    """
+    创建Streamable HTTP模式的Starlette应用，MCP端点为 /mcp
+
+    stateless为True时每个请求使用独立的传输，服务器不保存任何会话状态，请求可以由任意worker或主机处理；
+    否则会话由响应头 mcp-session-id 标识，后续请求必须到达同一个进程。
+    json_response为False时工具调用的响应是SSE流，调用过程中的通知会在最终结果之前逐条发送给客户端。
+    """
+    import contextlib
+
+    from mcp.server.streamable_http_manager import StreamableHTTPSessionManager
+    from starlette.applications import Starlette
+    from starlette.routing import Route, Mount
+
+    from starlette.responses import Response
+    from tools.runtime import metrics
+    from tools.runtime.watchdog import start_watchdog_from_env
+
+    session_manager = StreamableHTTPSessionManager(app, json_response=json_response, stateless=stateless)
+    http_requests = metrics.counter(
+        "mcp_http_requests_total", "Streamable HTTP requests by method", ("method",)
+    )
+
+    async def handle_streamable_http(scope, receive, send):
+        http_requests.inc(scope.get("method", ""))
+        await session_manager.handle_request(scope, receive, send)
+
+    async def handle_metrics(request):
+        return Response(metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+    @contextlib.asynccontextmanager
+    async def lifespan(starlette_app):
+        metrics.start_loop_lag_monitor()
+        start_watchdog_from_env()
+        async with session_manager.run():
+            yield
+
+    return Starlette(
+        debug=debug,
+        routes=[
+            Route("/metrics", endpoint=handle_metrics),
+            Mount("/mcp", app=handle_streamable_http),
+        ],
+        lifespan=lifespan,
+    )
+
+
+def uvicorn_options(
+    performance: bool, keep_alive: int = 5, backlog: int = 2048, limit_concurrency: int | None = None
+) -> dict:
+    """
+    uvicorn.Config 的调优参数
+
+    默认使用标准库的asyncio事件循环和纯Python的h11解析器，不依赖可选依赖；
+    performance为True时在已安装的情况下改用uvloop和httptools（pip install ".[performance]"），并关闭访问日志。
+    """
+    options = {
+        "loop": "asyncio",
+        "http": "h11",
+        "timeout_keep_alive": keep_alive,
+        "backlog": backlog,
+        "limit_concurrency": limit_concurrency,
+    }
+    if performance:
+        if importlib.util.find_spec("uvloop") is not None:
+            options["loop"] = "uvloop"
+        if importlib.util.find_spec("httptools") is not None:
+            options["http"] = "httptools"
+        options["access_log"] = False
+    return options
+
+
+@click.command()
+@click.option("--port", default=8000, help="Port to listen on for SSE and Streamable HTTP")
+@click.option(
+    "--transport",
+    type=click.Choice(["stdio", "sse", "streamable-http"]),
+    default="stdio",
+    help="Transport type",
+)
+@click.option(
+    "--stateless",
+    is_flag=True,
+    envvar="MCP_STATELESS_HTTP",
+    help="Streamable HTTP: keep no session state, so any worker or host can serve any request",
+)
+@click.option(
+    "--json-response",
+    is_flag=True,
+    help="Streamable HTTP: answer with a single JSON body instead of an SSE stream",
+)
+@click.option(
+    "--profile-startup",
+    is_flag=True,
+    help="Profile cold start in a fresh process and print a JSON report instead of serving",
+)
+@click.option(
+    "--profile-output",
+    type=click.Path(dir_okay=False, writable=True),
+    default=None,
+    help="Write the startup profile report to this file instead of stdout",
+)
+@click.option(
+    "--workers",
+    type=click.IntRange(min=1),
+    default=1,
+    envvar="MCP_WORKERS",
+    help="Number of worker processes sharing the port (SO_REUSEPORT)",
+)
+@click.option(
+    "--performance",
+    is_flag=True,
+    envvar="MCP_PERFORMANCE",
+    help="Use uvloop and httptools when installed, and turn off Starlette debug and access logs",
+)
+@click.option(
+    "--keep-alive",
+    type=click.IntRange(min=1),
+    default=5,
+    envvar="MCP_KEEP_ALIVE",
+    show_default=True,
+    help="Seconds to keep idle HTTP connections open",
+)
+@click.option(
+    "--backlog",
+    type=click.IntRange(min=1),
+    default=2048,
+    envvar="MCP_BACKLOG",
+    show_default=True,
+    help="Maximum number of pending connections in the listen queue",
+)
+@click.option(
+    "--limit-concurrency",
+    type=click.IntRange(min=1),
+    default=None,
+    envvar="MCP_LIMIT_CONCURRENCY",
+    help="Answer 503 once this many connections or requests are open (SSE streams count as connections)",
+)
+def main(
+    port: int,
+    transport: str,
+    stateless: bool,
+    json_response: bool,
+    profile_startup: bool,
+    profile_output: str | None,
+    workers: int,
+    performance: bool,
+    keep_alive: int,
+    backlog: int,
+    limit_concurrency: int | None,
+) -> int:
+    if profile_startup:
+        from server.profiling import profile_in_subprocess
+
+        return profile_in_subprocess(profile_output)
+
+    configure_logging()
+    app = create_app()
+    init_options = create_init_options(app)
+    options = uvicorn_options(performance, keep_alive, backlog, limit_concurrency)
+
+    if transport != "stdio" and workers > 1:
+        from server.workers import serve_workers, sse_worker_app
+
+        if transport == "sse":
+            return serve_workers(sse_worker_app(app, init_options), port, workers, options)
+        if not stateless:
+            # 有状态的会话只存在于创建它的worker中，无法在worker之间共享
+            raise click.UsageError("--workers with --transport streamable-http requires --stateless")
+        return serve_workers(
+            lambda worker_id, socket_dir: create_streamable_http_app(
+                app, stateless=True, json_response=json_response, debug=False
+            ),
+            port,
+            workers,
+            options,
+        )
+    if transport != "stdio":
         import uvicorn
 
-        uvicorn.run(starlette_app, host="0.0.0.0", port=port)
+        if transport == "sse":
+            starlette_app = create_sse_app(app, init_options, debug=not performance)
+        else:
+            starlette_app = create_streamable_http_app(
+                app, stateless=stateless, json_response=json_response, debug=not performance
+            )
+        import signal
+
+        from server.drain import GracefulServer
+
+        # log_config=None: uvicorn的日志交给根日志记录器，与其他日志使用相同的格式和输出；
+        # 收到SIGTERM时先排空进行中的工具调用，剩余连接最多再等待5秒
+        config = uvicorn.Config(
+            starlette_app, host="0.0.0.0", port=port, log_config=None, timeout_graceful_shutdown=5, **options
+        )
+        # 服务期间SIGTERM/SIGINT由uvicorn接管；结束后忽略uvicorn重新发出的信号，
+        # 让进程正常退出，atexit中写出缓冲的日志
+        for sig in (signal.SIGTERM, signal.SIGINT):
+            signal.signal(sig, signal.SIG_IGN)
+        GracefulServer(config).run()
     else:
         from mcp.server.stdio import stdio_server
+        from tools.runtime.watchdog import start_watchdog_from_env
 
         async def arun():
+            start_watchdog_from_env()
             async with stdio_server() as streams:
                 await app.run(
-                    streams[0], streams[1], app.create_initialization_options()
+                    streams[0], streams[1], init_options
                 )
 
-        anyio.run(arun)
+        anyio.run(arun, backend_options={"use_uvloop": options["loop"] == "uvloop"})
 
     return 0
 
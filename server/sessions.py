@@ -0,0 +1,342 @@
+"""
+SSE会话生命周期管理
+
+SSE模式下每个 /sse 连接都会运行一个完整的 app.run(...)，在连接断开之前一直占用它的流、任务和内存。
+SseSessionManager 接管 /sse 连接，在客户端和 app.run 之间转发消息，并负责:
+- 并发会话数上限：超过 MCP_SSE_MAX_SESSIONS 时新连接直接返回503
+- 空闲淘汰：没有进行中的请求、并且超过 MCP_SSE_IDLE_TIMEOUT 秒没有收到客户端消息的会话被关闭
+- 心跳：超过 MCP_SSE_PING_INTERVAL 秒没有收到客户端消息时发送MCP ping请求，
+  MCP_SSE_PING_TIMEOUT 秒内没有响应的客户端视为已失联，会话被关闭
+- 资源统计：每个会话进行中的请求数和请求体字节数、累计消息数等，
+  通过 /metrics 和资源 sse_sessions.json 暴露。内存只按收到的请求体字节数估算，
+  不包括正在生成或等待发送给客户端的响应
+
+以上时间配置为0时关闭对应功能。多进程模式下每个worker分别计数，上限也按worker计算。
+"""
+
+import itertools
+import logging
+import os
+import re
+import time
+import uuid
+import weakref
+
+import anyio
+import mcp.types as types
+from mcp.shared.message import SessionMessage
+from starlette.responses import Response
+
+from tools.runtime import metrics
+from tools.runtime.context import SESSION_ID
+from server.drain import add_drain_listener, is_draining
+
+logger = logging.getLogger(__name__)
+
+MAX_SESSIONS = int(os.environ.get("MCP_SSE_MAX_SESSIONS", 1000))
+IDLE_TIMEOUT = float(os.environ.get("MCP_SSE_IDLE_TIMEOUT", 600))
+PING_INTERVAL = float(os.environ.get("MCP_SSE_PING_INTERVAL", 30))
+PING_TIMEOUT = float(os.environ.get("MCP_SSE_PING_TIMEOUT", 10))
+
+# 心跳请求的ID前缀，客户端对它的响应不会转发给 app.run
+_PING_ID_PREFIX = "sse-heartbeat-"
+# SSE连接的第一个事件（endpoint）中带有传输层的会话ID，客户端用它POST消息
+_ENDPOINT_SESSION_ID = re.compile(rb"[?&]session_id=([0-9a-f]{32})")
+
+SESSIONS_TOTAL = metrics.counter("mcp_sse_sessions_total", "SSE sessions opened since start")
+SESSIONS_REJECTED = metrics.counter(
+    "mcp_sse_sessions_rejected_total", "SSE connections rejected because the session limit was reached"
+)
+SESSIONS_CLOSED = metrics.counter(
+    "mcp_sse_sessions_closed_total", "SSE sessions closed, by reason", ("reason",)
+)
+PING_RTT = metrics.histogram(
+    "mcp_sse_ping_rtt_seconds",
+    "Round-trip time of SSE heartbeat pings",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+
+_MANAGERS: "weakref.WeakSet[SseSessionManager]" = weakref.WeakSet()
+
+
+class SseSession:
+    """一个SSE会话的状态和资源统计"""
+
+    def __init__(self, client: str):
+        self.id = uuid.uuid4().hex[:8]
+        self.client = client
+        self.started = time.monotonic()
+        # 最近一次收到客户端请求或通知的时间（心跳响应不算）
+        self.last_activity = self.started
+        # 最近一次收到客户端任何消息的时间（包括心跳响应）
+        self.last_seen = self.started
+        # 进行中的请求: 请求ID -> 请求体字节数
+        self.in_flight: dict = {}
+        self.messages_in = 0
+        self.messages_out = 0
+        self.bytes_in = 0
+        self.last_ping_rtt: float | None = None
+        self.close_reason = "disconnect"
+        # SseServerTransport 分配的会话ID，从发给客户端的endpoint事件中取得
+        self.transport_id: str | None = None
+        self.cancel_scope: anyio.CancelScope | None = None
+        self._app_read_writer = None
+        self._pong: anyio.Event | None = None
+        self._ping_id: str | None = None
+
+    @property
+    def in_flight_bytes(self) -> int:
+        return sum(self.in_flight.values())
+
+    def close(self, reason: str):
+        """立即关闭会话，取消 app.run 中进行的所有请求"""
+        self.close_reason = reason
+        if self.cancel_scope is not None:
+            self.cancel_scope.cancel()
+
+    def shutdown(self):
+        """结束会话的输入：app.run 处理完已收到的请求后返回，最后的响应发送出去后会话结束"""
+        self.close_reason = "shutdown"
+        if self._app_read_writer is not None:
+            self._app_read_writer.close()
+
+    def stats(self, now: float) -> dict:
+        return {
+            "id": self.id,
+            "client": self.client,
+            "age": round(now - self.started, 1),
+            "idle": round(now - self.last_activity, 1),
+            "in_flight": len(self.in_flight),
+            "in_flight_bytes": self.in_flight_bytes,
+            "messages_in": self.messages_in,
+            "messages_out": self.messages_out,
+            "bytes_in": self.bytes_in,
+            "ping_rtt_ms": None if self.last_ping_rtt is None else round(self.last_ping_rtt * 1000, 1),
+        }
+
+
+def _content_length(message: SessionMessage) -> int:
+    request = getattr(message.metadata, "request_context", None)
+    try:
+        return int(request.headers.get("content-length", 0))
+    except (AttributeError, ValueError):
+        return 0
+
+
+class SseSessionManager:
+    """
+    /sse 端点的ASGI应用，用法: Route("/sse", endpoint=SseSessionManager(sse, app, init_options))
+
+    在 connect_sse 返回的流和 app.run 之间各插入一个转发任务，用来统计消息、识别心跳响应，
+    以及在淘汰会话时取消 app.run 并关闭SSE响应。
+    """
+
+    def __init__(
+        self,
+        transport,
+        app,
+        init_options,
+        max_sessions: int = MAX_SESSIONS,
+        idle_timeout: float = IDLE_TIMEOUT,
+        ping_interval: float = PING_INTERVAL,
+        ping_timeout: float = PING_TIMEOUT,
+    ):
+        self.transport = transport
+        self.app = app
+        self.init_options = init_options
+        self.max_sessions = max_sessions
+        self.idle_timeout = idle_timeout
+        self.ping_interval = ping_interval
+        self.ping_timeout = ping_timeout
+        self.sessions: dict[str, SseSession] = {}
+        self._ping_ids = itertools.count(1)
+        _MANAGERS.add(self)
+        add_drain_listener(self.close_all)
+
+    async def close_all(self):
+        for session in list(self.sessions.values()):
+            session.shutdown()
+
+    async def __call__(self, scope, receive, send):
+        if is_draining():
+            response = Response("Server is shutting down", status_code=503, headers={"Retry-After": "0"})
+            return await response(scope, receive, send)
+        if self.max_sessions and len(self.sessions) >= self.max_sessions:
+            SESSIONS_REJECTED.inc()
+            logger.warning("SSE会话数已达上限 %d，拒绝新连接", self.max_sessions)
+            response = Response(
+                f"Too many SSE sessions (limit {self.max_sessions})",
+                status_code=503,
+                headers={"Retry-After": "5"},
+            )
+            return await response(scope, receive, send)
+
+        client = scope.get("client")
+        session = SseSession(f"{client[0]}:{client[1]}" if client else "")
+        self.sessions[session.id] = session
+        SESSIONS_TOTAL.inc()
+
+        async def send_tracked(message):
+            if session.transport_id is None and message["type"] == "http.response.body":
+                match = _ENDPOINT_SESSION_ID.search(message.get("body", b""))
+                if match:
+                    session.transport_id = match.group(1).decode()
+            await send(message)
+
+        try:
+            async with self.transport.connect_sse(scope, receive, send_tracked) as (read_stream, write_stream):
+                await self._run_session(session, read_stream, write_stream)
+        finally:
+            del self.sessions[session.id]
+            SESSIONS_CLOSED.inc(session.close_reason)
+            self._forget_transport(session)
+            logger.info(
+                "SSE会话已关闭（%s），持续 %.1fs，处理 %d 条消息",
+                session.close_reason,
+                time.monotonic() - session.started,
+                session.messages_in,
+            )
+
+    async def _run_session(self, session: SseSession, read_stream, write_stream):
+        app_read_writer, app_read = anyio.create_memory_object_stream(0)
+        app_write, app_write_reader = anyio.create_memory_object_stream(0)
+        session._app_read_writer = app_read_writer
+        # app.run 为每个请求启动的任务会继承这里的上下文
+        SESSION_ID.set(session.id)
+        try:
+            async with anyio.create_task_group() as tg:
+                session.cancel_scope = tg.cancel_scope
+                tg.start_soon(self._forward_in, session, read_stream, app_read_writer)
+                tg.start_soon(self.app.run, app_read, app_write, self.init_options)
+                if self.idle_timeout or self.ping_interval:
+                    tg.start_soon(self._monitor, session, write_stream)
+                # 客户端断开或会话被关闭后 app.run 返回并关闭它的写流，
+                # 转发完最后的响应后结束其余任务
+                await self._forward_out(session, app_write_reader, write_stream)
+                tg.cancel_scope.cancel()
+        finally:
+            # 关闭写流后 SSE 响应结束，连接随之关闭
+            await write_stream.aclose()
+            await read_stream.aclose()
+
+    async def _forward_in(self, session: SseSession, read_stream, app_read_writer):
+        async with app_read_writer:
+            async for message in read_stream:
+                session.last_seen = time.monotonic()
+                if isinstance(message, SessionMessage):
+                    root = message.message.root
+                    if (
+                        isinstance(root, (types.JSONRPCResponse, types.JSONRPCError))
+                        and root.id == session._ping_id
+                    ):
+                        session._pong.set()
+                        continue
+                    size = _content_length(message)
+                    session.bytes_in += size
+                    if isinstance(root, types.JSONRPCRequest):
+                        session.in_flight[root.id] = size
+                session.messages_in += 1
+                session.last_activity = session.last_seen
+                try:
+                    await app_read_writer.send(message)
+                except anyio.ClosedResourceError:
+                    # 会话正在关闭，不再接收新消息
+                    return
+
+    async def _forward_out(self, session: SseSession, app_write_reader, write_stream):
+        async with app_write_reader:
+            async for message in app_write_reader:
+                root = message.message.root
+                if isinstance(root, (types.JSONRPCResponse, types.JSONRPCError)):
+                    session.in_flight.pop(root.id, None)
+                session.messages_out += 1
+                try:
+                    await write_stream.send(message)
+                except (anyio.BrokenResourceError, anyio.ClosedResourceError):
+                    # SSE响应已经结束（客户端断开）
+                    session.close("disconnect")
+                    return
+
+    async def _monitor(self, session: SseSession, write_stream):
+        interval = min(x for x in (self.ping_interval, self.idle_timeout / 2) if x)
+        while True:
+            await anyio.sleep(interval)
+            now = time.monotonic()
+            if self.idle_timeout and not session.in_flight and now - session.last_activity > self.idle_timeout:
+                logger.info("SSE会话空闲超过 %ss，关闭", self.idle_timeout)
+                session.close("idle")
+                return
+            if self.ping_interval and now - session.last_seen >= self.ping_interval:
+                if not await self._ping(session, write_stream):
+                    logger.warning(
+                        "SSE客户端 %s 在 %ss 内没有响应心跳，关闭会话", session.client, self.ping_timeout
+                    )
+                    session.close("heartbeat")
+                    return
+
+    async def _ping(self, session: SseSession, write_stream) -> bool:
+        session._ping_id = f"{_PING_ID_PREFIX}{next(self._ping_ids)}"
+        session._pong = anyio.Event()
+        request = types.JSONRPCRequest(jsonrpc="2.0", id=session._ping_id, method="ping")
+        started = time.monotonic()
+        with anyio.move_on_after(self.ping_timeout or None):
+            try:
+                await write_stream.send(SessionMessage(types.JSONRPCMessage(request)))
+            except (anyio.BrokenResourceError, anyio.ClosedResourceError):
+                return False
+            await session._pong.wait()
+            session.last_ping_rtt = time.monotonic() - started
+            PING_RTT.observe(session.last_ping_rtt)
+            return True
+        return False
+
+    def _forget_transport(self, session: SseSession):
+        # SseServerTransport 在连接断开后不会删除会话的写入端，这里按本会话的ID删除；
+        # SDK的内部结构变化（或已经自行清理）时什么都不做
+        writers = getattr(self.transport, "_read_stream_writers", None)
+        if session.transport_id is not None and isinstance(writers, dict):
+            writers.pop(uuid.UUID(session.transport_id), None)
+
+    def stats(self) -> list[dict]:
+        now = time.monotonic()
+        return [session.stats(now) for session in self.sessions.values()]
+
+
+def _sessions() -> list[SseSession]:
+    return [session for manager in _MANAGERS for session in manager.sessions.values()]
+
+
+def get_session_stats() -> dict:
+    """当前进程中所有SSE会话的资源统计"""
+    sessions = [session for manager in _MANAGERS for session in manager.stats()]
+    return {
+        "pid": os.getpid(),
+        "max_sessions": MAX_SESSIONS,
+        "idle_timeout": IDLE_TIMEOUT,
+        "ping_interval": PING_INTERVAL,
+        "ping_timeout": PING_TIMEOUT,
+        "active": len(sessions),
+        "in_flight": sum(s["in_flight"] for s in sessions),
+        "in_flight_bytes": sum(s["in_flight_bytes"] for s in sessions),
+        "sessions": sessions,
+    }
+
+
+def _active_sessions() -> list[tuple[tuple, float]]:
+    return [((), len(_sessions()))]
+
+
+def _session_usage() -> list[tuple[tuple, float]]:
+    sessions = _sessions()
+    return [
+        (("in_flight",), sum(len(s.in_flight) for s in sessions)),
+        (("in_flight_bytes",), sum(s.in_flight_bytes for s in sessions)),
+    ]
+
+
+metrics.register(metrics.CallbackMetric(
+    "mcp_sse_sessions_active", "Connected SSE sessions", (), _active_sessions
+))
+metrics.register(metrics.CallbackMetric(
+    "mcp_sse_session_usage", "Requests and request bytes held by connected SSE sessions", ("type",), _session_usage
+))
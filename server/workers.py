@@ -0,0 +1,294 @@
+"""
+多进程服务
+
+主进程预先导入所有工具模块，然后fork出N个worker进程；每个worker用SO_REUSEPORT各自监听同一个端口，
+由内核在worker之间分配新连接，JSON解析、HTML解析、格式化等工作分散到多个CPU核心上。
+无状态的Streamable HTTP请求可以由任意worker处理。
+
+SSE会话保存在建立会话的worker进程的内存中，客户端之后POST的消息必须到达同一个worker。
+每个worker把自己的编号放进发给客户端的消息地址 /messages/{worker}/ 中，并额外监听一个Unix socket；
+POST被内核分配到其他worker时，按地址中的编号转发到所属worker的Unix socket。
+
+主进程处理的信号:
+    SIGHUP           逐个替换worker：先启动新worker，再让旧worker停止接受新连接，处理完当前请求后退出
+    SIGTERM/SIGINT   停止所有worker后退出
+worker意外退出时由主进程重新启动。
+"""
+
+import logging
+import os
+import re
+import select
+import shutil
+import signal
+import socket
+import tempfile
+import time
+from typing import Callable
+
+import httpx
+from starlette.types import ASGIApp
+
+from server.drain import DRAIN_TIMEOUT
+from server.logs import configure_logging, shutdown_logging
+
+logger = logging.getLogger(__name__)
+
+# 停止或替换worker时，排空工具调用（server.drain.DRAIN_TIMEOUT）之后，
+# 再等待剩余请求和连接结束的最长时间（秒）
+GRACEFUL_TIMEOUT = float(os.environ.get("MCP_WORKER_GRACEFUL_TIMEOUT", 30))
+
+_MESSAGE_PATH = re.compile(r"^/messages/(\d+)/")
+
+
+def _socket_path(socket_dir: str, worker_id: int) -> str:
+    return os.path.join(socket_dir, f"worker-{worker_id}.sock")
+
+
+def _reuseport_socket(port: int) -> socket.socket:
+    """每个worker各自创建并绑定同一端口的监听socket，由内核分配新连接"""
+    # 显式指定IPPROTO_TCP：asyncio只对proto为IPPROTO_TCP的连接设置TCP_NODELAY，
+    # 否则小响应会被Nagle算法和延迟确认拖慢约40ms
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM, socket.IPPROTO_TCP)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+    sock.bind(("0.0.0.0", port))
+    sock.set_inheritable(True)
+    return sock
+
+
+def _unix_socket(path: str) -> socket.socket:
+    if os.path.exists(path):
+        os.unlink(path)
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.bind(path)
+    return sock
+
+
+class MessageForwarder:
+    """
+    ASGI应用：把POST到其他worker的会话消息转发到所属worker
+
+    所属worker已经退出时返回404，与会话不存在时的响应相同，客户端会重新建立会话。
+    """
+
+    def __init__(self, socket_dir: str):
+        self.socket_dir = socket_dir
+        self._clients: dict[int, httpx.AsyncClient] = {}
+
+    def _client(self, worker_id: int) -> httpx.AsyncClient:
+        client = self._clients.get(worker_id)
+        if client is None:
+            transport = httpx.AsyncHTTPTransport(uds=_socket_path(self.socket_dir, worker_id))
+            client = self._clients[worker_id] = httpx.AsyncClient(
+                transport=transport, base_url="http://worker", timeout=GRACEFUL_TIMEOUT
+            )
+        return client
+
+    async def __call__(self, scope, receive, send):
+        from starlette.requests import Request
+        from starlette.responses import Response
+
+        request = Request(scope, receive)
+        match = _MESSAGE_PATH.match(request.url.path)
+        if match is None:
+            await Response("Not Found", status_code=404)(scope, receive, send)
+            return
+        worker_id = int(match.group(1))
+        if not os.path.exists(_socket_path(self.socket_dir, worker_id)):
+            await Response("Could not find session", status_code=404)(scope, receive, send)
+            return
+
+        target = request.url.path + (f"?{request.url.query}" if request.url.query else "")
+        headers = {"content-type": request.headers.get("content-type", "application/json")}
+        try:
+            upstream = await self._client(worker_id).post(target, content=await request.body(), headers=headers)
+        except httpx.TransportError as e:
+            logger.warning("转发消息到 worker %d 失败: %s", worker_id, e)
+            client = self._clients.pop(worker_id, None)
+            if client is not None:
+                await client.aclose()
+            await Response("Could not find session", status_code=404)(scope, receive, send)
+            return
+        response = Response(
+            upstream.content,
+            status_code=upstream.status_code,
+            media_type=upstream.headers.get("content-type"),
+        )
+        await response(scope, receive, send)
+
+
+def sse_worker_app(app, init_options) -> Callable[[int, str], ASGIApp]:
+    """SSE模式的worker应用：消息地址中带worker编号，其他worker的消息转发到所属worker"""
+
+    def build(worker_id: int, socket_dir: str) -> ASGIApp:
+        from starlette.routing import Mount
+
+        from server.server import create_sse_app
+
+        return create_sse_app(
+            app,
+            init_options,
+            endpoint=f"/messages/{worker_id}/",
+            routes=[Mount("/messages/", app=MessageForwarder(socket_dir))],
+            debug=False,
+        )
+
+    return build
+
+
+def _run_worker(
+    build_app: Callable[[int, str], ASGIApp], port: int, worker_id: int, socket_dir: str, options: dict
+):
+    """worker进程：在SO_REUSEPORT端口和自己的Unix socket上运行build_app创建的应用，options为uvicorn的调优参数"""
+    import uvicorn
+
+    from server.drain import GracefulServer
+    from tools.runtime.executor import shutdown_process_pool
+
+    configure_logging()
+    # 终端挂起等信号只由主进程处理；SIGTERM/SIGINT在服务期间由uvicorn接管，
+    # 结束后忽略uvicorn重新发出的信号，正常执行清理
+    for sig in (signal.SIGHUP, signal.SIGTERM, signal.SIGINT):
+        signal.signal(sig, signal.SIG_IGN)
+
+    starlette_app = build_app(worker_id, socket_dir)
+    unix_path = _socket_path(socket_dir, worker_id)
+    sockets = [_reuseport_socket(port), _unix_socket(unix_path)]
+    config = uvicorn.Config(
+        starlette_app, log_config=None, timeout_graceful_shutdown=GRACEFUL_TIMEOUT, **options
+    )
+    try:
+        GracefulServer(config).run(sockets=sockets)
+    finally:
+        shutdown_process_pool()
+        if os.path.exists(unix_path):
+            os.unlink(unix_path)
+
+
+class WorkerManager:
+    """主进程：启动、监视和替换worker进程"""
+
+    def __init__(self, build_app: Callable[[int, str], ASGIApp], port: int, workers: int, options: dict = None):
+        self.build_app = build_app
+        self.port = port
+        self.count = workers
+        self.options = options or {}
+        self.socket_dir = tempfile.mkdtemp(prefix="mcp-workers-")
+        # pid -> (worker编号, 启动时间)
+        self.workers: dict[int, tuple[int, float]] = {}
+        # 已经通知退出、正在处理剩余请求的旧worker
+        self.retiring: set[int] = set()
+        self.stopping = False
+        self._next_id = 0
+        self._wakeup = None
+
+    def spawn(self) -> int:
+        worker_id = self._next_id
+        self._next_id += 1
+        # 后台日志线程不会被复制到子进程中，fork前停止，避免子进程继承被占用的锁
+        shutdown_logging()
+        pid = os.fork()
+        if pid == 0:
+            code = 1
+            try:
+                signal.set_wakeup_fd(-1)
+                self._wakeup[0].close()
+                self._wakeup[1].close()
+                _run_worker(self.build_app, self.port, worker_id, self.socket_dir, self.options)
+                code = 0
+            except BaseException:
+                logger.exception("worker %d 异常退出", worker_id)
+            finally:
+                shutdown_logging()
+                os._exit(code)
+        configure_logging()
+        self.workers[pid] = (worker_id, time.monotonic())
+        logger.info("worker %d 已启动 (pid %d)", worker_id, pid)
+        return pid
+
+    def reload(self):
+        """逐个替换所有worker，旧worker在新worker启动后开始优雅退出"""
+        logger.info("收到SIGHUP，重新启动 %d 个worker", self.count)
+        for pid in [pid for pid in self.workers if pid not in self.retiring]:
+            self.spawn()
+            self.retiring.add(pid)
+            os.kill(pid, signal.SIGTERM)
+
+    def reap(self):
+        while self.workers:
+            pid, status = os.waitpid(-1, os.WNOHANG)
+            if pid == 0:
+                return
+            worker_id, started = self.workers.pop(pid, (None, 0))
+            if worker_id is None:
+                continue
+            if pid in self.retiring or self.stopping:
+                self.retiring.discard(pid)
+                logger.info("worker %d 已退出 (pid %d)", worker_id, pid)
+                continue
+            logger.warning("worker %d 意外退出 (pid %d, 状态 %d)，重新启动", worker_id, pid, status)
+            if time.monotonic() - started < 1:
+                # 启动即失败，避免快速循环重启
+                time.sleep(1)
+            self.spawn()
+
+    def stop(self):
+        """通知所有worker优雅退出，超时后强制结束"""
+        self.stopping = True
+        for pid in self.workers:
+            os.kill(pid, signal.SIGTERM)
+        deadline = time.monotonic() + DRAIN_TIMEOUT + GRACEFUL_TIMEOUT + 5
+        while self.workers and time.monotonic() < deadline:
+            self.reap()
+            time.sleep(0.1)
+        for pid in self.workers:
+            logger.warning("worker %d 没有按时退出，强制结束", self.workers[pid][0])
+            os.kill(pid, signal.SIGKILL)
+            os.waitpid(pid, 0)
+        self.workers.clear()
+
+    def run(self) -> int:
+        # 信号处理函数只负责唤醒主循环，具体处理在主循环中进行
+        self._wakeup = socket.socketpair()
+        for sock in self._wakeup:
+            sock.setblocking(False)
+        signal.set_wakeup_fd(self._wakeup[1].fileno())
+        for sig in (signal.SIGTERM, signal.SIGINT, signal.SIGHUP, signal.SIGCHLD):
+            signal.signal(sig, lambda *args: None)
+
+        logger.info("以 %d 个worker进程在端口 %d 上提供服务", self.count, self.port)
+        try:
+            for _ in range(self.count):
+                self.spawn()
+            while True:
+                select.select([self._wakeup[0]], [], [], 1.0)
+                try:
+                    received = self._wakeup[0].recv(64)
+                except BlockingIOError:
+                    received = b""
+                if signal.SIGTERM in received or signal.SIGINT in received:
+                    break
+                if signal.SIGHUP in received:
+                    self.reload()
+                self.reap()
+            logger.info("正在停止所有worker")
+            self.stop()
+        finally:
+            signal.set_wakeup_fd(-1)
+            shutil.rmtree(self.socket_dir, ignore_errors=True)
+        return 0
+
+
+def serve_workers(build_app: Callable[[int, str], ASGIApp], port: int, workers: int, options: dict = None) -> int:
+    """
+    预先导入所有工具模块，然后以workers个进程提供服务
+
+    build_app(worker编号, Unix socket目录) 在每个worker进程中被调用，返回该worker的ASGI应用；
+    options是传给每个worker的 uvicorn.Config 的调优参数（见 server.server.uvicorn_options）。
+    """
+    from tools import preload_all_tools
+
+    # 在fork之前导入，所有worker共享已导入模块的内存页，启动时不再各自导入
+    preload_all_tools()
+    return WorkerManager(build_app, port, workers, options).run()
@@ -0,0 +1,7 @@
+import pytest
+
+
+@pytest.fixture
+def anyio_backend():
+    # 服务器和工具运行时直接使用asyncio
+    return "asyncio"
@@ -0,0 +1,70 @@
+import asyncio
+import json
+
+import mcp.types as types
+import pytest
+
+import tools
+from server import admission
+from tools import batch
+from tools.batch import run_batch
+
+pytestmark = pytest.mark.anyio
+
+
+def make_controller(max_in_flight: int, classes: dict):
+    controller = admission.configure_admission(max_in_flight=max_in_flight, max_queue=16, classes=classes)
+    batch.set_admission(controller.slot)
+    return controller
+
+
+@pytest.fixture
+def controller():
+    yield make_controller(2, {"default": {"max_wait": 5}})
+    batch.set_admission(None)
+    admission._CONTROLLER = None
+
+
+@pytest.fixture
+def slow_tool():
+    peak = {"active": 0}
+
+    async def slow(name, arguments):
+        controller = admission.get_admission_controller()
+        peak["active"] = max(peak["active"], controller.active)
+        await asyncio.sleep(0.01)
+        return [types.TextContent(type="text", text="ok")]
+
+    tool = types.Tool(name="test_slow", description="test", inputSchema={"type": "object", "properties": {}})
+    tools.register_tool(tool, slow)
+    yield peak
+    tools.unregister_tool("test_slow")
+
+
+async def test_sub_calls_take_admission_slots(controller, slow_tool):
+    result = await run_batch([{"name": "test_slow", "arguments": {}} for _ in range(8)], max_concurrency=8)
+
+    output = json.loads(result[0].text)
+    assert output["succeeded"] == 8
+    # 批量调用的并发度为8，但同时执行的子调用不超过全局上限
+    assert slow_tool["active"] == 2
+    assert controller.active == 0
+
+
+async def test_outer_batch_does_not_starve_sub_calls(controller, slow_tool):
+    # 子调用所在优先级的上限（1）不超过并发的外层batch请求数（2）
+    controller = make_controller(4, {
+        "default": {"max_wait": 5},
+        "heavy": {"tools": ["test_slow"], "max_wait": 1, "share": 0.25},
+    })
+
+    async def outer():
+        # 与 server.create_app 中的 admit_call_tool 一样，外层请求先经过准入控制
+        async with controller.slot("batch"):
+            return await run_batch([{"name": "test_slow", "arguments": {}}])
+
+    results = await asyncio.gather(outer(), outer())
+
+    assert [json.loads(result[0].text)["succeeded"] for result in results] == [1, 1]
+    assert slow_tool["active"] == 1
+    assert controller.active == 0
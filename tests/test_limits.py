@@ -0,0 +1,40 @@
+import asyncio
+
+import pytest
+
+from tools.runtime import limits
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def group():
+    limits.configure_limits({
+        "group": {"tools": ["test_a", "test_b"], "max_concurrent": 2, "max_queue": 8, "max_wait": 5},
+        "test_a": {"max_concurrent": 1, "max_queue": 8, "max_wait": 5},
+    })
+    yield limits._BULKHEADS
+    limits.configure_limits()
+
+
+async def test_tool_bulkhead_is_acquired_before_group(group):
+    assert [bulkhead.name for bulkhead in limits._TOOL_BULKHEADS["test_a"]] == ["test_a", "group"]
+
+    release = asyncio.Event()
+
+    async def call(tool_name):
+        async with limits.tool_slot(tool_name):
+            await release.wait()
+
+    # test_a的名额已满，排队等待的第二个test_a调用不占用组名额
+    calls = [asyncio.create_task(call("test_a")) for _ in range(3)]
+    await asyncio.sleep(0)
+    assert group["test_a"].waiting == 2
+    assert group["group"].active == 1
+
+    async with limits.tool_slot("test_b"):
+        assert group["group"].active == 2
+
+    release.set()
+    await asyncio.gather(*calls)
+    assert group["group"].active == 0
@@ -0,0 +1,118 @@
+import asyncio
+import os
+import time
+from types import SimpleNamespace
+
+import psycopg
+import pytest
+from psycopg.pq import TransactionStatus
+
+from tools.postgres import postgres_tool
+from tools.runtime import pg_pool
+
+pytestmark = pytest.mark.anyio
+
+CONCURRENCY = 50
+
+# 本机PostgreSQL的连接参数，连接不上时跳过使用真实数据库的测试
+PG_ARGUMENTS = {
+    "host": os.environ.get("MCP_TEST_PG_HOST", "127.0.0.1"),
+    "port": int(os.environ.get("MCP_TEST_PG_PORT", 5432)),
+    "database": os.environ.get("MCP_TEST_PG_DATABASE", "postgres"),
+    "user": os.environ.get("MCP_TEST_PG_USER", "postgres"),
+    "password": os.environ.get("MCP_TEST_PG_PASSWORD", "postgres"),
+}
+
+
+class SleepingCursor:
+    """执行每条语句都要等待 delay 秒的游标，等待期间让出事件循环"""
+
+    def __init__(self, delay: float):
+        self.delay = delay
+        self.description = None
+        self.rowcount = 0
+
+    async def execute(self, query, params=None):
+        await asyncio.sleep(self.delay)
+
+    async def close(self):
+        pass
+
+
+class SleepingConnection:
+    def __init__(self, delay: float):
+        self.delay = delay
+        self.closed = False
+        self.autocommit = False
+        self.info = SimpleNamespace(transaction_status=TransactionStatus.IDLE)
+
+    async def execute(self, query, params=None):
+        pass
+
+    def cursor(self, row_factory=None):
+        return SleepingCursor(self.delay)
+
+    async def commit(self):
+        pass
+
+    async def close(self):
+        self.closed = True
+
+
+@pytest.fixture
+def pool_size(monkeypatch):
+    monkeypatch.setattr(pg_pool, "MIN_SIZE", 0)
+    monkeypatch.setattr(pg_pool, "MAX_SIZE", CONCURRENCY)
+    monkeypatch.setattr(pg_pool, "MAX_CONNECTIONS", CONCURRENCY)
+
+
+async def run_concurrently(arguments: dict) -> tuple[list, float]:
+    started = time.perf_counter()
+    results = await asyncio.gather(*(postgres_tool("postgres", arguments) for _ in range(CONCURRENCY)))
+    return [result[0].text for result in results], time.perf_counter() - started
+
+
+async def test_queries_wait_concurrently(monkeypatch, pool_size):
+    delay = 0.2
+
+    async def open_(self, password):
+        await asyncio.sleep(0.01)
+        return pg_pool._Entry(SleepingConnection(delay))
+
+    monkeypatch.setattr(pg_pool.ConnectionPool, "_open", open_)
+    arguments = dict(
+        PG_ARGUMENTS, host="db.example", action="execute_query", query="DO $$ BEGIN PERFORM pg_sleep(0.2); END $$"
+    )
+    try:
+        texts, elapsed = await run_concurrently(arguments)
+    finally:
+        await pg_pool.close_pools()
+
+    assert texts == ["查询执行成功，影响了 0 行。"] * CONCURRENCY
+    # 串行执行需要 50 × 0.2s
+    assert elapsed < delay * 2
+
+
+async def test_pg_sleep_runs_concurrently(pool_size):
+    try:
+        conn = await psycopg.AsyncConnection.connect(
+            host=PG_ARGUMENTS["host"], port=PG_ARGUMENTS["port"], dbname=PG_ARGUMENTS["database"],
+            user=PG_ARGUMENTS["user"], password=PG_ARGUMENTS["password"], connect_timeout=2,
+        )
+    except psycopg.Error as e:
+        pytest.skip(f"没有可用的PostgreSQL: {e}")
+    async with conn:
+        max_connections = int((await (await conn.execute("SHOW max_connections")).fetchone())[0])
+    if max_connections < CONCURRENCY + 5:
+        pytest.skip(f"max_connections={max_connections} 不足以建立 {CONCURRENCY} 个连接")
+
+    try:
+        # 先建立所有连接，只测量查询本身
+        await run_concurrently(dict(PG_ARGUMENTS, action="execute_query", query="SELECT 1"))
+        texts, elapsed = await run_concurrently(dict(PG_ARGUMENTS, action="execute_query", query="SELECT pg_sleep(1)"))
+    finally:
+        await pg_pool.close_pools()
+
+    assert not [text for text in texts if "出错" in text or "失败" in text]
+    # 50 × pg_sleep(1) 并发执行约1秒，串行执行需要50秒
+    assert elapsed < 2
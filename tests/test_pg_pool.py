@@ -0,0 +1,72 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from psycopg.pq import TransactionStatus
+
+from tools.runtime import pg_pool
+
+pytestmark = pytest.mark.anyio
+
+
+class FakeConnection:
+    def __init__(self):
+        self.closed = False
+        self.info = SimpleNamespace(transaction_status=TransactionStatus.IDLE)
+
+    async def close(self):
+        self.closed = True
+
+
+@pytest.fixture
+async def fake_connections(monkeypatch):
+    opened = []
+
+    async def open_(self, password):
+        opened.append(password)
+        return pg_pool._Entry(FakeConnection())
+
+    async def prepare(self, entry):
+        return not entry.conn.closed
+
+    monkeypatch.setattr(pg_pool.ConnectionPool, "_open", open_)
+    monkeypatch.setattr(pg_pool.ConnectionPool, "_prepare", prepare)
+    monkeypatch.setattr(pg_pool, "MIN_SIZE", 3)
+    yield opened
+    await pg_pool.close_pools()
+
+
+async def test_pool_is_filled_to_min_size_and_kept(fake_connections):
+    key = ("db.example", 5432, "app", "reader")
+    pool = pg_pool.get_pool(*key)
+    async with pool.connection("secret"):
+        pass
+    await asyncio.sleep(0)
+    await pool._filling
+    assert len(pool.idle) == 3
+    assert fake_connections == ["secret"] * 3
+
+    # 空闲再久也保留 min_size 个连接，池不会被删除
+    await pg_pool._reap_pools(float("inf"))
+    assert pg_pool._POOLS[key] is pool
+    assert len(pool.idle) == 3
+
+    # 断开的连接在取出时被丢弃，回收任务随后补足
+    for entry in pool.idle:
+        entry.conn.closed = True
+    async with pool.connection("secret"):
+        pass
+    assert pool.size == 1
+    await pg_pool._reap_pools(0)
+    await pool._filling
+    assert pool.size == 3
+
+
+async def test_pool_without_min_size_is_removed_when_empty(fake_connections, monkeypatch):
+    monkeypatch.setattr(pg_pool, "MIN_SIZE", 0)
+    key = ("db.example", 5432, "app", "writer")
+    pool = pg_pool.get_pool(*key)
+    async with pool.connection("secret"):
+        pass
+    await pg_pool._reap_pools(float("inf"))
+    assert key not in pg_pool._POOLS
@@ -0,0 +1,61 @@
+import asyncio
+import contextlib
+
+import pytest
+
+from tools.runtime import pg_pool, pg_schema
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+async def fake_database(monkeypatch):
+    """不连接数据库：刷新为空操作，监听任务只记录自己是否在运行"""
+    listening = set()
+
+    @contextlib.asynccontextmanager
+    async def connection(self, password):
+        self._credential = pg_pool._digest(password)
+        yield None
+
+    async def refresh(self, conn):
+        self.stale = False
+        self.checked_at = 0.0
+
+    async def listen(self, password):
+        listening.add(self)
+        try:
+            await asyncio.Event().wait()
+        finally:
+            listening.discard(self)
+
+    monkeypatch.setattr(pg_pool.ConnectionPool, "connection", connection)
+    monkeypatch.setattr(pg_schema.SchemaCache, "_refresh", refresh)
+    monkeypatch.setattr(pg_schema.SchemaCache, "_listen", listen)
+    monkeypatch.setattr(pg_schema, "LISTEN", True)
+    yield listening
+    await pg_schema.close_listeners()
+    await pg_pool.close_pools()
+
+
+async def test_reaped_pool_keeps_one_listener(fake_database):
+    listening = fake_database
+    key = ("db.example", 5432, "app", "reader")
+
+    pool = pg_pool.get_pool(*key)
+    cache = await pg_schema.get_schema(pool, "secret")
+    await asyncio.sleep(0)
+    assert len(listening) == 1
+
+    # 空闲的池被回收，下一次调用创建新的池
+    await pg_pool._reap_pools(float("inf"))
+    assert key not in pg_pool._POOLS
+    new_pool = pg_pool.get_pool(*key)
+    assert new_pool is not pool
+
+    for _ in range(3):
+        assert await pg_schema.get_schema(new_pool, "secret") is cache
+    await asyncio.sleep(0)
+    assert cache.pool is new_pool
+    assert len(listening) == 1
+    assert not cache._listener.done()
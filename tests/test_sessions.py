@@ -0,0 +1,48 @@
+import anyio
+import pytest
+from mcp.server.sse import SseServerTransport
+
+from server.sessions import SseSessionManager
+
+pytestmark = pytest.mark.anyio
+
+
+class EchoApp:
+    """在客户端断开之前一直读取消息的最小 app.run"""
+
+    async def run(self, read_stream, write_stream, init_options):
+        async with write_stream:
+            async for _ in read_stream:
+                pass
+
+
+async def test_disconnected_session_is_removed_from_transport():
+    transport = SseServerTransport("/messages/")
+    manager = SseSessionManager(transport, EchoApp(), None, idle_timeout=0, ping_interval=0)
+    connected = anyio.Event()
+    disconnect = anyio.Event()
+    transport_ids = []
+
+    async def receive():
+        await disconnect.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        if message["type"] == "http.response.body" and b"session_id=" in message.get("body", b""):
+            transport_ids.extend(transport._read_stream_writers)
+            connected.set()
+
+    scope = {
+        "type": "http", "method": "GET", "path": "/sse", "root_path": "", "query_string": b"",
+        "headers": [], "client": ("127.0.0.1", 50000), "server": ("127.0.0.1", 8000),
+    }
+    async with anyio.create_task_group() as tg:
+        tg.start_soon(manager, scope, receive, send)
+        with anyio.fail_after(5):
+            await connected.wait()
+        [session] = manager.sessions.values()
+        assert [session.transport_id] == [key.hex for key in transport_ids]
+        disconnect.set()
+
+    assert manager.sessions == {}
+    assert transport._read_stream_writers == {}
@@ -0,0 +1,76 @@
+import mcp.types as types
+import pytest
+
+import tools
+from tools.runtime.cache import ToolCache, Uncacheable, get_tool_cache, uncacheable
+
+pytestmark = pytest.mark.anyio
+
+
+def _register(name: str, handler):
+    tool = types.Tool(name=name, description="test", inputSchema={"type": "object", "properties": {}})
+    tools.register_tool(tool, handler, options={"cache_ttl": 60})
+
+
+async def test_error_result_is_not_cached():
+    calls = []
+
+    async def flaky(name, arguments):
+        calls.append(arguments)
+        if len(calls) == 1:
+            return uncacheable([types.TextContent(type="text", text="请求错误: upstream unavailable")])
+        return [types.TextContent(type="text", text="ok")]
+
+    _register("test_flaky", flaky)
+    try:
+        first = await tools.call_tool("test_flaky", {})
+        assert isinstance(first, Uncacheable)
+        assert first[0].text.startswith("请求错误")
+
+        # 错误结果没有写入缓存，下一次调用重新执行并缓存成功的结果
+        second = await tools.call_tool("test_flaky", {})
+        third = await tools.call_tool("test_flaky", {})
+        assert second[0].text == third[0].text == "ok"
+        assert len(calls) == 2
+        assert get_tool_cache().stats()["tools"]["test_flaky"]["stores"] == 1
+    finally:
+        tools.unregister_tool("test_flaky")
+
+
+async def test_successful_result_is_cached():
+    calls = []
+
+    async def stable(name, arguments):
+        calls.append(arguments)
+        return [types.TextContent(type="text", text="ok")]
+
+    _register("test_stable", stable)
+    try:
+        await tools.call_tool("test_stable", {})
+        await tools.call_tool("test_stable", {})
+        assert len(calls) == 1
+    finally:
+        tools.unregister_tool("test_stable")
+
+
+async def test_oversized_result_is_not_counted_as_stored():
+    cache = ToolCache(max_entries=10, max_bytes=800, directory=None)
+    await cache.set("tool", "small", "x", 60)
+    await cache.set("tool", "large", "x" * 1000, 60)
+    assert cache.stats()["stores"] == 1
+    assert await cache.get("tool", "large") is None
+
+
+async def test_disk_entries_are_counted_without_querying(tmp_path):
+    cache = ToolCache(max_bytes=800, directory=str(tmp_path))
+    await cache.set("tool", "a", "x", 60)
+    await cache.set("tool", "a", "y", 60)
+    await cache.set("tool", "b", "x" * 1000, 60)
+    stats = cache.stats()
+    assert stats["disk_entries"] == 2
+    # 过大的结果不放进内存，但写入了磁盘缓存
+    assert stats["stores"] == 3
+    assert await cache.get("tool", "b") == "x" * 1000
+
+    # 重新打开时从文件中统计
+    assert ToolCache(directory=str(tmp_path)).stats()["disk_entries"] == 2
@@ -1,70 +1,335 @@
+import asyncio
 import importlib
 import inspect
-import sys
+import logging
 import os
+import time
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Optional
+
 import mcp.types as types
 
-# 工具注册表
-_REGISTERED_TOOLS = {}
+from .runtime import metrics
+from .runtime.cache import Uncacheable, cache_key, get_cache_stats, get_tool_cache
+from .runtime.deadline import DeadlineExceeded, clamp, deadline_scope, detach, resolve_timeout
+from .runtime.context import CURRENT_TOOL
+from .runtime.executor import DEFAULT_TASK_TIMEOUT, get_process_pool, run_tool_sync
+from .runtime.limits import ToolBusyError, get_limit_stats, tool_slot
+from .runtime.manifest import read_tool_manifest
+from .runtime.singleflight import SingleFlight
+from .runtime.validation import ToolArgumentError, Validator, compile_schema
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ToolEntry:
+    """注册表中的一个工具：工具定义和对应的调用函数
+
+    handler为None表示工具模块尚未导入，第一次调用时才会导入模块并解析调用函数。
+    validator是由inputSchema编译出的参数校验函数，在调用工具之前执行。
+    options是工具模块中声明的 TOOL_OPTIONS，支持:
+        cpu_bound: True 表示工具是CPU密集型的，在进程池中执行而不是在事件循环上执行
+        task_timeout: 在进程池中执行时的时间限制（秒）
+        timeout: 客户端没有指定时限时，一次调用的默认时限（秒，包括排队时间）
+        cache_ttl: 结果缓存的有效期（秒），只应为结果只取决于参数的工具设置
+        coalesce: 是否合并参数相同的并发调用，默认对声明了cache_ttl的工具启用
+    """
+    tool: types.Tool
+    handler: Optional[Callable[[str, dict], Awaitable[list]]]
+    module: str
+    validator: Optional[Validator] = None
+    options: dict = field(default_factory=dict)
+
+
+# 工具注册表: 工具名 -> ToolEntry
+_REGISTERED_TOOLS: dict[str, ToolEntry] = {}
+
+# 预先构建的工具列表（tools/list的响应），注册表变化时置为None重建
+_TOOLS_CACHE: list[types.Tool] | None = None
+
+# 注册表变化时的回调函数（例如向客户端发送 tools/list_changed 通知）
+_CHANGE_LISTENERS: list[Callable[[], None]] = []
+
+# 启动时批量建立注册表期间不触发变化通知
+_BUILDING_REGISTRY = False
 
-def _import_all_tool_modules():
-    """自动导入tools目录下的所有模块"""
+# 正在执行的可合并调用，参数相同的并发调用共享一次执行
+_IN_FLIGHT = SingleFlight()
+
+def _list_tool_modules() -> list[tuple[str, str]]:
+    """列出tools目录下的所有工具模块，返回 (模块路径, 文件路径) 列表，不导入模块"""
     # 获取tools目录的路径
     tools_dir = os.path.dirname(os.path.abspath(__file__))
     
+    modules = []
     # 遍历tools目录中的所有Python文件
-    for filename in os.listdir(tools_dir):
+    for filename in sorted(os.listdir(tools_dir)):
         if filename.endswith('.py') and filename != '__init__.py':
             module_name = filename[:-3]  # 去掉.py后缀
-            module_path = f"tools.{module_name}"
+            modules.append((f"tools.{module_name}", os.path.join(tools_dir, filename)))
+    return modules
+
+def _find_tool_handler(module, tool_name: str):
+    """在模块中查找工具调用函数（以_tool结尾的协程函数）"""
+    handlers = [
+        obj for obj_name, obj in inspect.getmembers(module, inspect.iscoroutinefunction)
+        if obj_name.endswith('_tool') and obj.__module__ == module.__name__
+    ]
+    # 优先使用与工具同名的函数，例如 echo -> echo_tool
+    for handler in handlers:
+        if handler.__name__ == f"{tool_name}_tool":
+            return handler
+    if len(handlers) == 1:
+        return handlers[0]
+    return None
+
+def add_tools_changed_listener(listener: Callable[[], None]):
+    """注册一个回调，在工具注册表发生变化时被调用"""
+    _CHANGE_LISTENERS.append(listener)
+
+def remove_tools_changed_listener(listener: Callable[[], None]):
+    """移除之前注册的变化回调"""
+    if listener in _CHANGE_LISTENERS:
+        _CHANGE_LISTENERS.remove(listener)
+
+def _registry_changed():
+    """注册表发生变化：丢弃缓存的工具列表并通知监听者"""
+    global _TOOLS_CACHE
+    _TOOLS_CACHE = None
+    if _BUILDING_REGISTRY:
+        return
+    for listener in list(_CHANGE_LISTENERS):
+        try:
+            listener()
+        except Exception as e:
+            logger.warning("工具变化通知失败: %s", e)
+
+def register_tool(tool: types.Tool, handler=None, module: str = None, options: dict = None):
+    """向注册表中添加（或替换）一个工具
+
+    handler为None时需要提供module，工具模块会在第一次调用时导入。
+    """
+    options = dict(options or {})
+    existing = _REGISTERED_TOOLS.get(tool.name)
+    if (
+        existing is not None
+        and existing.handler is handler
+        and existing.tool == tool
+        and existing.options == options
+    ):
+        # 完全相同的定义，注册表没有变化
+        return
+    _REGISTERED_TOOLS[tool.name] = ToolEntry(
+        tool=tool,
+        handler=handler,
+        module=module or handler.__module__,
+        validator=compile_schema(tool.name, tool.inputSchema),
+        options=options,
+    )
+    _registry_changed()
+
+def unregister_tool(name: str) -> bool:
+    """从注册表中移除一个工具，返回是否确实移除"""
+    if _REGISTERED_TOOLS.pop(name, None) is None:
+        return False
+    _registry_changed()
+    return True
+
+def _build_registry():
+    """根据工具清单建立 工具名 -> 工具 的注册表（只在启动时执行一次）
+
+    工具名和inputSchema从模块源码中静态读取，不导入模块本身；langchain、browser_use、
+    sympy等重量级依赖要到工具第一次被调用时才会导入。
+    """
+    global _BUILDING_REGISTRY
+    _BUILDING_REGISTRY = True
+    try:
+        for module_path, filename in _list_tool_modules():
+            manifest = read_tool_manifest(filename)
+            if manifest is None:
+                # 无法静态读取工具定义，退回到导入模块
+                _register_module(module_path)
+                continue
+            for tool in manifest["tools"]:
+                register_tool(types.Tool(**tool), None, module_path, manifest["options"])
+    finally:
+        _BUILDING_REGISTRY = False
+
+def _register_module(module_path: str):
+    """导入工具模块，并把它定义的所有工具加入注册表"""
+    try:
+        module = importlib.import_module(module_path)
+    except ImportError as e:
+        logger.warning("无法导入模块 %s: %s", module_path, e)
+        return
+    if not hasattr(module, 'get_tools'):
+        return
+    options = getattr(module, 'TOOL_OPTIONS', {})
+    for tool in module.get_tools():
+        handler = _find_tool_handler(module, tool.name)
+        if handler is None:
+            logger.warning("模块 %s 中没有找到工具 %s 的调用函数", module_path, tool.name)
+            continue
+        if tool.name in _REGISTERED_TOOLS and _REGISTERED_TOOLS[tool.name].module != module_path:
+            logger.warning("工具 %s 重复注册，使用 %s 中的定义", tool.name, module_path)
+        register_tool(tool, handler, module_path, options)
+
+def _load_handler(entry: ToolEntry):
+    """第一次调用时导入工具模块并解析调用函数"""
+    try:
+        module = importlib.import_module(entry.module)
+    except ImportError as e:
+        # 依赖缺失，工具不可用：从注册表中移除，客户端会收到 tools/list_changed
+        unregister_tool(entry.tool.name)
+        raise ValueError(f"工具 {entry.tool.name} 不可用，无法导入模块 {entry.module}: {e}")
+    handler = _find_tool_handler(module, entry.tool.name)
+    if handler is None:
+        raise ValueError(f"模块 {entry.module} 中没有找到工具 {entry.tool.name} 的调用函数")
+    entry.handler = handler
+    return handler
+
+def preload_all_tools():
+    """立即导入所有工具模块并解析调用函数（例如在fork多个worker进程之前预加载）"""
+    for entry in list(_REGISTERED_TOOLS.values()):
+        if entry.handler is None:
             try:
-                importlib.import_module(module_path)
-            except ImportError as e:
-                print(f"无法导入模块 {module_path}: {e}")
+                _load_handler(entry)
+            except ValueError as e:
+                logger.warning("%s", e)
 
 def register_all_tools():
-    """获取所有注册工具的统一接口"""
-    tools_list = []
-    
-    # 确保所有工具模块都已导入
-    _import_all_tool_modules()
-    print("Imported all tool modules")
-    
-    # 遍历tools包中的所有模块
-    for module_name in list(sys.modules.keys()):
-        if module_name.startswith('tools.') and module_name != 'tools.__init__':
-            module = sys.modules[module_name]
-            
-            # 查找模块中的get_tools函数
-            if hasattr(module, 'get_tools'):
-                tools_list.extend(module.get_tools())
-    print(f"Found {len(tools_list)} tools")
-    return tools_list
-
-async def call_tool(name, arguments):
-    """统一的工具调用接口"""
-    # 确保所有工具模块都已导入
-    _import_all_tool_modules()
-    
-    # 遍历tools包中的所有模块
-    for module_name in list(sys.modules.keys()):
-        if module_name.startswith('tools.') and module_name != 'tools.__init__':
-            module = sys.modules[module_name]
-            
-            # 查找模块中的工具函数
-            for obj_name, obj in inspect.getmembers(module):
-                if obj_name.endswith('_tool') and inspect.iscoroutinefunction(obj):
-                    try:
-                        # 尝试调用工具函数
-                        return await obj(name, arguments)
-                    except ValueError:
-                        # 如果工具不匹配，继续查找下一个
-                        continue
-    
-    # 没有找到匹配的工具
-    raise ValueError(f"Unknown tool: {name}")
+    """获取所有注册工具的统一接口
+
+    工具列表只在注册表变化后重建一次，之后的 tools/list 请求直接返回内存中的列表。
+    """
+    global _TOOLS_CACHE
+    if _TOOLS_CACHE is None:
+        _TOOLS_CACHE = [entry.tool for entry in _REGISTERED_TOOLS.values()]
+    return _TOOLS_CACHE
+
+async def call_tool(name, arguments, timeout: float = None):
+    """统一的工具调用接口
+
+    通过注册表直接定位工具的调用函数。工具内部抛出的ValueError会原样传给调用方，
+    不会再被当作"工具不匹配"而尝试下一个模块。参数在导入工具模块和执行任何网络、
+    数据库操作之前按inputSchema校验，不合法时抛出ToolArgumentError。
+    调用受 tools.runtime.limits 中配置的并发限制约束，排队已满或等待超时时抛出ToolBusyError。
+
+    每次调用都有截止时间：timeout为客户端请求的时限，未指定时使用工具的默认时限。
+    截止时间到达时正在进行的排队、HTTP请求、LLM调用和进程池任务都会被取消，
+    并抛出DeadlineExceeded；客户端取消请求时同样会取消这些操作。
+    声明了cache_ttl的工具，相同参数的调用在有效期内直接返回缓存的结果，不占用并发名额；
+    缓存未命中时，参数相同的并发调用合并为一次执行，共享同一个结果。
+    每次调用的结果和耗时都记录到 tools.runtime.metrics 中的指标，并记录一条日志。
+    """
+    entry = _REGISTERED_TOOLS.get(name)
+    if entry is None:
+        # 没有找到匹配的工具
+        raise ValueError(f"Unknown tool: {name}")
+
+    started = time.perf_counter()
+    metrics.TOOL_IN_FLIGHT.inc(name)
+    token = CURRENT_TOOL.set(name)
+    try:
+        result = await _call_tool(entry, name, arguments, timeout)
+    except asyncio.CancelledError:
+        metrics.TOOL_CALLS.inc(name, "cancelled")
+        _log_call(logging.INFO, "cancelled", started)
+        raise
+    except Exception as e:
+        metrics.TOOL_CALLS.inc(name, "error")
+        metrics.TOOL_ERRORS.inc(name, type(e).__name__)
+        _log_call(logging.WARNING, "error", started, f"{type(e).__name__}: {e}")
+        raise
+    else:
+        metrics.TOOL_CALLS.inc(name, "ok")
+        _log_call(logging.INFO, "ok", started)
+    finally:
+        CURRENT_TOOL.reset(token)
+        metrics.TOOL_IN_FLIGHT.dec(name)
+        metrics.TOOL_DURATION.observe(time.perf_counter() - started, name)
+    return result
+
+def _log_call(level: int, outcome: str, started: float, error: str = None):
+    """每次调用结束时记录一条日志，工具名、会话和请求ID由日志配置从上下文中附加"""
+    if logger.isEnabledFor(level):
+        duration_ms = round((time.perf_counter() - started) * 1000, 3)
+        logger.log(
+            level, "tool call %s", outcome,
+            extra={"duration_ms": duration_ms, "outcome": outcome, "error": error},
+        )
+
+async def _call_tool(entry: ToolEntry, name: str, arguments: dict, timeout: Optional[float]):
+    if entry.validator is not None:
+        arguments = entry.validator(arguments)
+    async with deadline_scope(name, resolve_timeout(timeout, entry.options)):
+        cache_ttl = entry.options.get("cache_ttl")
+        if not entry.options.get("coalesce", bool(cache_ttl)):
+            async with tool_slot(name):
+                return await _execute(entry, name, arguments)
+
+        # 参数已经过校验和补全默认值，写法不同但等价的参数会得到相同的键
+        key = cache_key(name, arguments)
+        if cache_ttl:
+            result = await get_tool_cache().get(name, key)
+            if result is not None:
+                return result
+        return await _IN_FLIGHT.do(name, key, lambda: _execute_once(entry, name, arguments, key))
+
+async def _execute_once(entry: ToolEntry, name: str, arguments: dict, key: str):
+    """可合并调用的共享执行：占用一个并发名额，结果写入缓存"""
+    # 共享执行持续到最后一个等待者离开，而不是第一个调用者的截止时间
+    detach()
+    async with tool_slot(name):
+        result = await _execute(entry, name, arguments)
+    cache_ttl = entry.options.get("cache_ttl")
+    # 工具用 uncacheable() 标记的结果（上游服务出错等）只返回给本次调用及合并到它的调用
+    if cache_ttl and not isinstance(result, Uncacheable):
+        await get_tool_cache().set(name, key, result, cache_ttl)
+    return result
+
+async def _execute(entry: ToolEntry, name: str, arguments: dict):
+    """执行工具调用"""
+    if entry.options.get("cpu_bound"):
+        pool = get_process_pool()
+        if pool is not None:
+            # CPU密集型工具在工作进程中执行，主进程不需要导入工具模块
+            timeout = clamp(entry.options.get("task_timeout", DEFAULT_TASK_TIMEOUT))
+            return await pool.run(run_tool_sync, entry.module, name, arguments, timeout=timeout)
+    handler = entry.handler or _load_handler(entry)
+    return await handler(name, arguments)
+
+def get_coalescing_stats() -> dict:
+    """返回合并执行的统计：每个工具实际执行和被合并的调用数"""
+    return _IN_FLIGHT.stats()
+
+metrics.register(metrics.CallbackMetric(
+    "mcp_tool_coalesced_calls_total",
+    "Tool calls that joined an identical in-flight call instead of executing",
+    ("tool",),
+    lambda: [((tool,), stats["coalesced"]) for tool, stats in _IN_FLIGHT.stats()["tools"].items()],
+    type="counter",
+))
 
-# 在导入时自动导入所有工具模块
-_import_all_tool_modules()
+# 在导入时根据工具清单建立注册表，工具模块本身按需导入
+_build_registry()
+if os.environ.get("MCP_PRELOAD_TOOLS", "").lower() in ("1", "true"):
+    preload_all_tools()
 
-__all__ = ["register_all_tools", "call_tool"] 
\ No newline at end of file
+__all__ = [
+    "register_all_tools",
+    "call_tool",
+    "register_tool",
+    "unregister_tool",
+    "preload_all_tools",
+    "add_tools_changed_listener",
+    "remove_tools_changed_listener",
+    "ToolEntry",
+    "ToolArgumentError",
+    "ToolBusyError",
+    "DeadlineExceeded",
+    "get_limit_stats",
+    "get_cache_stats",
+    "get_coalescing_stats",
+]
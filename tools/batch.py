@@ -0,0 +1,106 @@
+import asyncio
+import json
+import time
+from contextlib import nullcontext
+
+import mcp.types as types
+
+# 一次批量调用最多包含的子调用数
+MAX_BATCH_CALLS = 100
+
+# 子调用的全局准入：服务器层通过 set_admission 注入，参数为工具名、返回异步上下文管理器；未注入时不做准入控制
+_admission_slot = None
+
+
+def set_admission(slot) -> None:
+    """设置子调用获取全局名额的方式，例如 AdmissionController.slot"""
+    global _admission_slot
+    _admission_slot = slot
+
+
+async def run_call(index: int, call: dict, semaphore: asyncio.Semaphore) -> dict:
+    """通过统一的调用接口执行一个子调用，返回该子调用的结果或错误以及耗时
+
+    外层的batch请求本身不占全局名额，每个子调用在这里按自己的优先级获得一个名额，
+    批量调用因此不能越过全局并发上限；排队超时或被挤出的子调用以 ServerOverloaded 错误返回。
+    """
+    from tools import call_tool
+
+    name = call.get("name")
+    item = {"index": index, "name": name}
+    started = time.perf_counter()
+    try:
+        if not isinstance(name, str) or not name:
+            raise ValueError("Missing required field 'name'")
+        if name == "batch":
+            raise ValueError("batch调用不能嵌套")
+        async with semaphore:
+            started = time.perf_counter()
+            async with _admission_slot(name) if _admission_slot else nullcontext():
+                content = await call_tool(name, call.get("arguments") or {}, timeout=call.get("timeout"))
+        item["ok"] = True
+        item["content"] = [c.model_dump(mode="json", exclude_none=True) for c in content]
+    except Exception as e:
+        item["ok"] = False
+        item["error"] = str(e)
+        item["error_type"] = type(e).__name__
+    item["elapsed_ms"] = round((time.perf_counter() - started) * 1000, 3)
+    return item
+
+
+async def run_batch(calls: list[dict], max_concurrency: int = 16) -> list[types.TextContent]:
+    """并发执行多个工具调用，按输入顺序返回每个调用的结果"""
+    if len(calls) > MAX_BATCH_CALLS:
+        raise ValueError(f"一次最多批量执行 {MAX_BATCH_CALLS} 个调用，收到 {len(calls)} 个")
+
+    started = time.perf_counter()
+    # 子调用仍然受全局准入控制和各工具自身的并发限制约束，这里只限制单个批量调用同时占用的名额
+    semaphore = asyncio.Semaphore(max_concurrency)
+    results = await asyncio.gather(
+        *(run_call(index, call, semaphore) for index, call in enumerate(calls))
+    )
+    output = {
+        "total": len(results),
+        "succeeded": sum(1 for result in results if result["ok"]),
+        "failed": sum(1 for result in results if not result["ok"]),
+        "elapsed_ms": round((time.perf_counter() - started) * 1000, 3),
+        "results": results,
+    }
+    return [types.TextContent(type="text", text=json.dumps(output, ensure_ascii=False))]
+
+
+async def batch_tool(
+    name: str, arguments: dict
+) -> list[types.TextContent]:
+    if name != "batch":
+        raise ValueError(f"Unknown tool: {name}")
+    if "calls" not in arguments:
+        raise ValueError("Missing required argument 'calls'")
+    return await run_batch(arguments["calls"], arguments.get("max_concurrency", 16))
+
+
+def get_tools() -> list[types.Tool]:
+    return [
+        types.Tool(
+            name="batch",
+            description="在一次请求中并发执行多个工具调用，按顺序返回每个调用的结果、错误和耗时（JSON）",
+            inputSchema={
+                "type": "object",
+                "required": ["calls"],
+                "properties": {
+                    "calls": {
+                        "type": "array",
+                        "description": "要执行的工具调用列表，每项为 {name, arguments, timeout}，timeout可选（秒）",
+                        "items": {"type": "object"},
+                    },
+                    "max_concurrency": {
+                        "type": "integer",
+                        "description": "同时执行的最大调用数",
+                        "default": 16,
+                        "minimum": 1,
+                        "maximum": 64,
+                    },
+                },
+            },
+        )
+    ]
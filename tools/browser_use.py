@@ -2,28 +2,49 @@ import mcp.types as types
 from langchain_openai import ChatOpenAI
 from browser_use import Agent, BrowserConfig, Browser
 from dotenv import load_dotenv
+from functools import lru_cache
 import os
+from tools.runtime.shutdown import on_shutdown
 load_dotenv()
 
-llm = ChatOpenAI(base_url=os.getenv("OPENAI_BASE_URL"),
-                 api_key=os.getenv("OPENAI_API_KEY"),
-                 model="gpt-4o")
+# 浏览器任务的总时限（秒），到达截止时间或客户端取消请求时agent会被取消
+TOOL_OPTIONS = {"timeout": 600}
 
-config = BrowserConfig(
-    headless=True,
-    disable_security=True
-)
 
-browser = Browser(config=config)
+@lru_cache(maxsize=1)
+def get_llm() -> ChatOpenAI:
+    """第一次使用时才初始化LLM"""
+    return ChatOpenAI(base_url=os.getenv("OPENAI_BASE_URL"),
+                      api_key=os.getenv("OPENAI_API_KEY"),
+                      model="gpt-4o")
+
+
+@lru_cache(maxsize=1)
+def get_browser() -> Browser:
+    """第一次使用时才创建浏览器实例"""
+    config = BrowserConfig(
+        headless=True,
+        disable_security=True
+    )
+    return Browser(config=config)
+
+
+@on_shutdown
+async def close_browser():
+    """关闭服务器时关闭浏览器进程（如果已经创建）"""
+    if get_browser.cache_info().currsize:
+        await get_browser().close()
+        get_browser.cache_clear()
+
 
 async def run_agent(
     message: str,
 ) -> list[types.TextContent]:
     """返回执行结果"""
     agent = Agent(
-        browser=browser,
+        browser=get_browser(),
         task=message,
-        llm=llm,
+        llm=get_llm(),
     )
     result = await agent.run()
     return [types.TextContent(type="text", text=result.final_result())]
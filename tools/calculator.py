@@ -1,8 +1,14 @@
 import mcp.types as types
+import logging
 import math
 import numpy as np
 import sympy
 
+logger = logging.getLogger(__name__)
+
+# 符号计算可能非常耗时，在进程池中执行并限制时间；结果只取决于表达式，可以缓存
+TOOL_OPTIONS = {"cpu_bound": True, "task_timeout": 30, "cache_ttl": 86400}
+
 
 async def calculate_expression(
     expression: str,
@@ -12,7 +18,7 @@ async def calculate_expression(
     计算数学表达式
     支持基础计算、科学计算和符号计算
     """
-    print(f"计算表达式: '{expression}', 模式: {mode}")
+    logger.debug("计算表达式: '%s', 模式: %s", expression, mode)
     
     result = ""
     explanation = ""
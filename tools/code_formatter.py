@@ -1,15 +1,22 @@
 import mcp.types as types
+import logging
 import black
 import autopep8
 import textwrap
 
+logger = logging.getLogger(__name__)
+
+# black/autopep8 格式化是纯CPU计算，在进程池中执行，避免阻塞事件循环；
+# 结果只取决于参数，可以缓存
+TOOL_OPTIONS = {"cpu_bound": True, "cache_ttl": 86400}
+
 
 async def format_python_code(
     code: str,
     formatter: str = "black"
 ) -> list[types.TextContent]:
     """使用指定的格式化工具格式化Python代码"""
-    print(f"使用 {formatter} 格式化代码")
+    logger.debug("使用 %s 格式化代码", formatter)
     
     try:
         if formatter.lower() == "black":
@@ -1,9 +1,15 @@
 import mcp.types as types
+import logging
 import json
 import xml.dom.minidom
 import yaml
 import xmltodict
 
+logger = logging.getLogger(__name__)
+
+# 格式转换是纯函数，结果可以缓存
+TOOL_OPTIONS = {"cache_ttl": 86400}
+
 
 async def convert_data(
     data: str,
@@ -14,7 +20,7 @@ async def convert_data(
     将数据从一种格式转换为另一种格式
     支持的格式: json, yaml, xml
     """
-    print(f"转换数据，从 {from_format} 到 {to_format}")
+    logger.debug("转换数据，从 %s 到 %s", from_format, to_format)
     
     # 首先，将输入数据解析为Python对象
     try:
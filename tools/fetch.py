@@ -1,5 +1,13 @@
-import httpx
 import mcp.types as types
+import logging
+
+from tools.runtime.clients import http_client
+
+logger = logging.getLogger(__name__)
+
+# 一次调用的默认时限（秒），客户端可以通过 _meta.timeout 覆盖；
+# 相同URL的结果缓存5分钟
+TOOL_OPTIONS = {"timeout": 30, "cache_ttl": 300}
 
 
 async def fetch_website(
@@ -8,8 +16,8 @@ async def fetch_website(
     headers = {
         "User-Agent": "MCP Test Server (github.com/modelcontextprotocol/python-sdk)"
     }
-    async with httpx.AsyncClient(follow_redirects=True, headers=headers) as client:
-        print(f"Fetching {url}")
+    async with http_client(follow_redirects=True, headers=headers) as client:
+        logger.debug("Fetching %s", url)
         response = await client.get(url)
         response.raise_for_status()
         return [types.TextContent(type="text", text=response.text)]
@@ -1,10 +1,15 @@
 import mcp.types as types
+import logging
 import httpx
 import json
 import re
 from urllib.parse import urlparse
 import base64
 
+from tools.runtime.clients import http_client
+
+logger = logging.getLogger(__name__)
+
 
 async def send_http_request(
     url: str,
@@ -21,7 +26,7 @@ async def send_http_request(
     支持GET、POST、PUT、DELETE等方法
     可以自定义请求头、URL参数、请求体等
     """
-    print(f"发送HTTP请求: {method} {url}")
+    logger.debug("发送HTTP请求: %s %s", method, url)
     
     # 验证URL格式
     if not url.startswith(('http://', 'https://')):
@@ -56,7 +61,6 @@ async def send_http_request(
             "method": method.upper(),
             "url": url,
             "headers": default_headers,
-            "timeout": float(timeout),
             "follow_redirects": follow_redirects
         }
         
@@ -71,7 +75,8 @@ async def send_http_request(
             request_kwargs["content"] = data
         
         # 发送请求
-        async with httpx.AsyncClient() as client:
+        # 请求的超时时间不会超过本次工具调用的剩余时间
+        async with http_client(timeout=float(timeout)) as client:
             response = await client.request(**request_kwargs)
             
             # 获取响应信息
@@ -1,7 +1,13 @@
 import mcp.types as types
-import httpx
+import logging
 import base64
 
+from tools.runtime.clients import http_client
+
+logger = logging.getLogger(__name__)
+
+TOOL_OPTIONS = {"timeout": 30}
+
 
 async def generate_placeholder_image(
     width: int,
@@ -35,11 +41,11 @@ async def generate_placeholder_image(
     if text:
         url += f"?text={text}"
     
-    print(f"正在生成图像: {url}")
+    logger.debug("正在生成图像: %s", url)
     
     # 获取图像
     headers = {"User-Agent": "MCP Test Server (github.com/modelcontextprotocol/python-sdk)"}
-    async with httpx.AsyncClient(follow_redirects=True, headers=headers) as client:
+    async with http_client(follow_redirects=True, headers=headers) as client:
         response = await client.get(url)
         response.raise_for_status()
         
@@ -70,8 +76,8 @@ async def image_gen_tool(
         raise ValueError("Missing required argument 'height'")
     
     # 获取参数
-    width = int(arguments["width"])
-    height = int(arguments["height"])
+    width = arguments["width"]
+    height = arguments["height"]
     text = arguments.get("text")
     background_color = arguments.get("background_color")
     text_color = arguments.get("text_color")
@@ -1,9 +1,18 @@
 import mcp.types as types
+import logging
 import httpx
 import json
 import socket
 import re
 
+from tools.runtime.cache import uncacheable
+from tools.runtime.clients import http_client
+
+logger = logging.getLogger(__name__)
+
+# 需要先后请求两个外部服务；IP归属信息很少变化，缓存1小时
+TOOL_OPTIONS = {"timeout": 20, "cache_ttl": 3600}
+
 
 async def get_ip_info(
     ip_address: str = None
@@ -12,21 +21,21 @@ async def get_ip_info(
     获取IP地址的详细信息
     如果不提供IP地址，则获取本机的公网IP信息
     """
-    print(f"获取IP信息: {ip_address if ip_address else '当前IP'}")
+    logger.debug("获取IP信息: %s", ip_address or "当前IP")
     
     # 如果未提供IP地址，则获取当前公网IP
     if not ip_address:
         try:
-            async with httpx.AsyncClient(timeout=10.0) as client:
+            async with http_client(timeout=10.0) as client:
                 response = await client.get("https://api.ipify.org?format=json")
                 response.raise_for_status()
                 ip_address = response.json()["ip"]
-                print(f"获取到当前公网IP: {ip_address}")
+                logger.debug("获取到当前公网IP: %s", ip_address)
         except Exception as e:
-            return [types.TextContent(
+            return uncacheable([types.TextContent(
                 type="text",
                 text=f"获取当前IP地址失败: {str(e)}"
-            )]
+            )])
     
     # 验证IP地址格式
     ip_pattern = r'^(\d{1,3}\.){3}\d{1,3}$'
@@ -39,7 +48,7 @@ async def get_ip_info(
     try:
         # 尝试使用ip-api.com免费API获取IP信息
         api_url = f"http://ip-api.com/json/{ip_address}?fields=status,message,country,regionName,city,lat,lon,timezone,isp,org,as,mobile,proxy,hosting,query"
-        async with httpx.AsyncClient(timeout=10.0) as client:
+        async with http_client(timeout=10.0) as client:
             response = await client.get(api_url)
             response.raise_for_status()
             data = response.json()
@@ -88,15 +97,15 @@ async def get_ip_info(
             return [types.TextContent(type="text", text=output)]
             
     except httpx.RequestError as e:
-        return [types.TextContent(
+        return uncacheable([types.TextContent(
             type="text",
             text=f"请求错误: {str(e)}"
-        )]
+        )])
     except Exception as e:
-        return [types.TextContent(
+        return uncacheable([types.TextContent(
             type="text",
             text=f"获取IP信息时发生错误: {str(e)}"
-        )]
+        )])
 
 
 async def ip_info_tool(
@@ -1,24 +1,41 @@
 import mcp.types as types
+import logging
 import httpx
-import tempfile
+import io
 import os
 from langchain_openai import ChatOpenAI
 from langchain_core.prompts import PromptTemplate
 from langchain.chains import LLMChain
 from dotenv import load_dotenv
 import pdfplumber
+from functools import lru_cache
 from typing import List, Optional
 
+from tools.runtime.cache import uncacheable
+from tools.runtime.clients import http_client
+from tools.runtime.executor import run_cpu_bound
+
+logger = logging.getLogger(__name__)
+
 # 加载环境变量
 load_dotenv()
 
-# 初始化LLM
-llm = ChatOpenAI(
-    base_url=os.getenv("OPENAI_BASE_URL"),
-    api_key=os.getenv("OPENAI_API_KEY"),
-    model="gpt-4o",
-    max_completion_tokens=4096,
-)
+# 下载、解析和LLM分析的总时限（秒）。到达截止时间或客户端取消请求时，
+# 正在等待的LLM请求会被取消，底层的HTTP连接随之关闭。
+# LLM分析代价很高，相同PDF和分析方式的结果缓存1天
+TOOL_OPTIONS = {"timeout": 300, "cache_ttl": 86400}
+
+
+@lru_cache(maxsize=1)
+def get_llm() -> ChatOpenAI:
+    """第一次使用时才初始化LLM"""
+    return ChatOpenAI(
+        base_url=os.getenv("OPENAI_BASE_URL"),
+        api_key=os.getenv("OPENAI_API_KEY"),
+        model="gpt-4o",
+        max_completion_tokens=4096,
+    )
+
 
 # 定义分析提示模板
 PDF_ANALYSIS_PROMPT = """
@@ -47,6 +64,19 @@ PDF内容：
 请以结构化的方式回答，并用中文回答。
 """
 
+def extract_pdf_text(pdf_data: bytes, max_pages: int) -> tuple[str, int]:
+    """提取PDF前max_pages页的文本（CPU密集，在工作进程中执行），返回 (文本, 实际分析页数)"""
+    content = ""
+    with pdfplumber.open(io.BytesIO(pdf_data)) as pdf:
+        # 限制分析的页数
+        pages_to_analyze = min(len(pdf.pages), max_pages)
+        for i in range(pages_to_analyze):
+            page = pdf.pages[i]
+            content += f"\n\n--- 第 {i+1} 页 ---\n\n"
+            content += page.extract_text() or "无法提取文本内容"
+    return content, pages_to_analyze
+
+
 async def analyze_pdf(
     pdf_url: str,
     max_pages: Optional[int] = 10,
@@ -65,7 +95,7 @@ async def analyze_pdf(
     Returns:
         分析结果列表
     """
-    print(f"开始分析PDF: {pdf_url}")
+    logger.debug("开始分析PDF: %s", pdf_url)
     
     # 验证URL
     if not pdf_url.startswith(('http://', 'https://')):
@@ -75,28 +105,15 @@ async def analyze_pdf(
         )]
     
     try:
-        # 创建临时文件
-        with tempfile.NamedTemporaryFile(delete=False, suffix='.pdf') as temp_file:
-            temp_path = temp_file.name
-            
-            # 下载PDF文件
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                response = await client.get(pdf_url)
-                response.raise_for_status()
-                temp_file.write(response.content)
+        # 下载PDF文件
+        async with http_client() as client:
+            response = await client.get(pdf_url)
+            response.raise_for_status()
         
-        # 提取PDF内容
-        content = ""
-        with pdfplumber.open(temp_path) as pdf:
-            # 限制分析的页数
-            pages_to_analyze = min(len(pdf.pages), max_pages)
-            for i in range(pages_to_analyze):
-                page = pdf.pages[i]
-                content += f"\n\n--- 第 {i+1} 页 ---\n\n"
-                content += page.extract_text() or "无法提取文本内容"
-        
-        # 清理临时文件
-        os.unlink(temp_path)
+        # 提取PDF内容，页面解析在进程池中执行
+        content, pages_to_analyze = await run_cpu_bound(
+            extract_pdf_text, response.content, max_pages
+        )
         
         # 如果内容为空
         if not content.strip():
@@ -111,7 +128,7 @@ async def analyze_pdf(
                 template=PDF_ANALYSIS_PROMPT,
                 input_variables=["content"]
             )
-            chain = LLMChain(llm=llm, prompt=prompt)
+            chain = LLMChain(llm=get_llm(), prompt=prompt)
             result = await chain.arun(content=content)
         elif analysis_type == "user_defined":
             if not user_defined_prompt:
@@ -123,14 +140,14 @@ async def analyze_pdf(
                 template=USER_DEFINED_PROMPT,
                 input_variables=["user_defined_prompt", "content"]
             )
-            chain = LLMChain(llm=llm, prompt=prompt)
+            chain = LLMChain(llm=get_llm(), prompt=prompt)
             result = await chain.arun(user_defined_prompt=user_defined_prompt, content=content)
         else:  # summary
             prompt = PromptTemplate(
                 template="请为以下PDF内容生成一个简洁的摘要，并用中文回答：\n\n{content}",
                 input_variables=["content"]
             )
-            chain = LLMChain(llm=llm, prompt=prompt)
+            chain = LLMChain(llm=get_llm(), prompt=prompt)
             result = await chain.arun(content=content)
         
         # 构建输出
@@ -146,20 +163,21 @@ async def analyze_pdf(
         return [types.TextContent(type="text", text=output)]
         
     except httpx.RequestError as e:
-        return [types.TextContent(
+        return uncacheable([types.TextContent(
             type="text",
             text=f"下载PDF时发生错误: {str(e)}"
-        )]
+        )])
     except pdfplumber.PDFSyntaxError:
         return [types.TextContent(
             type="text",
             text="错误: 无效的PDF文件格式"
         )]
     except Exception as e:
-        return [types.TextContent(
+        # 包括HTTP错误、进程池超时和LLM服务出错，这些结果不缓存
+        return uncacheable([types.TextContent(
             type="text",
             text=f"分析PDF时发生错误: {str(e)}"
-        )]
+        )])
 
 
 async def pdf_llm_tool(
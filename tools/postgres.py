@@ -1,152 +1,409 @@
 import mcp.types as types
-import psycopg2
-import psycopg2.extras
+import logging
+import psycopg
+from psycopg.pq import TransactionStatus
+from psycopg.rows import dict_row
 from tabulate import tabulate
 import json
+import re
+import secrets
+import time
 
+from tools.runtime.metrics import DB_QUERY_DURATION
+from tools.runtime.pg_cursors import IDLE_TIMEOUT, ResultCursor, keep, take
+from tools.runtime.pg_pool import ConnectionPool, get_pool
+from tools.runtime.pg_schema import SchemaCache, get_schema, invalidate
 
-async def connect_to_database(
-    host: str,
-    database: str,
-    user: str,
-    password: str,
-    port: int = 5432
-):
-    """连接到PostgreSQL数据库"""
-    try:
-        conn = psycopg2.connect(
-            host=host,
-            database=database,
-            user=user,
-            password=password,
-            port=port
-        )
-        return conn
-    except Exception as e:
-        raise ConnectionError(f"无法连接到数据库: {str(e)}")
+logger = logging.getLogger(__name__)
+
+# 一次调用的默认时限（秒），超过时限的语句被取消
+TOOL_OPTIONS = {"timeout": 60}
+
+# execute_query 一次最多返回的行数，更多的行通过续取令牌分页获取
+MAX_ROWS_PER_CALL = 1000
+
+# schema_digest 默认的输出字符数上限（约 2000 个token）
+DIGEST_BUDGET = 8000
+
+# 跳过开头的空白、注释和括号，取第一个关键字
+_LEADING_KEYWORD = re.compile(r"(?:\s+|--[^\n]*|/\*.*?\*/|\()*(\w+)", re.S)
 
+# DECLARE不支持、需要按普通语句执行的查询报告的SQLSTATE，都在语句执行之前报告：
+# 42601 SELECT INTO、多条语句（以及普通的语法错误）；0A000 含数据修改的WITH、VALUES ... FOR UPDATE
+_DECLARE_UNSUPPORTED = ("42601", "0A000")
 
-async def get_table_list(conn):
+
+async def get_table_list(cache: SchemaCache):
     """获取数据库中的表列表"""
-    try:
-        cursor = conn.cursor()
-        cursor.execute("""
-            SELECT table_schema, table_name 
-            FROM information_schema.tables 
-            WHERE table_schema NOT IN ('pg_catalog', 'information_schema')
-            ORDER BY table_schema, table_name
-        """)
-        tables = cursor.fetchall()
-        cursor.close()
-        
-        # 格式化结果
-        result = "## 数据库表格列表\n\n"
-        result += tabulate(
-            tables, 
-            headers=["Schema", "Table Name"], 
-            tablefmt="pipe"
-        )
-        
-        return result
-    except Exception as e:
-        return f"获取表格列表时出错: {str(e)}"
+    # 格式化结果
+    result = "## 数据库表格列表\n\n"
+    result += tabulate(
+        [(r.schema, r.name, r.kind, r.estimated_rows) for r in cache.user_relations()], 
+        headers=["Schema", "Table Name", "类型", "估计行数"], 
+        tablefmt="pipe",
+        missingval="-"
+    )
+    
+    return result
 
 
-async def get_table_schema(conn, table_name, schema="public"):
+async def get_table_schema(cache: SchemaCache, table_name, schema="public"):
     """获取表结构"""
-    try:
-        cursor = conn.cursor()
-        cursor.execute("""
-            SELECT column_name, data_type, is_nullable, column_default
-            FROM information_schema.columns
-            WHERE table_schema = %s AND table_name = %s
-            ORDER BY ordinal_position
-        """, (schema, table_name))
-        columns = cursor.fetchall()
-        cursor.close()
-        
-        if not columns:
-            return f"表 {schema}.{table_name} 未找到或没有列。"
-        
-        # 格式化结果
-        result = f"## {schema}.{table_name} 表结构\n\n"
-        result += tabulate(
-            columns, 
-            headers=["列名", "数据类型", "允许空值", "默认值"], 
-            tablefmt="pipe"
+    relation = cache.find(schema, table_name)
+    if relation is None or not relation.columns:
+        return f"表 {schema}.{table_name} 未找到或没有列。"
+    
+    # 格式化结果
+    result = f"## {schema}.{table_name} 表结构\n\n"
+    result += tabulate(
+        [(c.name, c.type, "NO" if c.not_null else "YES", c.default) for c in relation.columns], 
+        headers=["列名", "数据类型", "允许空值", "默认值"], 
+        tablefmt="pipe"
+    )
+    
+    if relation.primary_key:
+        result += f"\n\n**主键**: {', '.join(relation.primary_key)}"
+    if relation.foreign_keys:
+        result += "\n\n**外键**:\n"
+        result += "\n".join(
+            f"- {fk[0]}: ({', '.join(fk[1])}) → {cache.referenced(fk)}" for fk in relation.foreign_keys
         )
-        
-        return result
-    except Exception as e:
-        return f"获取表结构时出错: {str(e)}"
+    if relation.unique:
+        result += "\n\n**唯一约束**: " + "; ".join(f"({', '.join(cols)})" for cols in relation.unique)
+    if relation.indexes:
+        result += "\n\n**索引**:\n"
+        result += "\n".join(f"- {name}: {definition}" for name, definition in relation.indexes)
+    
+    return result
+
+
+# format_type 的类型名缩写，例如 timestamp(3) with time zone -> timestamptz(3)
+_TYPE_ABBREVIATIONS = [
+    (re.compile(r"^character varying"), "varchar"),
+    (re.compile(r"^character\b"), "char"),
+    (re.compile(r"^(timestamp|time)(\(\d+\))? with time zone"), r"\1tz\2"),
+    (re.compile(r"^(timestamp|time)(\(\d+\))? without time zone"), r"\1\2"),
+    (re.compile(r"^integer\b"), "int"),
+    (re.compile(r"^smallint\b"), "int2"),
+    (re.compile(r"^bigint\b"), "int8"),
+    (re.compile(r"^boolean\b"), "bool"),
+    (re.compile(r"^double precision\b"), "float8"),
+    (re.compile(r"^real\b"), "float4"),
+]
+
+_SERIAL_TYPES = {"int": "serial", "int2": "smallserial", "int8": "bigserial"}
+
+
+def _short_type(column) -> str:
+    type_name = column.type
+    for pattern, replacement in _TYPE_ABBREVIATIONS:
+        type_name, count = pattern.subn(replacement, type_name)
+        if count:
+            break
+    if column.default and column.default.startswith("nextval("):
+        type_name = _SERIAL_TYPES.get(type_name, type_name)
+    return type_name
+
+
+def _approximate(rows: int) -> str:
+    """估计行数的简写，例如 1.2M"""
+    for divisor, suffix in ((1e9, "B"), (1e6, "M"), (1e3, "k")):
+        if rows >= divisor:
+            return f"{rows / divisor:.1f}".rstrip("0").rstrip(".") + suffix
+    return str(rows)
+
 
+def _truncate(text: str, length: int) -> str:
+    text = " ".join(text.split())
+    return text if len(text) <= length else text[:length - 1] + "…"
 
-async def execute_query(conn, query, limit=100):
-    """执行SQL查询并返回结果"""
+
+def _digest_line(cache: SchemaCache, relation, qualified: bool) -> str:
+    """一个表一行: 表名 [类型] (~估计行数): 列 类型 标记, ...; 多列约束 -- 注释"""
+    def name_of(other):
+        return f"{other.schema}.{other.name}" if qualified or other.schema != relation.schema else other.name
+
+    flags: dict[str, list[str]] = {}
+    extras = []
+    if len(relation.primary_key) == 1:
+        flags.setdefault(relation.primary_key[0], []).append("PK")
+    elif relation.primary_key:
+        extras.append(f"PK ({', '.join(relation.primary_key)})")
+    for columns in relation.unique:
+        if len(columns) == 1:
+            flags.setdefault(columns[0], []).append("UQ")
+        else:
+            extras.append(f"UQ ({', '.join(columns)})")
+    for name, columns, ref_oid, ref_attnums in relation.foreign_keys:
+        ref = cache.relations.get(ref_oid)
+        if ref is None:
+            extras.append(f"FK ({', '.join(columns)}) → oid {ref_oid}")
+            continue
+        ref_columns = [ref.attnums.get(n, "?") for n in ref_attnums]
+        if len(columns) == 1:
+            flags.setdefault(columns[0], []).append(f"→{name_of(ref)}.{ref_columns[0]}")
+        else:
+            extras.append(f"FK ({', '.join(columns)}) → {name_of(ref)}({', '.join(ref_columns)})")
+
+    columns = []
+    for column in relation.columns:
+        marks = flags.get(column.name, [])
+        if column.not_null and "PK" not in marks:
+            marks.insert(0, "NN")
+        text = " ".join([column.name, _short_type(column)] + marks)
+        if column.comment:
+            text += f" ({_truncate(column.comment, 40)})"
+        columns.append(text)
+
+    line = name_of(relation)
+    if relation.kind != "table":
+        line += f" [{relation.kind}]"
+    if relation.kind in ("table", "partitioned table", "materialized view") and relation.estimated_rows is not None:
+        line += f" (~{_approximate(relation.estimated_rows)})"
+    line += ": " + ", ".join(columns)
+    if extras:
+        line += "; " + "; ".join(extras)
+    if relation.comment:
+        line += f" -- {_truncate(relation.comment, 80)}"
+    return line
+
+
+def _rank_relations(cache: SchemaCache, relations: list, keywords: list[str]) -> list:
+    """按相关度排序：表名等于关键字 > 表名包含关键字 > 列名包含关键字 > 与匹配的表有外键关联；
+    没有关键字时所有表相关度相同。相关度相同时按估计行数和被外键引用的次数排序，大表和被引用多的表在前。
+    有关键字时只返回匹配的表和与它们有外键关联的表。"""
+    inbound: dict[int, int] = {}
+    for relation in cache.relations.values():
+        for fk in relation.foreign_keys:
+            inbound[fk[2]] = inbound.get(fk[2], 0) + 1
+
+    scores = {}
+    if keywords:
+        for relation in relations:
+            name = relation.name.lower()
+            score = 0
+            for keyword in keywords:
+                if name == keyword:
+                    score += 3
+                elif keyword in name:
+                    score += 2
+                elif any(keyword in column.name.lower() for column in relation.columns):
+                    score += 1
+            if score:
+                scores[relation.oid] = score
+        matched = set(scores)
+        for relation in relations:
+            if relation.oid in matched:
+                continue
+            linked = any(fk[2] in matched for fk in relation.foreign_keys) or any(
+                fk[2] == relation.oid for oid in matched for fk in cache.relations[oid].foreign_keys
+            )
+            if linked:
+                scores[relation.oid] = 0.5
+        relations = [relation for relation in relations if relation.oid in scores]
+
+    return sorted(relations, key=lambda r: (
+        -scores.get(r.oid, 0), -(r.estimated_rows or 0), -inbound.get(r.oid, 0), r.schema, r.name
+    ))
+
+
+async def get_schema_digest(cache: SchemaCache, schema="public", keywords=None, budget=DIGEST_BUDGET):
+    """整个模式（或按关键字筛选的一部分）的紧凑描述，一个表一行，按相关度排序，总长度不超过budget个字符
+
+    schema 为 * 时包含所有模式（系统目录除外）。放不下的表只列出名称。
+    """
+    keywords = [k.lower() for k in re.split(r"[\s,]+", keywords or "") if k]
+    relations = [r for r in cache.user_relations() if schema == "*" or r.schema == schema]
+    if not relations:
+        return f"模式 {schema} 中没有表。"
+    ranked = _rank_relations(cache, relations, keywords)
+    if not ranked:
+        return f"模式 {schema} 中没有表名或列名匹配 {' '.join(keywords)} 的表。"
+
+    qualified = schema == "*"
+    title = "所有模式" if qualified else f"{schema} 模式"
+    if keywords:
+        title += f"中与 {' '.join(keywords)} 相关的表"
+    header = (
+        f"## {title}摘要 ({{shown}}/{len(ranked)} 个表)\n"
+        "格式: 表 (~估计行数): 列 类型 标记; PK 主键, NN 非空, UQ 唯一, →表.列 外键\n\n"
+    )
+    tail = "。可以用keywords筛选或用table_schema查看*"
+    # 为标题和省略说明留出空间，其余按相关度依次放入表，至少放入一个表
+    remaining = budget - len(header) - len(tail) - 40
+    lines = []
+    for relation in ranked:
+        line = _digest_line(cache, relation, qualified)
+        if len(line) + 1 > remaining and lines:
+            break
+        lines.append(line)
+        remaining -= len(line) + 1
+
+    result = header.format(shown=len(lines)) + "\n".join(lines)
+    omitted = ranked[len(lines):]
+    if omitted:
+        result += f"\n\n*注: 超出长度上限，省略了 {len(omitted)} 个表"
+        listed = []
+        for relation in omitted:
+            name = f"{relation.schema}.{relation.name}" if qualified else relation.name
+            remaining -= len(name) + 2
+            if remaining < 0:
+                break
+            listed.append(name)
+        if listed:
+            result += ": " + ", ".join(listed) + (" 等" if len(listed) < len(omitted) else "")
+        result += tail
+    return result
+
+
+def _format_page(cursor: ResultCursor, rows: list, more: bool, limit: int) -> str:
+    """格式化一页查询结果，还有更多行时附上续取令牌"""
+    first = cursor.position - len(rows) + 1
+    result = f"## 查询结果 (第 {first}-{cursor.position} 行)\n\n"
+    result += tabulate(
+        [list(row.values()) for row in rows], 
+        headers=cursor.columns, 
+        tablefmt="pipe"
+    )
+    if more:
+        result += (
+            f"\n\n*注: 还有更多行。再次调用 execute_query 并传入 cursor=\"{cursor.token}\" 获取后续 {limit} 行；"
+            f"游标空闲 {IDLE_TIMEOUT:g} 秒后关闭*"
+        )
+    elif first > 1:
+        result += "\n\n*注: 已到达结果末尾，游标已关闭*"
+    return result
+
+
+def _returns_rows(query: str) -> bool:
+    """查询是否可以在服务器端游标中执行（SELECT、WITH、VALUES、TABLE）"""
+    match = _LEADING_KEYWORD.match(query)
+    return bool(match) and match.group(1).lower() in ("select", "with", "values", "table")
+
+
+async def execute_query(pool: ConnectionPool, password: str, query, limit=100):
+    """执行SQL查询并返回结果
+
+    返回行的查询在服务器端的命名游标中执行，只从数据库取回本次返回的行；
+    结果没有取完时保留游标和连接，返回续取令牌，之后的调用用 fetch_more 继续获取。
+    """
+    limit = min(limit, MAX_ROWS_PER_CALL)
+    entry = await pool.acquire(password)
+    kept = False
     try:
-        cursor = conn.cursor(cursor_factory=psycopg2.extras.DictCursor)
-        cursor.execute(query)
+        conn = entry.conn
+        if _returns_rows(query):
+            # 游标只在外层事务中保持打开，下面的 conn.transaction() 必须是保存点而不是会在退出时提交的顶层事务。
+            # 连接空闲时先开始事务：自动提交的连接显式BEGIN，其他连接在执行第一条语句时自动开始事务
+            if conn.info.transaction_status == TransactionStatus.IDLE:
+                await conn.execute("BEGIN" if conn.autocommit else "SELECT")
+            cursor = conn.cursor(name=f"mcp_{secrets.token_hex(8)}", row_factory=dict_row)
+            try:
+                # 在保存点中声明游标，DECLARE不支持的语句回滚后按普通语句执行；其他错误直接报告，语句不会执行第二次
+                async with conn.transaction():
+                    await cursor.execute(query)
+            except psycopg.Error as e:
+                if e.sqlstate not in _DECLARE_UNSUPPORTED:
+                    raise
+                cursor = None
+            if cursor is not None:
+                result_cursor = ResultCursor(pool, entry, cursor, password)
+                rows, more = await result_cursor.page(limit)
+                if not rows:
+                    return "查询执行成功，但没有返回数据。"
+                if more:
+                    await keep(result_cursor)
+                    kept = True
+                return _format_page(result_cursor, rows, more, limit)
+
+        cursor = conn.cursor(row_factory=dict_row)
+        await cursor.execute(query)
+        # 不在游标中执行的语句可能修改了表结构（DDL、SELECT INTO等），下一次访问目录缓存时检查变化
+        invalidate(pool)
         
-        # 检查是否是SELECT查询
+        # 检查语句是否返回行（例如 INSERT ... RETURNING、SHOW、EXPLAIN）
         if cursor.description is not None:
-            rows = cursor.fetchmany(limit)
+            rows = await cursor.fetchmany(limit)
             
             if not rows:
+                await conn.commit()
                 return "查询执行成功，但没有返回数据。"
             
-            # 从DictCursor中获取列名
+            # 从游标描述中获取列名
             headers = [desc[0] for desc in cursor.description]
             
-            # 将行转换为列表
-            data = [dict(row) for row in rows]
-            
             # 格式化结果
             result = f"## 查询结果 (最多显示 {limit} 行)\n\n"
             result += tabulate(
-                [list(row.values()) for row in data], 
+                [list(row.values()) for row in rows], 
                 headers=headers, 
                 tablefmt="pipe"
             )
             
-            # 如果有更多行
+            # 普通游标的结果已全部取回客户端，rowcount即为总行数
             if cursor.rowcount > limit:
                 result += f"\n\n*注: 共有 {cursor.rowcount} 行，仅显示前 {limit} 行*"
             
-            cursor.close()
+            await cursor.close()
+            await conn.commit()
             return result
         else:
-            # 对于非SELECT查询，返回影响的行数
+            # 对于不返回行的语句，返回影响的行数
             row_count = cursor.rowcount
-            cursor.close()
-            conn.commit()
+            await cursor.close()
+            await conn.commit()
             return f"查询执行成功，影响了 {row_count} 行。"
             
     except Exception as e:
         return f"执行查询时出错: {str(e)}"
+    finally:
+        if not kept:
+            await pool.release(entry)
+
+
+async def fetch_more(pool: ConnectionPool, password: str, token: str, limit=100):
+    """用续取令牌获取下一页结果，取完后关闭游标"""
+    limit = min(limit, MAX_ROWS_PER_CALL)
+    result_cursor = take(token, pool, password)
+    try:
+        rows, more = await result_cursor.page(limit)
+    except BaseException as e:
+        await result_cursor.close("error")
+        if isinstance(e, Exception):
+            return f"执行查询时出错: {str(e)}"
+        raise
+    if more:
+        await keep(result_cursor)
+    else:
+        await result_cursor.close("exhausted")
+    if not rows:
+        return "*注: 已到达结果末尾，游标已关闭*"
+    return _format_page(result_cursor, rows, more, limit)
 
 
-async def get_database_info(conn):
+async def close_cursor(pool: ConnectionPool, password: str, token: str):
+    """提前关闭不再需要的游标，归还连接"""
+    await take(token, pool, password).close("closed")
+    return "游标已关闭。"
+
+
+async def get_database_info(conn, cache: SchemaCache):
     """获取数据库基本信息"""
     try:
         cursor = conn.cursor()
         
         # 获取PostgreSQL版本
-        cursor.execute("SELECT version()")
-        version = cursor.fetchone()[0]
+        await cursor.execute("SELECT version()")
+        version = (await cursor.fetchone())[0]
         
         # 获取数据库大小
-        cursor.execute("SELECT pg_size_pretty(pg_database_size(current_database()))")
-        size = cursor.fetchone()[0]
+        await cursor.execute("SELECT pg_size_pretty(pg_database_size(current_database()))")
+        size = (await cursor.fetchone())[0]
         
-        # 获取表数量
-        cursor.execute("""
-            SELECT count(*) 
-            FROM information_schema.tables 
-            WHERE table_schema NOT IN ('pg_catalog', 'information_schema')
-        """)
-        table_count = cursor.fetchone()[0]
+        await cursor.close()
         
-        cursor.close()
+        # 表数量来自目录缓存
+        table_count = len(cache.user_relations())
         
         # 格式化结果
         result = "## 数据库信息\n\n"
@@ -169,34 +426,58 @@ async def postgres_query(
     table_name: str = None,
     schema: str = "public",
     query: str = None,
-    limit: int = 100
+    limit: int = 100,
+    cursor: str = None,
+    keywords: str = None,
+    budget: int = None
 ) -> list[types.TextContent]:
     """查询PostgreSQL数据库"""
     try:
-        print(f"执行PostgreSQL {action}操作")
-        
-        # 连接数据库
-        conn = await connect_to_database(host, database, user, password, port)
+        logger.debug("执行PostgreSQL %s操作", action)
         
-        # 根据操作类型执行不同的操作
-        if action == "table_list":
-            result = await get_table_list(conn)
-        elif action == "table_schema":
-            if not table_name:
-                raise ValueError("查询表结构时必须提供table_name参数")
-            result = await get_table_schema(conn, table_name, schema)
-        elif action == "execute_query":
-            if not query:
-                raise ValueError("执行查询时必须提供query参数")
-            result = await execute_query(conn, query, limit)
+        # 从 (host, port, database, user) 对应的连接池中取出连接，调用结束（包括出错或被取消）后归还。
+        # 连接是异步的，等待数据库时不阻塞事件循环；调用被取消或超过截止时间时正在执行的语句也被取消
+        pool = get_pool(host, port, database, user)
+        if action == "execute_query":
+            # 查询自行管理连接：结果没有取完时，连接随服务器端游标一起保留
+            started = time.perf_counter()
+            if cursor:
+                result = await fetch_more(pool, password, cursor, limit)
+                action = "fetch_more"
+            elif not query:
+                raise ValueError("执行查询时必须提供query参数或cursor参数")
+            else:
+                result = await execute_query(pool, password, query, limit)
+            DB_QUERY_DURATION.observe(time.perf_counter() - started, "postgres", action)
+        elif action == "close_cursor":
+            if not cursor:
+                raise ValueError("关闭游标时必须提供cursor参数")
+            result = await close_cursor(pool, password, cursor)
+        elif action in ("table_list", "table_schema"):
+            # 表列表和表结构从目录缓存返回，缓存过期时才经连接池检查目录变化
+            started = time.perf_counter()
+            cache = await get_schema(pool, password)
+            if action == "table_list":
+                result = await get_table_list(cache)
+            else:
+                if not table_name:
+                    raise ValueError("查询表结构时必须提供table_name参数")
+                result = await get_table_schema(cache, table_name, schema)
+            DB_QUERY_DURATION.observe(time.perf_counter() - started, "postgres", action)
+        elif action == "schema_digest":
+            started = time.perf_counter()
+            cache = await get_schema(pool, password)
+            result = await get_schema_digest(cache, schema, keywords, budget or DIGEST_BUDGET)
+            DB_QUERY_DURATION.observe(time.perf_counter() - started, "postgres", action)
         elif action == "database_info":
-            result = await get_database_info(conn)
+            started = time.perf_counter()
+            cache = await get_schema(pool, password)
+            async with pool.connection(password) as conn:
+                result = await get_database_info(conn, cache)
+            DB_QUERY_DURATION.observe(time.perf_counter() - started, "postgres", action)
         else:
             raise ValueError(f"不支持的操作类型: {action}")
         
-        # 关闭连接
-        conn.close()
-        
         return [types.TextContent(type="text", text=result)]
     except Exception as e:
         error_msg = f"PostgreSQL查询失败: {str(e)}"
@@ -221,15 +502,18 @@ async def postgres_tool(
     database = arguments["database"]
     user = arguments["user"]
     password = arguments["password"]
-    port = int(arguments.get("port", 5432))
+    port = arguments.get("port", 5432)
     table_name = arguments.get("table_name")
     schema = arguments.get("schema", "public")
     query = arguments.get("query")
-    limit = int(arguments.get("limit", 100))
+    limit = arguments.get("limit", 100)
+    cursor = arguments.get("cursor")
+    keywords = arguments.get("keywords")
+    budget = arguments.get("budget")
     
     # 调用查询函数
     return await postgres_query(
-        action, host, database, user, password, port, table_name, schema, query, limit
+        action, host, database, user, password, port, table_name, schema, query, limit, cursor, keywords, budget
     )
 
 
@@ -237,7 +521,7 @@ def get_tools() -> list[types.Tool]:
     return [
         types.Tool(
             name="postgres",
-            description="查询PostgreSQL数据库信息，执行SQL查询",
+            description="查询PostgreSQL数据库信息，执行SQL查询。编写SQL前可以先用schema_digest一次获取整个模式的紧凑描述",
             inputSchema={
                 "type": "object",
                 "required": ["action", "host", "database", "user", "password"],
@@ -245,7 +529,7 @@ def get_tools() -> list[types.Tool]:
                     "action": {
                         "type": "string",
                         "description": "操作类型",
-                        "enum": ["table_list", "table_schema", "execute_query", "database_info"],
+                        "enum": ["table_list", "table_schema", "schema_digest", "execute_query", "database_info", "close_cursor"],
                     },
                     "host": {
                         "type": "string",
@@ -274,17 +558,34 @@ def get_tools() -> list[types.Tool]:
                     },
                     "schema": {
                         "type": "string",
-                        "description": "模式名称，默认为public",
+                        "description": "模式名称，默认为public；schema_digest可以用*表示所有模式",
                         "default": "public",
                     },
                     "query": {
                         "type": "string",
-                        "description": "SQL查询语句（对于execute_query操作必需）",
+                        "description": "SQL查询语句（对于execute_query操作必需，续取时除外）",
                     },
                     "limit": {
                         "type": "integer",
-                        "description": "查询结果最大行数，默认为100",
+                        "description": "本次返回的最大行数，默认为100，最多1000",
                         "default": 100,
+                        "minimum": 1,
+                        "maximum": 1000,
+                    },
+                    "keywords": {
+                        "type": "string",
+                        "description": "schema_digest的关键字（空格或逗号分隔），只包含表名或列名匹配的表及与它们有外键关联的表",
+                    },
+                    "budget": {
+                        "type": "integer",
+                        "description": "schema_digest输出的最大字符数，默认为8000，放不下的表只列出名称",
+                        "default": 8000,
+                        "minimum": 500,
+                    },
+                    "cursor": {
+                        "type": "string",
+                        "description": "上一次execute_query返回的续取令牌，用于获取后续的行（此时不需要query）；"
+                                       "也用于close_cursor提前关闭游标",
                     },
                 },
             },
@@ -0,0 +1 @@
+# 工具运行时：工具注册表之外的分发基础设施（清单、执行、限流等），不会被当作工具模块扫描
@@ -0,0 +1,262 @@
+import asyncio
+import hashlib
+import json
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Optional
+
+from . import metrics
+
+# 内存缓存的容量上限：条目数和序列化后的总字节数，超出时淘汰最久未使用的条目
+MAX_ENTRIES = int(os.environ.get("MCP_TOOL_CACHE_MAX_ENTRIES", 4096))
+MAX_BYTES = int(os.environ.get("MCP_TOOL_CACHE_MAX_BYTES", 64 * 1024 * 1024))
+# 磁盘缓存目录，设置后内存中淘汰或未命中的结果可以从磁盘读取，服务器重启后仍然有效
+CACHE_DIR = os.environ.get("MCP_TOOL_CACHE_DIR")
+# 磁盘缓存最多保存的条目数
+MAX_DISK_ENTRIES = int(os.environ.get("MCP_TOOL_CACHE_DISK_MAX_ENTRIES", 100000))
+
+
+def cache_key(tool_name: str, arguments: dict) -> str:
+    """由工具名和参数计算缓存键：参数按键排序后序列化，与参数顺序和空白无关"""
+    canonical = json.dumps(
+        [tool_name, arguments],
+        sort_keys=True,
+        ensure_ascii=False,
+        separators=(",", ":"),
+        default=str,
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class Uncacheable(list):
+    """
+    不应缓存的工具结果
+
+    多数工具在上游服务出错时返回错误说明而不是抛出异常，这类结果只对本次调用有效。
+    它本身就是内容列表，返回给客户端时与普通结果相同，只是不会写入缓存；跨进程传递时也保留这个类型。
+    """
+
+
+def uncacheable(content: list) -> Uncacheable:
+    """把工具结果标记为不缓存，例如 return uncacheable([types.TextContent(...)])"""
+    return Uncacheable(content)
+
+
+class _DiskTier:
+    """保存在SQLite中的第二级缓存，所有操作都在线程中执行，避免阻塞事件循环"""
+
+    def __init__(self, directory: str, max_entries: int):
+        os.makedirs(directory, exist_ok=True)
+        self.path = os.path.join(directory, "tool_cache.sqlite3")
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            "key TEXT PRIMARY KEY, tool TEXT, expires REAL, accessed REAL, value BLOB)"
+        )
+        self._writes = 0
+        # 条目数的运行计数，stats() 和指标读取它而不在事件循环上查询SQLite；
+        # 清理时重新统计，其他worker进程写入同一个文件造成的偏差也随之修正
+        self.entries = self._db.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+
+    def get(self, key: str) -> Optional[tuple[float, bytes]]:
+        now = time.time()
+        with self._lock:
+            row = self._db.execute(
+                "SELECT expires, value FROM entries WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            if row[0] <= now:
+                deleted = self._db.execute("DELETE FROM entries WHERE key = ?", (key,)).rowcount
+                self.entries -= deleted
+                return None
+            self._db.execute("UPDATE entries SET accessed = ? WHERE key = ?", (now, key))
+        return row[0], row[1]
+
+    def set(self, key: str, tool_name: str, expires: float, value: bytes):
+        with self._lock:
+            replaced = self._db.execute("DELETE FROM entries WHERE key = ?", (key,)).rowcount
+            self._db.execute(
+                "INSERT INTO entries VALUES (?, ?, ?, ?, ?)",
+                (key, tool_name, expires, time.time(), value),
+            )
+            self.entries += 1 - replaced
+            self._writes += 1
+            if self._writes % 100 == 0:
+                self._prune()
+
+    def _prune(self):
+        """删除过期条目，并按最近访问时间淘汰超出容量的条目"""
+        self._db.execute("DELETE FROM entries WHERE expires <= ?", (time.time(),))
+        self._db.execute(
+            "DELETE FROM entries WHERE key IN ("
+            "SELECT key FROM entries ORDER BY accessed DESC LIMIT -1 OFFSET ?)",
+            (self.max_entries,),
+        )
+        self.entries = self._db.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+
+
+class ToolCache:
+    """
+    工具结果缓存
+
+    第一级是内存中的LRU缓存，按条目数和字节数限制容量；第二级是可选的磁盘缓存。
+    结果以pickle序列化后保存，每次命中都返回新的对象，调用方修改结果不会影响缓存。
+    """
+
+    def __init__(
+        self,
+        max_entries: int = MAX_ENTRIES,
+        max_bytes: int = MAX_BYTES,
+        directory: Optional[str] = CACHE_DIR,
+        max_disk_entries: int = MAX_DISK_ENTRIES,
+    ):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        # key -> (过期时间(time.time()), 工具名, 序列化后的结果)
+        self._entries: OrderedDict[str, tuple[float, str, bytes]] = OrderedDict()
+        self._bytes = 0
+        self._disk = _DiskTier(directory, max_disk_entries) if directory else None
+        # 统计信息，按工具分别计数
+        self._stats: dict[str, dict[str, int]] = {}
+
+    def _count(self, tool_name: str, event: str):
+        stats = self._stats.get(tool_name)
+        if stats is None:
+            stats = self._stats[tool_name] = {
+                "hits": 0, "disk_hits": 0, "misses": 0, "stores": 0, "evictions": 0,
+            }
+        stats[event] += 1
+
+    async def get(self, tool_name: str, key: str) -> Optional[Any]:
+        """返回缓存的结果，未命中或已过期时返回None"""
+        entry = self._entries.get(key)
+        if entry is not None:
+            if entry[0] > time.time():
+                self._entries.move_to_end(key)
+                self._count(tool_name, "hits")
+                return pickle.loads(entry[2])
+            self._remove(key)
+        if self._disk is not None:
+            found = await asyncio.to_thread(self._disk.get, key)
+            if found is not None:
+                expires, data = found
+                self._store(key, tool_name, expires, data)
+                self._count(tool_name, "disk_hits")
+                return pickle.loads(data)
+        self._count(tool_name, "misses")
+        return None
+
+    async def set(self, tool_name: str, key: str, value: Any, ttl: float):
+        """缓存一个结果ttl秒，无法序列化或过大的结果不缓存"""
+        try:
+            data = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        except Exception:
+            return
+        expires = time.time() + ttl
+        stored = self._store(key, tool_name, expires, data)
+        if self._disk is not None:
+            await asyncio.to_thread(self._disk.set, key, tool_name, expires, data)
+            stored = True
+        if stored:
+            self._count(tool_name, "stores")
+
+    def _store(self, key: str, tool_name: str, expires: float, data: bytes) -> bool:
+        """放进内存缓存，返回是否放入"""
+        # 单个结果超过内存容量的1/8时不放进内存，避免一个大结果把其他条目全部挤掉
+        if len(data) > self.max_bytes // 8:
+            return False
+        self._remove(key)
+        self._entries[key] = (expires, tool_name, data)
+        self._bytes += len(data)
+        while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+            _, (_, evicted_tool, evicted) = self._entries.popitem(last=False)
+            self._bytes -= len(evicted)
+            self._count(evicted_tool, "evictions")
+        return True
+
+    def _remove(self, key: str):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= len(entry[2])
+
+    def clear(self):
+        """清空内存缓存（磁盘缓存保留）"""
+        self._entries.clear()
+        self._bytes = 0
+
+    def stats(self) -> dict:
+        totals = {"hits": 0, "disk_hits": 0, "misses": 0, "stores": 0, "evictions": 0}
+        for stats in self._stats.values():
+            for event, count in stats.items():
+                totals[event] += count
+        lookups = totals["hits"] + totals["disk_hits"] + totals["misses"]
+        return {
+            **totals,
+            "hit_ratio": round((totals["hits"] + totals["disk_hits"]) / lookups, 4) if lookups else None,
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "max_entries": self.max_entries,
+            "max_bytes": self.max_bytes,
+            "disk_entries": self._disk.entries if self._disk is not None else None,
+            "tools": {name: dict(stats) for name, stats in sorted(self._stats.items())},
+        }
+
+
+_CACHE: Optional[ToolCache] = None
+
+
+def get_tool_cache() -> ToolCache:
+    """返回全局的工具结果缓存"""
+    global _CACHE
+    if _CACHE is None:
+        _CACHE = ToolCache()
+    return _CACHE
+
+
+def get_cache_stats() -> dict:
+    """返回缓存的命中、未命中、淘汰次数和当前占用"""
+    return get_tool_cache().stats()
+
+
+def _cache_events() -> list[tuple[tuple, float]]:
+    samples = []
+    for tool_name, stats in get_tool_cache()._stats.items():
+        samples.append(((tool_name, "memory_hit"), stats["hits"]))
+        samples.append(((tool_name, "disk_hit"), stats["disk_hits"]))
+        samples.append(((tool_name, "miss"), stats["misses"]))
+        samples.append(((tool_name, "eviction"), stats["evictions"]))
+    return samples
+
+
+def _cache_hit_ratio() -> list[tuple[tuple, float]]:
+    samples = []
+    for tool_name, stats in get_tool_cache()._stats.items():
+        lookups = stats["hits"] + stats["disk_hits"] + stats["misses"]
+        if lookups:
+            samples.append(((tool_name,), (stats["hits"] + stats["disk_hits"]) / lookups))
+    return samples
+
+
+def _cache_usage() -> list[tuple[tuple, float]]:
+    cache = get_tool_cache()
+    return [(("entries",), len(cache._entries)), (("bytes",), cache._bytes)]
+
+
+metrics.register(metrics.CallbackMetric(
+    "mcp_tool_cache_events_total", "Result cache lookups and evictions by tool", ("tool", "event"),
+    _cache_events, type="counter",
+))
+metrics.register(metrics.CallbackMetric(
+    "mcp_tool_cache_hit_ratio", "Result cache hit ratio by tool since start", ("tool",), _cache_hit_ratio,
+))
+metrics.register(metrics.CallbackMetric(
+    "mcp_tool_cache_usage", "Result cache memory tier size", ("unit",), _cache_usage,
+))
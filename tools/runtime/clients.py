@@ -0,0 +1,47 @@
+import os
+import ssl
+import time
+from functools import lru_cache
+from typing import Optional
+
+import httpx
+
+from . import metrics
+from .context import CURRENT_TOOL
+from .deadline import clamp
+
+# 单次HTTP操作（连接、读取、写入）的默认超时时间（秒）
+DEFAULT_HTTP_TIMEOUT = float(os.environ.get("MCP_HTTP_TIMEOUT", 30))
+
+
+@lru_cache(maxsize=1)
+def _ssl_context() -> ssl.SSLContext:
+    """所有客户端共享的SSL上下文：每次创建都要加载CA证书，耗时约30ms"""
+    return httpx.create_ssl_context()
+
+
+async def _on_request(request: httpx.Request):
+    request.extensions["mcp_started"] = time.perf_counter()
+
+
+async def _on_response(response: httpx.Response):
+    started = response.request.extensions.get("mcp_started")
+    if started is not None:
+        metrics.UPSTREAM_HTTP_DURATION.observe(
+            time.perf_counter() - started,
+            CURRENT_TOOL.get() or "",
+            f"{response.status_code // 100}xx",
+        )
+
+
+def http_client(timeout: Optional[float] = DEFAULT_HTTP_TIMEOUT, **kwargs) -> httpx.AsyncClient:
+    """
+    创建访问上游服务的HTTP客户端
+
+    超时时间不会超过当前工具调用的剩余时间；截止时间到达或客户端取消请求时，
+    进行中的请求会随调用一起被取消，连接随之关闭。
+    每个请求到收到响应头为止的延迟按发起请求的工具记录到 mcp_upstream_http_duration_seconds。
+    """
+    kwargs.setdefault("verify", _ssl_context())
+    kwargs.setdefault("event_hooks", {"request": [_on_request], "response": [_on_response]})
+    return httpx.AsyncClient(timeout=clamp(timeout), **kwargs)
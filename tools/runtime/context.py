@@ -0,0 +1,9 @@
+from contextvars import ContextVar
+from typing import Optional
+
+# 当前正在执行的工具调用的工具名，用于把上游请求、日志等归属到工具
+CURRENT_TOOL: ContextVar[Optional[str]] = ContextVar("current_tool", default=None)
+
+# 当前调用所属的客户端会话和JSON-RPC请求ID，由服务器在处理请求时设置，附加到日志中
+SESSION_ID: ContextVar[Optional[str]] = ContextVar("session_id", default=None)
+REQUEST_ID: ContextVar[Optional[str]] = ContextVar("request_id", default=None)
@@ -0,0 +1,82 @@
+import asyncio
+import os
+import time
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from typing import Optional
+
+# 工具调用的默认时限（秒），工具可以在 TOOL_OPTIONS["timeout"] 中声明自己的时限
+DEFAULT_TOOL_TIMEOUT = float(os.environ.get("MCP_TOOL_TIMEOUT", 120))
+# 客户端通过 _meta.timeout 请求的时限不能超过这个值
+MAX_TOOL_TIMEOUT = float(os.environ.get("MCP_TOOL_MAX_TIMEOUT", 600))
+
+# 当前工具调用的截止时间（time.monotonic()），None表示没有截止时间
+_DEADLINE: ContextVar[Optional[float]] = ContextVar("tool_call_deadline", default=None)
+
+
+class DeadlineExceeded(TimeoutError):
+    """工具调用超过了截止时间，所有仍在进行的下游操作已被取消"""
+
+    def __init__(self, tool_name: str, timeout: float):
+        self.tool_name = tool_name
+        self.timeout = timeout
+        super().__init__(f"Tool '{tool_name}' exceeded its deadline of {timeout:g}s, call aborted")
+
+
+def resolve_timeout(requested: Optional[float], options: dict) -> float:
+    """确定一次调用的时限：优先使用客户端请求的值，否则使用工具声明的默认值"""
+    if requested is None:
+        return float(options.get("timeout", DEFAULT_TOOL_TIMEOUT))
+    return min(max(float(requested), 0.0), MAX_TOOL_TIMEOUT)
+
+
+def remaining() -> Optional[float]:
+    """当前调用距离截止时间还剩多少秒，不在工具调用中时返回None"""
+    deadline = _DEADLINE.get()
+    if deadline is None:
+        return None
+    return max(deadline - time.monotonic(), 0.0)
+
+
+def clamp(timeout: Optional[float]) -> Optional[float]:
+    """把下游操作（HTTP请求、SQL语句、进程池任务等）的超时时间限制在剩余时间以内"""
+    left = remaining()
+    if left is None:
+        return timeout
+    if timeout is None:
+        return left
+    return min(timeout, left)
+
+
+def detach():
+    """
+    让当前任务不再继承创建者的截止时间
+
+    用于多个调用共享的执行（见 tools.runtime.singleflight）：它不应受第一个调用者较短的时限约束，
+    而是在所有等待者都因各自的截止时间或取消离开后才被取消。
+    """
+    _DEADLINE.set(None)
+
+
+@asynccontextmanager
+async def deadline_scope(tool_name: str, timeout: float):
+    """
+    在截止时间内执行一次工具调用
+
+    截止时间到达时取消其中正在等待的所有操作（排队、HTTP请求、LLM调用、进程池任务等），
+    并抛出DeadlineExceeded。嵌套调用（例如批量工具）不会超过外层调用的截止时间。
+    """
+    deadline = time.monotonic() + timeout
+    outer = _DEADLINE.get()
+    if outer is not None and outer < deadline:
+        deadline = outer
+    token = _DEADLINE.set(deadline)
+    try:
+        async with asyncio.timeout(deadline - time.monotonic()) as scope:
+            yield
+    except TimeoutError:
+        if scope.expired():
+            raise DeadlineExceeded(tool_name, timeout) from None
+        raise
+    finally:
+        _DEADLINE.reset(token)
@@ -0,0 +1,197 @@
+import asyncio
+import importlib
+import multiprocessing
+import os
+import sys
+from typing import Any, Callable, Optional
+
+from .deadline import clamp
+from .shutdown import on_shutdown
+
+# 工作进程数量，0表示不使用进程池（CPU密集型任务直接在事件循环上执行）
+POOL_WORKERS = int(os.environ.get("MCP_PROCESS_POOL_WORKERS", min(4, os.cpu_count() or 1)))
+# 每个工作进程最多执行的任务数，达到后会被替换，防止内存泄漏和状态累积
+MAX_TASKS_PER_WORKER = int(os.environ.get("MCP_PROCESS_POOL_MAX_TASKS", 200))
+# 单个任务的默认时间限制（秒）
+DEFAULT_TASK_TIMEOUT = float(os.environ.get("MCP_PROCESS_POOL_TIMEOUT", 60))
+
+
+class TaskTimeoutError(TimeoutError):
+    """进程池任务超过了时间限制，执行它的工作进程已被终止"""
+
+
+def _worker_main(conn):
+    """工作进程主循环：接收 (函数, 参数)，执行后把 (是否成功, 结果或异常) 发回"""
+    # stdio模式下stdout是协议通道，工作进程中的输出改写到stderr
+    sys.stdout = sys.stderr
+    while True:
+        try:
+            message = conn.recv()
+        except EOFError:
+            break
+        if message is None:
+            break
+        func, args = message
+        try:
+            reply = (True, func(*args))
+        except BaseException as e:
+            reply = (False, e)
+        try:
+            conn.send(reply)
+        except Exception as e:
+            # 结果或异常无法序列化
+            conn.send((False, RuntimeError(f"{type(e).__name__}: {e}")))
+    conn.close()
+
+
+def run_tool_sync(module_path: str, tool_name: str, arguments: dict):
+    """在工作进程中导入工具模块并执行工具调用函数"""
+    from tools import _find_tool_handler
+
+    module = importlib.import_module(module_path)
+    handler = _find_tool_handler(module, tool_name)
+    if handler is None:
+        raise ValueError(f"模块 {module_path} 中没有找到工具 {tool_name} 的调用函数")
+    return asyncio.run(handler(tool_name, arguments))
+
+
+class _Worker:
+    def __init__(self, context):
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(target=_worker_main, args=(child_conn,), daemon=True)
+        self.process.start()
+        child_conn.close()
+        self.tasks_done = 0
+
+    def kill(self):
+        self.process.kill()
+        self.conn.close()
+
+    def stop(self):
+        try:
+            self.conn.send(None)
+        except (OSError, ValueError):
+            pass
+        self.conn.close()
+
+
+class ProcessPool:
+    """
+    执行CPU密集型任务的进程池
+
+    - 工作进程按需创建，最多max_workers个；
+    - 每个工作进程执行max_tasks个任务后被替换（回收）；
+    - 任务超过时间限制或调用方被取消时，只终止执行该任务的工作进程，不影响其他任务。
+
+    使用spawn方式创建工作进程，避免在有事件循环和线程的进程中fork。
+    """
+
+    def __init__(self, max_workers: int, max_tasks: int = MAX_TASKS_PER_WORKER):
+        self.max_workers = max_workers
+        self.max_tasks = max_tasks
+        self._context = multiprocessing.get_context("spawn")
+        self._idle: list[_Worker] = []
+        self._workers = 0
+        self._available: Optional[asyncio.Condition] = None
+        self._closed = False
+
+    def _condition(self) -> asyncio.Condition:
+        if self._available is None:
+            self._available = asyncio.Condition()
+        return self._available
+
+    async def _acquire(self) -> _Worker:
+        available = self._condition()
+        async with available:
+            while True:
+                if self._closed:
+                    raise RuntimeError("进程池已关闭")
+                if self._idle:
+                    return self._idle.pop()
+                if self._workers < self.max_workers:
+                    self._workers += 1
+                    break
+                await available.wait()
+        try:
+            return await asyncio.to_thread(_Worker, self._context)
+        except BaseException:
+            await self._discard(None)
+            raise
+
+    async def _release(self, worker: _Worker):
+        worker.tasks_done += 1
+        if worker.tasks_done >= self.max_tasks or self._closed:
+            worker.stop()
+            await self._discard(None)
+            return
+        available = self._condition()
+        async with available:
+            self._idle.append(worker)
+            available.notify()
+
+    async def _discard(self, worker: Optional[_Worker]):
+        if worker is not None:
+            worker.kill()
+        available = self._condition()
+        async with available:
+            self._workers -= 1
+            available.notify()
+
+    async def run(self, func: Callable, *args, timeout: Optional[float] = DEFAULT_TASK_TIMEOUT) -> Any:
+        """在工作进程中执行 func(*args)，func和参数必须可以被pickle"""
+        worker = await self._acquire()
+        try:
+            worker.conn.send((func, args))
+            ok, result = await asyncio.wait_for(asyncio.to_thread(worker.conn.recv), timeout)
+        except asyncio.TimeoutError:
+            await self._discard(worker)
+            raise TaskTimeoutError(f"任务执行超过 {timeout} 秒，已终止")
+        except BaseException:
+            # 被取消，或工作进程异常退出
+            await self._discard(worker)
+            raise
+        await self._release(worker)
+        if not ok:
+            raise result
+        return result
+
+    def shutdown(self):
+        """停止所有空闲的工作进程，正在执行任务的进程在任务结束后退出"""
+        self._closed = True
+        for worker in self._idle:
+            worker.stop()
+        self._idle.clear()
+
+
+_POOL: Optional[ProcessPool] = None
+
+
+def get_process_pool() -> Optional[ProcessPool]:
+    """返回全局进程池，MCP_PROCESS_POOL_WORKERS=0 时返回None"""
+    global _POOL
+    if POOL_WORKERS <= 0:
+        return None
+    if _POOL is None:
+        _POOL = ProcessPool(POOL_WORKERS)
+    return _POOL
+
+
+async def run_cpu_bound(func: Callable, *args, timeout: Optional[float] = DEFAULT_TASK_TIMEOUT) -> Any:
+    """在进程池中执行CPU密集型函数；未启用进程池时直接调用
+
+    时间限制不会超过当前工具调用的剩余时间。
+    """
+    pool = get_process_pool()
+    if pool is None:
+        return func(*args)
+    return await pool.run(func, *args, timeout=clamp(timeout))
+
+
+def shutdown_process_pool():
+    global _POOL
+    if _POOL is not None:
+        _POOL.shutdown()
+        _POOL = None
+
+
+on_shutdown(shutdown_process_pool)
@@ -0,0 +1,224 @@
+import asyncio
+import json
+import os
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Optional
+
+from . import metrics
+
+# 工具并发限制（隔舱）配置，所有限制都在这里集中配置
+#
+# 键为隔舱名称。带 "tools" 的是工具组，组内所有工具共享同一个限制；
+# 不带 "tools" 的隔舱名称就是工具名，只限制该工具。一个工具可以同时属于单独的隔舱和工具组。
+#   max_concurrent: 同时执行的最大调用数
+#   max_queue:      等待队列的最大长度，队列满时新的调用立即失败
+#   max_wait:       在队列中等待的最长时间（秒），超过后调用失败
+#
+# 可以通过环境变量 MCP_TOOL_LIMITS 传入JSON覆盖或补充这里的配置，例如:
+#   MCP_TOOL_LIMITS='{"browser_use": {"max_concurrent": 4, "max_queue": 8}}'
+CONCURRENCY_LIMITS = {
+    # 调用上游LLM的工具共享配额
+    "llm": {
+        "tools": ["pdf_llm", "browser_use"],
+        "max_concurrent": 4,
+        "max_queue": 16,
+        "max_wait": 60,
+    },
+    # 每个浏览器会话都很占内存
+    "browser_use": {"max_concurrent": 2, "max_queue": 4, "max_wait": 60},
+    "pdf_llm": {"max_concurrent": 3, "max_queue": 12, "max_wait": 60},
+    # 每次调用都会占用一个数据库连接
+    "postgres": {"max_concurrent": 10, "max_queue": 50, "max_wait": 30},
+    # 访问外部HTTP服务的工具
+    "http": {
+        "tools": ["fetch", "http_client", "web_scraper", "weather", "ip_info", "translator", "image_gen"],
+        "max_concurrent": 64,
+        "max_queue": 256,
+        "max_wait": 30,
+    },
+    # 在进程池中执行的CPU密集型工具
+    "cpu": {
+        "tools": ["code_formatter", "calculator"],
+        "max_concurrent": 16,
+        "max_queue": 64,
+        "max_wait": 30,
+    },
+}
+
+
+class ToolBusyError(RuntimeError):
+    """工具当前过于繁忙，调用被拒绝，稍后重试即可"""
+
+    def __init__(self, tool_name: str, bulkhead: "Bulkhead", reason: str):
+        self.tool_name = tool_name
+        self.bulkhead = bulkhead.name
+        super().__init__(
+            f"Tool '{tool_name}' is busy ({reason}; bulkhead '{bulkhead.name}': "
+            f"{bulkhead.active}/{bulkhead.max_concurrent} running, "
+            f"{bulkhead.waiting}/{bulkhead.max_queue} queued), please retry later"
+        )
+
+
+class Bulkhead:
+    """带有限等待队列的并发限制，按先来先服务的顺序放行"""
+
+    def __init__(self, name: str, max_concurrent: int, max_queue: int = 0, max_wait: Optional[float] = None):
+        self.name = name
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+        self.active = 0
+        self._waiters: deque[asyncio.Future] = deque()
+        # 统计信息
+        self.acquired = 0
+        self.rejected = 0
+        self.timed_out = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+
+    @property
+    def waiting(self) -> int:
+        return len(self._waiters)
+
+    async def acquire(self, tool_name: str):
+        if self.active < self.max_concurrent and not self._waiters:
+            self.active += 1
+            self.acquired += 1
+            return
+        if len(self._waiters) >= self.max_queue:
+            self.rejected += 1
+            raise ToolBusyError(tool_name, self, "queue full")
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        started = time.monotonic()
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter), self.max_wait)
+        except asyncio.TimeoutError:
+            if not self._abandon(waiter):
+                self.timed_out += 1
+                raise ToolBusyError(tool_name, self, f"waited more than {self.max_wait}s")
+        except BaseException:
+            if self._abandon(waiter):
+                # 被取消的同时拿到了名额，转交给下一个等待者
+                self.release()
+            raise
+        finally:
+            waited = time.monotonic() - started
+            self.wait_seconds_total += waited
+            self.wait_seconds_max = max(self.wait_seconds_max, waited)
+        self.acquired += 1
+
+    def _abandon(self, waiter: asyncio.Future) -> bool:
+        """放弃排队。如果名额已经转交给这个等待者，则把名额交还，返回True表示名额已经拿到"""
+        if waiter.done() and not waiter.cancelled():
+            return True
+        waiter.cancel()
+        try:
+            self._waiters.remove(waiter)
+        except ValueError:
+            pass
+        return False
+
+    def release(self):
+        # 直接把名额转交给队列中的下一个等待者，active数量不变
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.active -= 1
+
+    def stats(self) -> dict:
+        return {
+            "name": self.name,
+            "max_concurrent": self.max_concurrent,
+            "max_queue": self.max_queue,
+            "active": self.active,
+            "queued": self.waiting,
+            "acquired": self.acquired,
+            "rejected": self.rejected,
+            "timed_out": self.timed_out,
+            "wait_seconds_total": round(self.wait_seconds_total, 6),
+            "wait_seconds_max": round(self.wait_seconds_max, 6),
+        }
+
+
+def _load_limits() -> dict:
+    limits = {name: dict(config) for name, config in CONCURRENCY_LIMITS.items()}
+    override = os.environ.get("MCP_TOOL_LIMITS")
+    if override:
+        for name, config in json.loads(override).items():
+            limits.setdefault(name, {}).update(config)
+    return limits
+
+
+_BULKHEADS: dict[str, Bulkhead] = {}
+# 工具名 -> 该工具需要依次获取的隔舱。先获取工具自己的隔舱、再获取工具组，
+# 排队等待自己隔舱的调用不会占着组名额挤掉组内其他工具；
+# 同类隔舱按名称排序，所有调用以同一顺序获取，不会互相等待
+_TOOL_BULKHEADS: dict[str, tuple[Bulkhead, ...]] = {}
+
+
+def configure_limits(limits: dict = None):
+    """根据配置创建所有隔舱（默认使用 CONCURRENCY_LIMITS 和 MCP_TOOL_LIMITS）"""
+    limits = _load_limits() if limits is None else limits
+    _BULKHEADS.clear()
+    _TOOL_BULKHEADS.clear()
+    members: dict[str, list[Bulkhead]] = {}
+    for name, config in sorted(limits.items(), key=lambda item: ("tools" in item[1], item[0])):
+        bulkhead = Bulkhead(
+            name,
+            max_concurrent=config["max_concurrent"],
+            max_queue=config.get("max_queue", 0),
+            max_wait=config.get("max_wait"),
+        )
+        _BULKHEADS[name] = bulkhead
+        for tool_name in config.get("tools", [name]):
+            members.setdefault(tool_name, []).append(bulkhead)
+    for tool_name, bulkheads in members.items():
+        _TOOL_BULKHEADS[tool_name] = tuple(bulkheads)
+
+
+@asynccontextmanager
+async def tool_slot(tool_name: str):
+    """获取工具所属的所有隔舱的名额，退出时释放；没有配置限制的工具直接放行"""
+    bulkheads = _TOOL_BULKHEADS.get(tool_name, ())
+    acquired = []
+    try:
+        for bulkhead in bulkheads:
+            await bulkhead.acquire(tool_name)
+            acquired.append(bulkhead)
+        yield
+    finally:
+        for bulkhead in reversed(acquired):
+            bulkhead.release()
+
+
+def get_limit_stats() -> list[dict]:
+    """返回所有隔舱当前的执行数、排队数和等待时间统计"""
+    return [bulkhead.stats() for bulkhead in _BULKHEADS.values()]
+
+
+def _bulkhead_samples(field: str):
+    return lambda: [((bulkhead.name,), getattr(bulkhead, field)) for bulkhead in _BULKHEADS.values()]
+
+
+metrics.register(metrics.CallbackMetric(
+    "mcp_bulkhead_active", "Calls holding a bulkhead slot", ("bulkhead",), _bulkhead_samples("active"),
+))
+metrics.register(metrics.CallbackMetric(
+    "mcp_bulkhead_queued", "Calls waiting for a bulkhead slot", ("bulkhead",), _bulkhead_samples("waiting"),
+))
+metrics.register(metrics.CallbackMetric(
+    "mcp_bulkhead_rejected_total", "Calls rejected because the bulkhead queue was full",
+    ("bulkhead",), _bulkhead_samples("rejected"), type="counter",
+))
+metrics.register(metrics.CallbackMetric(
+    "mcp_bulkhead_timed_out_total", "Calls that gave up waiting for a bulkhead slot",
+    ("bulkhead",), _bulkhead_samples("timed_out"), type="counter",
+))
+
+configure_limits()
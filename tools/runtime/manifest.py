@@ -0,0 +1,101 @@
+import ast
+from typing import Any, Optional
+
+# Tool(...) 调用中需要静态读取的参数
+_TOOL_FIELDS = ("name", "description", "inputSchema")
+
+
+def _is_tool_call(node: ast.AST) -> bool:
+    """判断节点是否为 types.Tool(...) 或 Tool(...) 调用"""
+    if not isinstance(node, ast.Call):
+        return False
+    func = node.func
+    if isinstance(func, ast.Attribute):
+        return func.attr == "Tool"
+    return isinstance(func, ast.Name) and func.id == "Tool"
+
+
+def _literal_tool(node: ast.Call) -> Optional[dict[str, Any]]:
+    """把 Tool(name=..., description=..., inputSchema=...) 转换为字典，参数不是字面量时返回None"""
+    if node.args:
+        return None
+    tool = {}
+    for keyword in node.keywords:
+        if keyword.arg not in _TOOL_FIELDS:
+            return None
+        try:
+            tool[keyword.arg] = ast.literal_eval(keyword.value)
+        except ValueError:
+            return None
+    if "name" not in tool or "inputSchema" not in tool:
+        return None
+    return tool
+
+
+def _find_get_tools(tree: ast.Module) -> Optional[ast.FunctionDef]:
+    for node in tree.body:
+        if isinstance(node, ast.FunctionDef) and node.name == "get_tools":
+            return node
+    return None
+
+
+def _find_tool_options(tree: ast.Module) -> Optional[dict[str, Any]]:
+    """读取模块级的 TOOL_OPTIONS = {...} 字面量，没有定义时返回空字典"""
+    for node in tree.body:
+        if isinstance(node, ast.Assign):
+            targets = node.targets
+        elif isinstance(node, ast.AnnAssign) and node.value is not None:
+            targets = [node.target]
+        else:
+            continue
+        if any(isinstance(t, ast.Name) and t.id == "TOOL_OPTIONS" for t in targets):
+            try:
+                options = ast.literal_eval(node.value)
+            except ValueError:
+                return None
+            return options if isinstance(options, dict) else None
+    return {}
+
+
+def read_tool_manifest(path: str) -> Optional[dict[str, Any]]:
+    """
+    不导入模块，直接从源码中静态读取工具清单
+
+    返回 {"tools": [{"name", "description", "inputSchema"}, ...], "options": {...}}，
+    其中options是模块级 TOOL_OPTIONS 字典（例如 {"cpu_bound": True}），对模块中所有工具生效。
+
+    只支持 get_tools() 直接 return 一个由字面量参数构成的 Tool(...) 列表、TOOL_OPTIONS 为字面量
+    的写法（本目录下的工具都是这样写的）。模块没有 get_tools() 时tools为空列表；
+    无法静态解析时返回None，调用方应退回到导入模块。
+    """
+    with open(path, encoding="utf-8") as f:
+        source = f.read()
+    try:
+        tree = ast.parse(source, filename=path)
+    except SyntaxError:
+        return None
+
+    options = _find_tool_options(tree)
+    if options is None:
+        return None
+
+    func = _find_get_tools(tree)
+    if func is None:
+        return {"tools": [], "options": options}
+
+    body = [node for node in func.body if not isinstance(node, ast.Expr)]
+    if len(body) != 1 or not isinstance(body[0], ast.Return):
+        return None
+    value = body[0].value
+    if not isinstance(value, ast.List):
+        return None
+
+    tools = []
+    for element in value.elts:
+        if not _is_tool_call(element):
+            return None
+        tool = _literal_tool(element)
+        if tool is None:
+            return None
+        tools.append(tool)
+    return {"tools": tools, "options": options}
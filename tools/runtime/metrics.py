@@ -0,0 +1,245 @@
+import asyncio
+import math
+import os
+from bisect import bisect_left
+from typing import Callable, Iterable, Optional
+
+# 延迟直方图的默认分桶（秒），覆盖从毫秒级的本地工具到分钟级的LLM调用
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: tuple[str, ...], values: tuple, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value)
+
+
+class _Metric:
+    type = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+
+    def header(self) -> list[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type}"]
+
+
+class Counter(_Metric):
+    """只增不减的计数器"""
+    type = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: dict[tuple, float] = {}
+
+    def inc(self, *labelvalues, amount: float = 1):
+        self._values[labelvalues] = self._values.get(labelvalues, 0) + amount
+
+    def collect(self) -> list[str]:
+        return [
+            f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}"
+            for labels, value in sorted(self._values.items())
+        ]
+
+
+class Gauge(_Metric):
+    """可增可减的当前值"""
+    type = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: dict[tuple, float] = {}
+
+    def set(self, value: float, *labelvalues):
+        self._values[labelvalues] = value
+
+    def inc(self, *labelvalues, amount: float = 1):
+        self._values[labelvalues] = self._values.get(labelvalues, 0) + amount
+
+    def dec(self, *labelvalues, amount: float = 1):
+        self._values[labelvalues] = self._values.get(labelvalues, 0) - amount
+
+    def collect(self) -> list[str]:
+        return [
+            f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}"
+            for labels, value in sorted(self._values.items())
+        ]
+
+
+class Histogram(_Metric):
+    """按分桶统计的观测值分布（例如延迟），observe只做一次二分查找和几次加法"""
+    type = "histogram"
+
+    def __init__(
+        self, name: str, documentation: str, labelnames: Iterable[str] = (), buckets=DEFAULT_BUCKETS
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # 标签值 -> [各分桶计数(不累计)..., 超出最大分桶的计数, 总和]
+        self._values: dict[tuple, list] = {}
+
+    def observe(self, value: float, *labelvalues):
+        counts = self._values.get(labelvalues)
+        if counts is None:
+            counts = self._values[labelvalues] = [0] * (len(self.buckets) + 1) + [0.0]
+        counts[bisect_left(self.buckets, value)] += 1
+        counts[-1] += value
+
+    def collect(self) -> list[str]:
+        lines = []
+        for labels, counts in sorted(self._values.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), counts):
+                cumulative += count
+                le = 'le="' + _format_value(float(bound)) + '"'
+                lines.append(
+                    f"{self.name}_bucket{_format_labels(self.labelnames, labels, le)} {cumulative}"
+                )
+            label_text = _format_labels(self.labelnames, labels)
+            lines.append(f"{self.name}_sum{label_text} {_format_value(counts[-1])}")
+            lines.append(f"{self.name}_count{label_text} {cumulative}")
+        return lines
+
+
+class CallbackMetric(_Metric):
+    """在抓取时才计算的指标，callback返回 [(标签值元组, 数值)]，调用路径上没有任何开销"""
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Iterable[str],
+        callback: Callable[[], Iterable[tuple[tuple, float]]],
+        type: str = "gauge",
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.type = type
+        self.callback = callback
+
+    def collect(self) -> list[str]:
+        return [
+            f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}"
+            for labels, value in self.callback()
+            if value is not None
+        ]
+
+
+_REGISTRY: dict[str, _Metric] = {}
+
+
+def register(metric: _Metric) -> _Metric:
+    """注册一个指标，同名指标只保留第一次注册的实例"""
+    return _REGISTRY.setdefault(metric.name, metric)
+
+
+def counter(name: str, documentation: str, labelnames: Iterable[str] = ()) -> Counter:
+    return register(Counter(name, documentation, labelnames))
+
+
+def gauge(name: str, documentation: str, labelnames: Iterable[str] = ()) -> Gauge:
+    return register(Gauge(name, documentation, labelnames))
+
+
+def histogram(
+    name: str, documentation: str, labelnames: Iterable[str] = (), buckets=DEFAULT_BUCKETS
+) -> Histogram:
+    return register(Histogram(name, documentation, labelnames, buckets))
+
+
+def render() -> str:
+    """以Prometheus文本格式输出所有指标"""
+    lines = []
+    for metric in _REGISTRY.values():
+        try:
+            samples = metric.collect()
+        except Exception as e:
+            lines.append(f"# {metric.name} collection failed: {type(e).__name__}: {e}")
+            continue
+        lines.extend(metric.header())
+        lines.extend(samples)
+    return "\n".join(lines) + "\n"
+
+
+# 工具调用指标，由 tools.call_tool 更新
+TOOL_CALLS = counter("mcp_tool_calls_total", "Tool calls by tool and outcome", ("tool", "outcome"))
+TOOL_ERRORS = counter("mcp_tool_errors_total", "Failed tool calls by tool and error type", ("tool", "error"))
+TOOL_DURATION = histogram("mcp_tool_call_duration_seconds", "Tool call latency, including queueing", ("tool",))
+TOOL_IN_FLIGHT = gauge("mcp_tool_calls_in_flight", "Tool calls currently executing or queued", ("tool",))
+
+# 上游服务延迟，由 tools.runtime.clients 和数据库工具更新
+UPSTREAM_HTTP_DURATION = histogram(
+    "mcp_upstream_http_duration_seconds",
+    "Upstream HTTP latency until response headers, by calling tool and status class",
+    ("tool", "status"),
+)
+DB_QUERY_DURATION = histogram(
+    "mcp_db_query_duration_seconds", "Database statement latency by tool and operation", ("tool", "operation")
+)
+
+
+# 进程资源，抓取时才读取
+def _process_stats() -> list[tuple[tuple, float]]:
+    import psutil
+
+    memory = psutil.Process(os.getpid()).memory_info()
+    return [(("rss",), memory.rss), (("vms",), memory.vms)]
+
+
+def _process_cpu() -> list[tuple[tuple, float]]:
+    import psutil
+
+    times = psutil.Process(os.getpid()).cpu_times()
+    return [((), times.user + times.system)]
+
+
+register(CallbackMetric(
+    "mcp_process_memory_bytes", "Process memory usage", ("type",), _process_stats
+))
+register(CallbackMetric(
+    "mcp_process_cpu_seconds_total", "Process user and system CPU time", (), _process_cpu, type="counter"
+))
+
+# 事件循环延迟：定时唤醒的实际时间比预定时间晚了多少
+LOOP_LAG = histogram(
+    "mcp_event_loop_lag_seconds",
+    "Event loop scheduling lag",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5),
+)
+LOOP_LAG_LAST = gauge("mcp_event_loop_lag_last_seconds", "Most recent event loop lag sample")
+
+
+async def monitor_loop_lag(interval: float = 0.5):
+    """每隔interval秒唤醒一次，把唤醒的延迟记录到 mcp_event_loop_lag_seconds"""
+    loop = asyncio.get_running_loop()
+    while True:
+        expected = loop.time() + interval
+        await asyncio.sleep(interval)
+        lag = max(loop.time() - expected, 0.0)
+        LOOP_LAG.observe(lag)
+        LOOP_LAG_LAST.set(lag)
+
+
+_LOOP_LAG_TASK: Optional[asyncio.Task] = None
+
+
+def start_loop_lag_monitor(interval: float = 0.5) -> asyncio.Task:
+    """在当前事件循环上启动事件循环延迟监控（重复调用只启动一次）"""
+    global _LOOP_LAG_TASK
+    if _LOOP_LAG_TASK is None or _LOOP_LAG_TASK.done():
+        _LOOP_LAG_TASK = asyncio.get_running_loop().create_task(monitor_loop_lag(interval))
+    return _LOOP_LAG_TASK
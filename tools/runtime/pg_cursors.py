@@ -0,0 +1,133 @@
+"""
+PostgreSQL服务器端游标的续取
+
+postgres 工具的查询在服务器端的命名游标中执行，每次调用只从数据库取回要返回的行，
+无论结果集有多大，服务器进程的内存占用都只和每页的行数有关。结果没有取完时，游标连同它所在的连接和事务
+保留在这里，调用方拿到一个不透明的续取令牌，在之后的调用中传入令牌继续分页获取:
+- MCP_PG_CURSOR_IDLE_TIMEOUT: 超过该秒数没有续取的游标被关闭，连接归还到池中，默认 120
+- MCP_PG_MAX_CURSORS:         本进程同时保留的游标数上限，默认 20；超过时关闭最久未用的游标
+
+每个保留的游标占用连接池中的一个连接，同一个连接池中的游标最多占用池大小的一半，为其他调用留出连接。
+令牌只在创建它的进程中有效，并且只能由相同 (host, port, database, user) 和密码的调用使用。
+"""
+
+import asyncio
+import logging
+import os
+import secrets
+import time
+from typing import Optional
+
+from . import metrics
+from .pg_pool import ConnectionPool, _digest, _Entry
+from .shutdown import on_shutdown
+
+logger = logging.getLogger(__name__)
+
+IDLE_TIMEOUT = float(os.environ.get("MCP_PG_CURSOR_IDLE_TIMEOUT", 120))
+MAX_CURSORS = int(os.environ.get("MCP_PG_MAX_CURSORS", 20))
+
+CURSORS_CLOSED = metrics.counter(
+    "mcp_db_cursors_closed_total",
+    "Kept PostgreSQL cursors closed, by reason (exhausted, idle, evicted, closed, error, shutdown)",
+    ("reason",),
+)
+
+
+class CursorNotFound(LookupError):
+    """续取令牌无效、已过期或属于其他连接参数"""
+
+    def __init__(self):
+        super().__init__(
+            f"Cursor not found: it was exhausted, closed after {IDLE_TIMEOUT:g}s idle, evicted, "
+            f"or belongs to another server process or connection; re-run the query"
+        )
+
+
+class ResultCursor:
+    """一个服务器端游标，以及它占用的连接"""
+
+    def __init__(self, pool: ConnectionPool, entry: _Entry, cursor, password: str):
+        self.token = secrets.token_urlsafe(18)
+        self.pool = pool
+        self.entry = entry
+        self.cursor = cursor
+        self.credential = _digest(password)
+        # 为判断是否还有更多行而多取的一行，下一页从这里开始
+        self.pending: list = []
+        # 已经返回给调用方的行数
+        self.position = 0
+        self.last_used = time.monotonic()
+
+    @property
+    def columns(self) -> list[str]:
+        return [column.name for column in self.cursor.description or ()]
+
+    async def page(self, limit: int) -> tuple[list, bool]:
+        """取下一页，返回 (行, 是否还有更多行)；多取一行判断是否还有更多，不依赖rowcount"""
+        wanted = limit + 1 - len(self.pending)
+        rows = self.pending + (await self.cursor.fetchmany(wanted) if wanted > 0 else [])
+        self.pending = rows[limit:]
+        page = rows[:limit]
+        self.position += len(page)
+        self.last_used = time.monotonic()
+        return page, bool(self.pending)
+
+    async def close(self, reason: str):
+        """归还连接；归还时回滚事务，服务器端游标随之关闭"""
+        CURSORS_CLOSED.inc(reason)
+        await self.pool.release(self.entry)
+
+
+# 保留的游标: 令牌 -> ResultCursor。正在被某次调用续取的游标暂时不在这里
+_CURSORS: dict[str, ResultCursor] = {}
+_REAPER: Optional[asyncio.Task] = None
+
+
+async def keep(cursor: ResultCursor) -> str:
+    """保留还有更多行的游标，返回续取令牌"""
+    global _REAPER
+    limit = max(1, cursor.pool.max_size // 2)
+    same_pool = [c for c in _CURSORS.values() if c.pool is cursor.pool]
+    while _CURSORS and (len(_CURSORS) >= MAX_CURSORS or len(same_pool) >= limit):
+        candidates = same_pool if len(same_pool) >= limit else list(_CURSORS.values())
+        oldest = min(candidates, key=lambda c: c.last_used)
+        del _CURSORS[oldest.token]
+        if oldest in same_pool:
+            same_pool.remove(oldest)
+        logger.info("保留的游标过多，关闭最久未用的游标（已返回 %d 行）", oldest.position)
+        await oldest.close("evicted")
+    _CURSORS[cursor.token] = cursor
+    if _REAPER is None or _REAPER.done():
+        _REAPER = asyncio.get_running_loop().create_task(_reap_forever())
+    return cursor.token
+
+
+def take(token: str, pool: ConnectionPool, password: str) -> ResultCursor:
+    """取出令牌对应的游标用于续取；令牌无效或连接参数、密码不一致时抛出CursorNotFound"""
+    cursor = _CURSORS.get(token)
+    if cursor is None or cursor.pool is not pool or cursor.credential != _digest(password):
+        raise CursorNotFound()
+    return _CURSORS.pop(token)
+
+
+async def _reap_forever():
+    while _CURSORS:
+        await asyncio.sleep(min(5, IDLE_TIMEOUT))
+        now = time.monotonic()
+        for token, cursor in list(_CURSORS.items()):
+            if now - cursor.last_used >= IDLE_TIMEOUT and _CURSORS.pop(token, None) is not None:
+                await cursor.close("idle")
+
+
+@on_shutdown
+async def close_cursors():
+    cursors = list(_CURSORS.values())
+    _CURSORS.clear()
+    for cursor in cursors:
+        await cursor.close("shutdown")
+
+
+metrics.register(metrics.CallbackMetric(
+    "mcp_db_open_cursors", "PostgreSQL cursors kept open for continuation", (), lambda: [((), len(_CURSORS))]
+))
@@ -0,0 +1,405 @@
+"""
+PostgreSQL连接池
+
+每个 (host, port, database, user) 一个连接池，工具调用结束后连接归还到池中，下一次调用直接复用，
+省去TCP/TLS握手、认证和数据库端fork后端进程的开销:
+- MCP_PG_POOL_MIN_SIZE:     每个池保持的热连接数，默认 0；池第一次认证成功后在后台补足，回收空闲连接时保留，
+                            连接断开或到期被丢弃后由后台任务重新补足，保持热连接的池不会因为空闲而被删除
+- MCP_PG_POOL_MAX_SIZE:     每个池的最大连接数，默认 10
+- MCP_PG_MAX_CONNECTIONS:   本进程所有池的连接总数上限，默认 50；达到上限时先关闭其他池中最久未用的空闲连接
+- MCP_PG_POOL_MAX_IDLE:     空闲超过该秒数的连接被关闭，默认 300
+- MCP_PG_POOL_MAX_LIFETIME: 连接最长使用时间（秒），到期后归还时关闭，默认 3600
+- MCP_PG_POOL_TIMEOUT:      没有可用连接时的最长等待时间（秒），默认 10，且不超过本次调用的剩余时间
+
+连接使用psycopg 3的异步接口（AsyncConnection），建立连接和执行语句都不会阻塞事件循环，
+多个调用的语句可以同时在数据库中执行；调用被取消或超过截止时间时，psycopg向服务器发送取消请求。
+取出连接时设置一次 statement_timeout 作为健康检查，同时把语句超时设为本次调用的剩余时间，
+作为客户端取消之外的第二道保险；连接已断开时丢弃并换下一个。归还时回滚未结束的事务，状态不明的连接直接关闭。
+池按 (host, port, database, user) 区分，但只有密码与建立池中连接时使用的密码一致的调用才能复用，
+密码不同时先用新密码建立连接完成认证（例如密码已轮换），认证失败则报错。
+"""
+
+import asyncio
+import contextvars
+import hashlib
+import logging
+import math
+import os
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Optional
+
+import anyio
+import psycopg
+from psycopg.pq import TransactionStatus
+
+from . import metrics
+from .deadline import remaining
+from .shutdown import on_shutdown
+
+logger = logging.getLogger(__name__)
+
+MIN_SIZE = int(os.environ.get("MCP_PG_POOL_MIN_SIZE", 0))
+MAX_SIZE = int(os.environ.get("MCP_PG_POOL_MAX_SIZE", 10))
+MAX_CONNECTIONS = int(os.environ.get("MCP_PG_MAX_CONNECTIONS", 50))
+MAX_IDLE = float(os.environ.get("MCP_PG_POOL_MAX_IDLE", 300))
+MAX_LIFETIME = float(os.environ.get("MCP_PG_POOL_MAX_LIFETIME", 3600))
+POOL_TIMEOUT = float(os.environ.get("MCP_PG_POOL_TIMEOUT", 10))
+
+# 后台回收空闲连接的间隔（秒）
+_REAP_INTERVAL = 30
+# 归还连接时回滚事务的最长时间（秒），超时的连接直接关闭
+_RESET_TIMEOUT = 5
+
+POOL_EVENTS = metrics.counter(
+    "mcp_db_pool_events_total",
+    "PostgreSQL pool events: opened, reused, discarded (broken or expired), reaped (idle), evicted, timeout",
+    ("event",),
+)
+
+
+class PoolTimeout(ConnectionError):
+    """在等待时间内没有可用的数据库连接，稍后重试即可"""
+
+    def __init__(self, pool: "ConnectionPool", waited: float):
+        host, port, database, user = pool.key
+        super().__init__(
+            f"PostgreSQL connection pool for {user}@{host}:{port}/{database} exhausted "
+            f"({pool.in_use}/{pool.max_size} in use, {_TOTAL}/{MAX_CONNECTIONS} connections in this process), "
+            f"waited {waited:.1f}s, please retry later"
+        )
+
+
+class _Entry:
+    __slots__ = ("conn", "created", "last_used")
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.created = self.last_used = time.monotonic()
+
+
+class ConnectionPool:
+    def __init__(self, key: tuple, min_size: int = MIN_SIZE, max_size: int = MAX_SIZE):
+        self.key = key
+        self.min_size = min_size
+        self.max_size = max_size
+        # 池中连接认证时使用的密码摘要，密码相同的调用才能复用空闲连接
+        self._credential: Optional[bytes] = None
+        # 认证成功的密码，只在 min_size > 0 时保留，用于在后台补足热连接
+        self._password: Optional[str] = None
+        self._filling: Optional[asyncio.Task] = None
+        # 空闲连接，右端是最近归还的连接，优先复用；回收从左端（最久未用）开始
+        self.idle: deque[_Entry] = deque()
+        self.in_use = 0
+        self.connecting = 0
+
+    @property
+    def size(self) -> int:
+        return len(self.idle) + self.in_use + self.connecting
+
+    def verify(self, password: str) -> bool:
+        """密码是否与池中连接认证时所用的密码一致"""
+        return self._credential is not None and self._credential == _digest(password)
+
+    async def _open(self, password: str) -> _Entry:
+        host, port, database, user = self.key
+        kwargs = {}
+        left = remaining()
+        if left is not None:
+            kwargs["connect_timeout"] = max(math.ceil(left), 2)
+        try:
+            conn = await psycopg.AsyncConnection.connect(
+                host=host, port=port, dbname=database, user=user, password=password, **kwargs
+            )
+        except psycopg.Error as e:
+            raise ConnectionError(f"无法连接到数据库: {str(e)}")
+        POOL_EVENTS.inc("opened")
+        return _Entry(conn)
+
+    def _discard(self, entry: _Entry, event: str):
+        """不再计入连接总数，由调用方负责关闭连接"""
+        global _TOTAL
+        _TOTAL -= 1
+        POOL_EVENTS.inc(event)
+        _notify()
+
+    async def _close(self, entry: _Entry, event: str):
+        self._discard(entry, event)
+        try:
+            await entry.conn.close()
+        except Exception:
+            pass
+
+    async def _prepare(self, entry: _Entry) -> bool:
+        """健康检查并把语句超时设为本次调用的剩余时间，连接不可用时返回False"""
+        if entry.conn.closed:
+            return False
+        left = remaining()
+        try:
+            if left is None:
+                await entry.conn.execute("RESET statement_timeout")
+            else:
+                await entry.conn.execute(
+                    "SELECT set_config('statement_timeout', %s, false)", (str(max(int(left * 1000), 1)),)
+                )
+        except psycopg.Error:
+            return False
+        return True
+
+    async def _take_idle(self) -> Optional[_Entry]:
+        now = time.monotonic()
+        while self.idle:
+            entry = self.idle.pop()
+            self.in_use += 1
+            try:
+                usable = now - entry.created < MAX_LIFETIME and await self._prepare(entry)
+            except BaseException:
+                self.in_use -= 1
+                await self._close(entry, "discarded")
+                raise
+            self.in_use -= 1
+            if usable:
+                POOL_EVENTS.inc("reused")
+                return entry
+            await self._close(entry, "discarded")
+        return None
+
+    async def acquire(self, password: str) -> _Entry:
+        global _TOTAL
+        credential = _digest(password)
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        timeout = POOL_TIMEOUT
+        left = remaining()
+        if left is not None:
+            timeout = min(timeout, left)
+        while True:
+            if credential == self._credential:
+                entry = await self._take_idle()
+                if entry is not None:
+                    self.in_use += 1
+                    return entry
+            elif self.idle and self.size >= self.max_size:
+                # 密码不同的调用不能复用空闲连接，关闭一个为它腾出位置
+                await self._close(self.idle.popleft(), "evicted")
+            victim = None
+            if self.size < self.max_size and (_TOTAL < MAX_CONNECTIONS or (victim := _evict_idle(self))):
+                _TOTAL += 1
+                self.connecting += 1
+                entry = None
+                try:
+                    if victim is not None:
+                        await victim.conn.close()
+                    entry = await self._open(password)
+                    if not await self._prepare(entry):
+                        raise ConnectionError("无法连接到数据库: 新建的连接不可用")
+                except BaseException:
+                    if entry is not None:
+                        await entry.conn.close()
+                    _TOTAL -= 1
+                    _notify()
+                    raise
+                finally:
+                    self.connecting -= 1
+                if credential != self._credential:
+                    # 新密码认证成功（例如密码已轮换），之后只有使用新密码的调用可以复用池中的连接
+                    self._credential = credential
+                    if self.min_size > 0:
+                        self._password = password
+                        self.start_fill()
+                self.in_use += 1
+                return entry
+            left = timeout - (loop.time() - started)
+            if left <= 0:
+                POOL_EVENTS.inc("timeout")
+                raise PoolTimeout(self, loop.time() - started)
+            waiter = loop.create_future()
+            _WAITERS.append(waiter)
+            try:
+                await asyncio.wait_for(waiter, left)
+            except asyncio.TimeoutError:
+                pass
+            finally:
+                if waiter in _WAITERS:
+                    _WAITERS.remove(waiter)
+
+    async def release(self, entry: _Entry):
+        conn = entry.conn
+        # 调用可能正在被取消，回滚放在屏蔽取消的范围内执行，并限制最长时间
+        with anyio.CancelScope(shield=True):
+            if conn.info.transaction_status in (TransactionStatus.INTRANS, TransactionStatus.INERROR):
+                with anyio.move_on_after(_RESET_TIMEOUT):
+                    try:
+                        await conn.rollback()
+                    except psycopg.Error:
+                        pass
+            self.in_use -= 1
+            now = time.monotonic()
+            if (
+                conn.closed
+                # 语句被取消后仍在执行或连接状态不明
+                or conn.info.transaction_status != TransactionStatus.IDLE
+                or now - entry.created >= MAX_LIFETIME
+                or _POOLS.get(self.key) is not self
+            ):
+                await self._close(entry, "discarded")
+                return
+        entry.last_used = now
+        self.idle.append(entry)
+        _notify()
+
+    @asynccontextmanager
+    async def connection(self, password: str):
+        """取出一个连接，退出时归还；连接在调用中出错断开时归还会直接关闭它"""
+        entry = await self.acquire(password)
+        try:
+            yield entry.conn
+        finally:
+            await self.release(entry)
+
+    @property
+    def keeps_warm(self) -> bool:
+        """池是否需要保持热连接：设置了 min_size 并且已经有调用认证成功"""
+        return self.min_size > 0 and self._password is not None
+
+    def start_fill(self):
+        """在后台补足热连接，不阻塞当前调用"""
+        if self._filling is None or self._filling.done():
+            # 使用空的上下文，后台任务不继承当前调用的截止时间
+            self._filling = asyncio.get_running_loop().create_task(self.fill(), context=contextvars.Context())
+
+    async def fill(self):
+        """新建连接直到池中有 min_size 个连接。不为此关闭其他池的空闲连接，达到连接总数上限时停止"""
+        global _TOTAL
+        while self.keeps_warm and self.size < min(self.min_size, self.max_size) and _TOTAL < MAX_CONNECTIONS:
+            password = self._password
+            _TOTAL += 1
+            self.connecting += 1
+            entry = None
+            try:
+                entry = await asyncio.wait_for(self._open(password), POOL_TIMEOUT)
+            except Exception as e:
+                logger.warning("无法补足连接池 %s 的热连接: %s", self.key, e)
+            finally:
+                self.connecting -= 1
+                if entry is None:
+                    _TOTAL -= 1
+                    _notify()
+            if entry is None:
+                return
+            if password != self._password or _POOLS.get(self.key) is not self:
+                # 补连接期间密码已轮换或池已关闭
+                await self._close(entry, "discarded")
+                return
+            self.idle.append(entry)
+            _notify()
+
+    async def reap(self, now: float, max_idle: float = MAX_IDLE):
+        """关闭空闲超时的连接，至少保留 min_size 个"""
+        while self.idle and self.size > self.min_size and now - self.idle[0].last_used >= max_idle:
+            await self._close(self.idle.popleft(), "reaped")
+
+    def stats(self) -> dict:
+        host, port, database, user = self.key
+        return {
+            "host": host,
+            "port": port,
+            "database": database,
+            "user": user,
+            "idle": len(self.idle),
+            "in_use": self.in_use,
+            "min_size": self.min_size,
+            "max_size": self.max_size,
+        }
+
+
+def _digest(password: str) -> bytes:
+    return hashlib.sha256((password or "").encode()).digest()
+
+
+# 所有连接池: (host, port, database, user) -> ConnectionPool
+_POOLS: dict[tuple, ConnectionPool] = {}
+# 本进程已打开（包括正在建立）的连接总数
+_TOTAL = 0
+# 等待连接的调用；任何连接归还或关闭时全部唤醒，各自重新检查
+_WAITERS: list[asyncio.Future] = []
+_REAPER: Optional[asyncio.Task] = None
+
+
+def _notify():
+    for waiter in _WAITERS:
+        if not waiter.done():
+            waiter.set_result(None)
+
+
+def _evict_idle(requester: ConnectionPool) -> Optional[_Entry]:
+    """连接总数已达上限：取出其他池中最久未用的空闲连接，由调用方关闭，为新连接腾出位置"""
+    candidates = [pool for pool in _POOLS.values() if pool is not requester and pool.idle]
+    if not candidates:
+        return None
+    pool = min(candidates, key=lambda pool: pool.idle[0].last_used)
+    entry = pool.idle.popleft()
+    pool._discard(entry, "evicted")
+    return entry
+
+
+async def _reap_pools(now: float):
+    """关闭各池中空闲超时的连接，补足需要保持热连接的池，删除其他已经没有连接的池"""
+    for key, pool in list(_POOLS.items()):
+        await pool.reap(now)
+        if pool.keeps_warm:
+            pool.start_fill()
+        elif pool.size == 0:
+            del _POOLS[key]
+
+
+async def _reap_forever():
+    while True:
+        await asyncio.sleep(min(_REAP_INTERVAL, MAX_IDLE))
+        await _reap_pools(time.monotonic())
+
+
+def get_pool(host: str, port: int, database: str, user: str) -> ConnectionPool:
+    """返回 (host, port, database, user) 对应的连接池，不存在时创建"""
+    global _REAPER
+    key = (host, int(port), database, user)
+    pool = _POOLS.get(key)
+    if pool is None:
+        pool = _POOLS[key] = ConnectionPool(key, MIN_SIZE, MAX_SIZE)
+    if _REAPER is None or _REAPER.done():
+        _REAPER = asyncio.get_running_loop().create_task(_reap_forever(), context=contextvars.Context())
+    return pool
+
+
+def get_pool_stats() -> list[dict]:
+    """返回所有连接池的空闲连接数和使用中的连接数"""
+    return [pool.stats() for pool in _POOLS.values()]
+
+
+@on_shutdown
+async def close_pools():
+    """关闭所有空闲连接；使用中的连接在归还时关闭"""
+    global _REAPER
+    if _REAPER is not None:
+        _REAPER.cancel()
+        _REAPER = None
+    pools = list(_POOLS.values())
+    _POOLS.clear()
+    for pool in pools:
+        pool.min_size = 0
+        if pool._filling is not None:
+            pool._filling.cancel()
+        await pool.reap(time.monotonic(), max_idle=0)
+
+
+def _connection_samples() -> list[tuple[tuple, float]]:
+    return [
+        (("idle",), sum(len(pool.idle) for pool in _POOLS.values())),
+        (("in_use",), sum(pool.in_use for pool in _POOLS.values())),
+    ]
+
+
+metrics.register(metrics.CallbackMetric(
+    "mcp_db_pool_connections", "Pooled PostgreSQL connections by state", ("state",), _connection_samples
+))
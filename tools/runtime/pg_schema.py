@@ -0,0 +1,326 @@
+"""
+PostgreSQL目录缓存
+
+postgres 工具的 table_list、table_schema 和 database_info 不再查询 information_schema 视图（表多时非常慢），
+而是从内存中的目录缓存返回。每个 (host, port, database, user) 一个缓存，直接从 pg_catalog 批量读取:
+表和视图、列（类型、非空、默认值、注释）、主键、外键、唯一约束、索引和估计行数。
+
+刷新是增量的：先用一条查询取得每个表的签名（pg_class、pg_attribute、pg_constraint、pg_index等目录行的xmin），
+只重新读取签名变化的表，删除已经不存在的表；估计行数随签名查询一起更新。
+- MCP_PG_SCHEMA_TTL:    缓存的有效期（秒），过期后的下一次访问检查签名，默认 30；0 表示每次访问都检查
+- MCP_PG_SCHEMA_LISTEN: 设为 1 时每个缓存用一个单独的连接 LISTEN 通道 mcp_schema_changed，
+                        收到通知立即把缓存标记为过期。通知由数据库中的事件触发器发出（见 DDL_TRIGGER_SQL，需要超级用户安装）
+postgres 工具自己执行的DDL也会立即让缓存过期。
+
+缓存只提供给密码与连接池认证时所用密码一致的调用，其他调用先经连接池认证。
+"""
+
+import asyncio
+import logging
+import os
+import time
+from typing import Optional
+
+import psycopg
+
+from . import metrics
+from .pg_pool import ConnectionPool
+from .shutdown import on_shutdown
+
+logger = logging.getLogger(__name__)
+
+TTL = float(os.environ.get("MCP_PG_SCHEMA_TTL", 30))
+LISTEN = os.environ.get("MCP_PG_SCHEMA_LISTEN", "0").lower() in ("1", "true", "yes")
+CHANNEL = "mcp_schema_changed"
+
+# 在数据库中安装事件触发器（需要超级用户），任何DDL结束时通知所有监听的服务器
+DDL_TRIGGER_SQL = f"""
+CREATE OR REPLACE FUNCTION mcp_notify_schema_changed() RETURNS event_trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    PERFORM pg_notify('{CHANNEL}', current_database());
+END
+$$;
+DROP EVENT TRIGGER IF EXISTS mcp_schema_changed;
+CREATE EVENT TRIGGER mcp_schema_changed ON ddl_command_end EXECUTE FUNCTION mcp_notify_schema_changed();
+"""
+
+# 系统目录也在缓存中（table_schema可以查看），表列表和表数量中不显示
+SYSTEM_SCHEMAS = ("pg_catalog", "information_schema")
+
+_RELATION_FILTER = """
+    c.relkind IN ('r', 'p', 'v', 'm', 'f')
+    AND n.nspname NOT LIKE 'pg\\_toast%'
+    AND n.nspname NOT LIKE 'pg\\_temp\\_%'
+"""
+
+# 每个表一个签名：表、所在模式、列、默认值、约束、索引和注释的目录行任何一行变化，签名都会变化
+_SIGNATURE_SQL = f"""
+SELECT c.oid, c.reltuples, md5(concat_ws('/', n.xmin, c.xmin,
+    (SELECT string_agg(a.xmin::text, ',' ORDER BY a.attnum) FROM pg_attribute a
+     WHERE a.attrelid = c.oid AND a.attnum > 0),
+    (SELECT string_agg(d.xmin::text, ',' ORDER BY d.oid) FROM pg_attrdef d WHERE d.adrelid = c.oid),
+    (SELECT string_agg(k.xmin::text, ',' ORDER BY k.oid) FROM pg_constraint k WHERE k.conrelid = c.oid),
+    (SELECT string_agg(i.xmin::text || ic.xmin::text, ',' ORDER BY i.indexrelid)
+     FROM pg_index i JOIN pg_class ic ON ic.oid = i.indexrelid WHERE i.indrelid = c.oid),
+    (SELECT string_agg(ds.xmin::text, ',' ORDER BY ds.objsubid) FROM pg_description ds
+     WHERE ds.objoid = c.oid AND ds.classoid = 'pg_class'::regclass)))
+FROM pg_class c JOIN pg_namespace n ON n.oid = c.relnamespace
+WHERE {_RELATION_FILTER}
+"""
+
+# 以下查询按oid数组批量读取；数组展开后连接目录表，只读取这些表的目录行
+_RELATIONS_SQL = """
+SELECT c.oid, n.nspname, c.relname, c.relkind, ds.description
+FROM unnest(%s::oid[]) AS r(oid)
+JOIN pg_class c ON c.oid = r.oid
+JOIN pg_namespace n ON n.oid = c.relnamespace
+LEFT JOIN pg_description ds ON ds.objoid = c.oid AND ds.classoid = 'pg_class'::regclass AND ds.objsubid = 0
+"""
+
+_COLUMNS_SQL = """
+SELECT a.attrelid, a.attnum, a.attname, format_type(a.atttypid, a.atttypmod), a.attnotnull,
+       pg_get_expr(d.adbin, d.adrelid), ds.description
+FROM unnest(%s::oid[]) AS r(oid)
+JOIN pg_attribute a ON a.attrelid = r.oid
+LEFT JOIN pg_attrdef d ON d.adrelid = a.attrelid AND d.adnum = a.attnum
+LEFT JOIN pg_description ds ON ds.objoid = a.attrelid AND ds.classoid = 'pg_class'::regclass AND ds.objsubid = a.attnum
+WHERE a.attnum > 0 AND NOT a.attisdropped
+ORDER BY a.attrelid, a.attnum
+"""
+
+_CONSTRAINTS_SQL = """
+SELECT k.conrelid, k.contype, k.conname, k.conkey, k.confrelid, k.confkey
+FROM unnest(%s::oid[]) AS r(oid)
+JOIN pg_constraint k ON k.conrelid = r.oid
+WHERE k.contype IN ('p', 'u', 'f')
+ORDER BY k.conrelid, k.conname
+"""
+
+_INDEXES_SQL = """
+SELECT i.indrelid, ic.relname, pg_get_indexdef(i.indexrelid), i.indisprimary, i.indisunique
+FROM unnest(%s::oid[]) AS r(oid)
+JOIN pg_index i ON i.indrelid = r.oid
+JOIN pg_class ic ON ic.oid = i.indexrelid
+ORDER BY i.indrelid, ic.relname
+"""
+
+RELATION_KINDS = {"r": "table", "p": "partitioned table", "v": "view", "m": "materialized view", "f": "foreign table"}
+
+SCHEMA_CACHE = metrics.counter(
+    "mcp_db_schema_cache_total",
+    "PostgreSQL catalogue cache lookups: hit (served from memory), unchanged (signature checked), refreshed",
+    ("result",),
+)
+RELATIONS_LOADED = metrics.counter(
+    "mcp_db_schema_relations_loaded_total", "Relations (re)loaded from pg_catalog into the catalogue cache"
+)
+
+
+class Column:
+    __slots__ = ("name", "type", "not_null", "default", "comment")
+
+    def __init__(self, name: str, type: str, not_null: bool, default: Optional[str], comment: Optional[str]):
+        self.name = name
+        self.type = type
+        self.not_null = not_null
+        self.default = default
+        self.comment = comment
+
+
+class Relation:
+    """缓存中的一个表（或视图），外键引用的表按oid保存，显示时再查找名称"""
+
+    __slots__ = (
+        "oid", "schema", "name", "kind", "comment", "rows", "signature",
+        "columns", "attnums", "primary_key", "unique", "foreign_keys", "indexes",
+    )
+
+    def __init__(self, oid: int, schema: str, name: str, kind: str, comment: Optional[str]):
+        self.oid = oid
+        self.schema = schema
+        self.name = name
+        self.kind = RELATION_KINDS.get(kind, kind)
+        self.comment = comment
+        self.rows = -1.0
+        self.signature = ""
+        self.columns: list[Column] = []
+        # 列号 -> 列名，用于解析约束中的列
+        self.attnums: dict[int, str] = {}
+        self.primary_key: list[str] = []
+        self.unique: list[list[str]] = []
+        # (约束名, 列, 引用的表oid, 引用的列号)
+        self.foreign_keys: list[tuple[str, list[str], int, list[int]]] = []
+        # (索引名, 定义)
+        self.indexes: list[tuple[str, str]] = []
+
+    @property
+    def system(self) -> bool:
+        return self.schema in SYSTEM_SCHEMAS
+
+    @property
+    def estimated_rows(self) -> Optional[int]:
+        """pg_class.reltuples，从未分析过的表为None"""
+        return None if self.rows < 0 else int(self.rows)
+
+
+class SchemaCache:
+    """一个数据库的目录缓存"""
+
+    def __init__(self, pool: ConnectionPool):
+        self.pool = pool
+        self.relations: dict[int, Relation] = {}
+        self._by_name: dict[tuple[str, str], Relation] = {}
+        self.checked_at = 0.0
+        self.stale = True
+        # 同一时间只有一个调用刷新，其他调用等它完成后直接使用刷新的结果
+        self._lock = asyncio.Lock()
+        self._listener: Optional[asyncio.Task] = None
+
+    def find(self, schema: str, name: str) -> Optional[Relation]:
+        return self._by_name.get((schema, name))
+
+    def user_relations(self) -> list[Relation]:
+        """系统目录以外的表，按模式和名称排序"""
+        return sorted((r for r in self.relations.values() if not r.system), key=lambda r: (r.schema, r.name))
+
+    def referenced(self, foreign_key: tuple) -> str:
+        """外键引用的表和列，例如 public.users(id)"""
+        _, _, ref_oid, ref_attnums = foreign_key
+        ref = self.relations.get(ref_oid)
+        if ref is None:
+            return f"oid {ref_oid}"
+        return f"{ref.schema}.{ref.name}({', '.join(ref.attnums.get(n, '?') for n in ref_attnums)})"
+
+    def invalidate(self):
+        self.stale = True
+
+    def _fresh(self, password: str) -> bool:
+        return not self.stale and time.monotonic() - self.checked_at < TTL and self.pool.verify(password)
+
+    async def ensure_fresh(self, password: str):
+        """缓存过期、被标记为过期或调用方的密码尚未经过认证时，经连接池检查签名并增量刷新"""
+        if self._fresh(password):
+            SCHEMA_CACHE.inc("hit")
+            return
+        async with self._lock:
+            if self._fresh(password):
+                SCHEMA_CACHE.inc("hit")
+                return
+            async with self.pool.connection(password) as conn:
+                await self._refresh(conn)
+        if LISTEN and (self._listener is None or self._listener.done()):
+            self._listener = asyncio.get_running_loop().create_task(self._listen(password))
+
+    async def _refresh(self, conn):
+        # 刷新期间收到的DDL通知要在下一次访问时生效，所以先清除标记；刷新失败时恢复
+        self.stale = False
+        try:
+            signatures = await (await conn.execute(_SIGNATURE_SQL)).fetchall()
+            changed = [oid for oid, _, signature in signatures
+                       if oid not in self.relations or self.relations[oid].signature != signature]
+            loaded = await self._load(conn, changed) if changed else {}
+        except BaseException:
+            self.stale = True
+            raise
+        present = {oid for oid, _, _ in signatures}
+        removed = [oid for oid in self.relations if oid not in present]
+        if changed:
+            for oid, _, signature in signatures:
+                if oid in loaded:
+                    loaded[oid].signature = signature
+            self.relations.update(loaded)
+            RELATIONS_LOADED.inc(amount=len(loaded))
+        for oid in removed:
+            del self.relations[oid]
+        for oid, rows, _ in signatures:
+            if oid in self.relations:
+                self.relations[oid].rows = rows
+        if changed or removed:
+            self._by_name = {(r.schema, r.name): r for r in self.relations.values()}
+            logger.debug("目录缓存刷新: %d 个表变化，%d 个表删除", len(changed), len(removed))
+        SCHEMA_CACHE.inc("refreshed" if changed or removed else "unchanged")
+        self.checked_at = time.monotonic()
+
+    async def _load(self, conn, oids: list[int]) -> dict[int, Relation]:
+        """批量读取一组表的完整信息，每类信息一条查询"""
+        relations = {}
+        for oid, schema, name, kind, comment in await (await conn.execute(_RELATIONS_SQL, (oids,))).fetchall():
+            relations[oid] = Relation(oid, schema, name, kind, comment)
+        for relid, attnum, name, type, not_null, default, comment in await (
+            await conn.execute(_COLUMNS_SQL, (oids,))
+        ).fetchall():
+            relation = relations.get(relid)
+            if relation is not None:
+                relation.columns.append(Column(name, type, not_null, default, comment))
+                relation.attnums[attnum] = name
+        for relid, contype, name, conkey, confrelid, confkey in await (
+            await conn.execute(_CONSTRAINTS_SQL, (oids,))
+        ).fetchall():
+            relation = relations.get(relid)
+            if relation is None:
+                continue
+            columns = [relation.attnums.get(n, "?") for n in conkey or ()]
+            if contype == "p":
+                relation.primary_key = columns
+            elif contype == "u":
+                relation.unique.append(columns)
+            else:
+                relation.foreign_keys.append((name, columns, confrelid, list(confkey or ())))
+        for relid, name, definition, _, _ in await (await conn.execute(_INDEXES_SQL, (oids,))).fetchall():
+            relation = relations.get(relid)
+            if relation is not None:
+                relation.indexes.append((name, definition.split(" USING ", 1)[-1]))
+        return relations
+
+    async def _listen(self, password: str):
+        """在单独的连接上监听DDL通知；连接断开后缓存退回到按TTL检查，下一次刷新时重新监听"""
+        host, port, database, user = self.pool.key
+        try:
+            conn = await psycopg.AsyncConnection.connect(
+                host=host, port=port, dbname=database, user=user, password=password, autocommit=True
+            )
+        except psycopg.Error as e:
+            logger.warning("无法建立目录变化监听连接: %s", e)
+            return
+        try:
+            await conn.execute(f"LISTEN {CHANNEL}")
+            async for _ in conn.notifies():
+                self.stale = True
+        except psycopg.Error as e:
+            logger.warning("目录变化监听连接断开: %s", e)
+            self.stale = True
+        finally:
+            await conn.close()
+
+
+# 所有目录缓存: (host, port, database, user) -> SchemaCache
+_CACHES: dict[tuple, SchemaCache] = {}
+
+
+async def get_schema(pool: ConnectionPool, password: str) -> SchemaCache:
+    """返回连接池对应数据库的目录缓存，必要时先刷新"""
+    cache = _CACHES.get(pool.key)
+    if cache is None:
+        cache = _CACHES[pool.key] = SchemaCache(pool)
+    elif cache.pool is not pool:
+        # 空闲的连接池被回收后重新创建：缓存和监听连接继续使用，只换成新的连接池。
+        # 新的池还没有认证过任何密码，下一次访问先经新的池检查签名
+        cache.pool = pool
+    await cache.ensure_fresh(password)
+    return cache
+
+
+def invalidate(pool: ConnectionPool):
+    """让数据库的目录缓存过期，例如在执行DDL之后"""
+    cache = _CACHES.get(pool.key)
+    if cache is not None:
+        cache.invalidate()
+
+
+@on_shutdown
+async def close_listeners():
+    for cache in _CACHES.values():
+        if cache._listener is not None:
+            cache._listener.cancel()
+    _CACHES.clear()
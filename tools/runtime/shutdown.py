@@ -0,0 +1,26 @@
+import inspect
+import logging
+from typing import Awaitable, Callable, Union
+
+logger = logging.getLogger(__name__)
+
+# 关闭服务器时执行的清理函数（关闭进程池、数据库连接、浏览器等），按登记的相反顺序执行
+_HOOKS: list[Callable[[], Union[None, Awaitable[None]]]] = []
+
+
+def on_shutdown(hook: Callable[[], Union[None, Awaitable[None]]]):
+    """登记一个清理函数（普通函数或协程函数），可以用作装饰器"""
+    _HOOKS.append(hook)
+    return hook
+
+
+async def close_resources():
+    """执行所有清理函数，单个函数失败不影响其他函数"""
+    while _HOOKS:
+        hook = _HOOKS.pop()
+        try:
+            result = hook()
+            if inspect.isawaitable(result):
+                await result
+        except Exception:
+            logger.exception("清理函数 %s 执行失败", getattr(hook, "__qualname__", hook))
@@ -0,0 +1,66 @@
+import asyncio
+from typing import Any, Awaitable, Callable
+
+
+class _Flight:
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    合并相同的并发调用：同一个键同时只执行一次，所有等待者共享同一个结果（或异常）
+
+    共享的执行在独立的任务中运行，单个等待者被取消（客户端取消或超过截止时间）只会让它自己退出，
+    只有当所有等待者都离开后才取消共享的执行。共享任务复制第一个调用者的上下文。
+    """
+
+    def __init__(self):
+        self._flights: dict[str, _Flight] = {}
+        # 统计信息: 工具名 -> {"executions": 实际执行次数, "coalesced": 被合并的调用数}
+        self._stats: dict[str, dict[str, int]] = {}
+
+    def _count(self, tool_name: str, event: str):
+        stats = self._stats.get(tool_name)
+        if stats is None:
+            stats = self._stats[tool_name] = {"executions": 0, "coalesced": 0}
+        stats[event] += 1
+
+    async def do(self, tool_name: str, key: str, func: Callable[[], Awaitable[Any]]) -> Any:
+        flight = self._flights.get(key)
+        if flight is None:
+            flight = _Flight(asyncio.create_task(func()))
+            self._flights[key] = flight
+            flight.task.add_done_callback(lambda _: self._finish(key, flight))
+            self._count(tool_name, "executions")
+        else:
+            self._count(tool_name, "coalesced")
+
+        flight.waiters += 1
+        try:
+            return await asyncio.shield(flight.task)
+        finally:
+            flight.waiters -= 1
+            if flight.waiters == 0 and not flight.task.done():
+                # 最后一个等待者也离开了，没有人需要这个结果；之后的相同调用重新执行
+                flight.task.cancel()
+                if self._flights.get(key) is flight:
+                    del self._flights[key]
+
+    def _finish(self, key: str, flight: _Flight):
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+        # 所有等待者都已离开时，避免 "Task exception was never retrieved" 警告
+        if not flight.task.cancelled():
+            flight.task.exception()
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._flights)
+
+    def stats(self) -> dict:
+        return {
+            "in_flight": self.in_flight,
+            "tools": {name: dict(stats) for name, stats in sorted(self._stats.items())},
+        }
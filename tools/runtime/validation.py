@@ -0,0 +1,248 @@
+import json
+from typing import Any, Callable
+
+# 编译后的校验函数：接收原始参数，返回类型转换并补全默认值后的新字典
+Validator = Callable[[dict], dict]
+
+
+class ToolArgumentError(ValueError):
+    """工具参数不符合inputSchema，errors为 [{"field": ..., "message": ...}] 列表"""
+
+    def __init__(self, tool_name: str, errors: list[dict[str, str]]):
+        self.tool_name = tool_name
+        self.errors = errors
+        super().__init__(
+            f"Invalid arguments for tool '{tool_name}': "
+            + json.dumps(errors, ensure_ascii=False)
+        )
+
+
+class _Invalid(Exception):
+    def __init__(self, message: str):
+        self.message = message
+
+
+_MISSING = object()
+_TRUE_STRINGS = {"true", "1", "yes"}
+_FALSE_STRINGS = {"false", "0", "no"}
+
+
+def _coerce_string(value):
+    if isinstance(value, str):
+        return value
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return str(value)
+    raise _Invalid(f"expected string, got {type(value).__name__}")
+
+
+def _coerce_integer(value):
+    if isinstance(value, bool):
+        raise _Invalid("expected integer, got boolean")
+    if isinstance(value, int):
+        return value
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    if isinstance(value, str):
+        try:
+            return int(value.strip())
+        except ValueError:
+            pass
+    raise _Invalid(f"expected integer, got {value!r}")
+
+
+def _coerce_number(value):
+    if isinstance(value, bool):
+        raise _Invalid("expected number, got boolean")
+    if isinstance(value, (int, float)):
+        return value
+    if isinstance(value, str):
+        try:
+            return float(value.strip())
+        except ValueError:
+            pass
+    raise _Invalid(f"expected number, got {value!r}")
+
+
+def _coerce_boolean(value):
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, str):
+        lowered = value.strip().lower()
+        if lowered in _TRUE_STRINGS:
+            return True
+        if lowered in _FALSE_STRINGS:
+            return False
+    raise _Invalid(f"expected boolean, got {value!r}")
+
+
+def _check_object(value):
+    if isinstance(value, dict):
+        return value
+    raise _Invalid(f"expected object, got {type(value).__name__}")
+
+
+def _check_null(value):
+    if value is None:
+        return value
+    raise _Invalid(f"expected null, got {type(value).__name__}")
+
+
+_TYPE_COERCERS = {
+    "string": _coerce_string,
+    "integer": _coerce_integer,
+    "number": _coerce_number,
+    "boolean": _coerce_boolean,
+    "object": _check_object,
+    "null": _check_null,
+}
+
+
+def _compile_type(schema: dict) -> Callable[[Any], Any]:
+    """把单个属性的schema编译成一个 检查+转换 函数"""
+    checks = []
+
+    schema_type = schema.get("type")
+    if isinstance(schema_type, list):
+        coercers = [_compile_type({**schema, "type": t}) for t in schema_type]
+
+        def coerce_any(value):
+            messages = []
+            for coercer in coercers:
+                try:
+                    return coercer(value)
+                except _Invalid as e:
+                    messages.append(e.message)
+            raise _Invalid("; ".join(messages))
+
+        return coerce_any
+    if schema_type == "array":
+        item_coercer = _compile_type(schema["items"]) if "items" in schema else None
+
+        def coerce_array(value):
+            if not isinstance(value, list):
+                raise _Invalid(f"expected array, got {type(value).__name__}")
+            if item_coercer is None:
+                return value
+            items = []
+            for index, item in enumerate(value):
+                try:
+                    items.append(item_coercer(item))
+                except _Invalid as e:
+                    raise _Invalid(f"item {index}: {e.message}")
+            return items
+
+        checks.append(coerce_array)
+    elif schema_type is not None:
+        coercer = _TYPE_COERCERS.get(schema_type)
+        if coercer is not None:
+            checks.append(coercer)
+
+    if "enum" in schema:
+        allowed = list(schema["enum"])
+        allowed_set = set(v for v in allowed if v is None or isinstance(v, (str, int, float, bool)))
+
+        def check_enum(value):
+            try:
+                allowed_value = value in allowed_set
+            except TypeError:
+                allowed_value = False
+            if not allowed_value:
+                raise _Invalid(f"must be one of {allowed}, got {value!r}")
+            return value
+
+        checks.append(check_enum)
+
+    minimum = schema.get("minimum")
+    maximum = schema.get("maximum")
+    if minimum is not None or maximum is not None:
+        def check_range(value):
+            if minimum is not None and value < minimum:
+                raise _Invalid(f"must be >= {minimum}, got {value}")
+            if maximum is not None and value > maximum:
+                raise _Invalid(f"must be <= {maximum}, got {value}")
+            return value
+
+        checks.append(check_range)
+
+    min_length = schema.get("minLength")
+    max_length = schema.get("maxLength")
+    if min_length is not None or max_length is not None:
+        def check_length(value):
+            if min_length is not None and len(value) < min_length:
+                raise _Invalid(f"length must be >= {min_length}")
+            if max_length is not None and len(value) > max_length:
+                raise _Invalid(f"length must be <= {max_length}")
+            return value
+
+        checks.append(check_length)
+
+    if not checks:
+        return lambda value: value
+    if len(checks) == 1:
+        return checks[0]
+
+    def run_checks(value):
+        for check in checks:
+            value = check(value)
+        return value
+
+    return run_checks
+
+
+def compile_schema(tool_name: str, schema: dict) -> Validator:
+    """
+    把工具的inputSchema编译成一个校验函数，只需在注册时执行一次
+
+    支持MCP工具常用的JSON Schema子集: type（含array/items和类型列表）、required、
+    enum、default、minimum/maximum、minLength/maxLength、additionalProperties: false。
+    字符串形式的数字和布尔值会被转换成schema声明的类型；缺省的参数会补上default。
+    """
+    properties = schema.get("properties") or {}
+    required = tuple(schema.get("required") or ())
+    allow_extra = schema.get("additionalProperties", True) is not False
+
+    fields = []
+    for field, field_schema in properties.items():
+        default = field_schema.get("default", _MISSING)
+        if default is None:
+            # default为None与未提供参数等价
+            default = _MISSING
+        fields.append((field, _compile_type(field_schema), default))
+    known = frozenset(properties)
+
+    def validate(arguments: dict) -> dict:
+        if arguments is None:
+            arguments = {}
+        elif not isinstance(arguments, dict):
+            raise ToolArgumentError(tool_name, [{"field": "", "message": "arguments must be an object"}])
+
+        errors = None
+        for field in required:
+            if arguments.get(field) is None:
+                errors = errors or []
+                errors.append({"field": field, "message": "missing required argument"})
+
+        result = dict(arguments)
+        for field, coerce, default in fields:
+            value = arguments.get(field, _MISSING)
+            if value is _MISSING or value is None:
+                if default is not _MISSING:
+                    result[field] = default
+                continue
+            try:
+                result[field] = coerce(value)
+            except _Invalid as e:
+                errors = errors or []
+                errors.append({"field": field, "message": e.message})
+
+        if not allow_extra:
+            for field in arguments:
+                if field not in known:
+                    errors = errors or []
+                    errors.append({"field": field, "message": "unexpected argument"})
+
+        if errors:
+            raise ToolArgumentError(tool_name, errors)
+        return result
+
+    return validate
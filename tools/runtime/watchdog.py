@@ -0,0 +1,123 @@
+import asyncio
+import logging
+import os
+import sys
+import threading
+import time
+import traceback
+from typing import Optional
+
+from . import metrics
+
+logger = logging.getLogger(__name__)
+
+# 设置 MCP_LOOP_WATCHDOG=1 启用；阻塞超过 MCP_LOOP_WATCHDOG_THRESHOLD 秒时记录调用栈
+WATCHDOG_ENABLED = os.environ.get("MCP_LOOP_WATCHDOG", "").lower() in ("1", "true")
+WATCHDOG_THRESHOLD = float(os.environ.get("MCP_LOOP_WATCHDOG_THRESHOLD", 0.1))
+
+LOOP_BLOCKS = metrics.counter(
+    "mcp_event_loop_blocks_total", "Event loop stalls longer than the watchdog threshold", ("tool",)
+)
+LOOP_BLOCK_DURATION = metrics.histogram(
+    "mcp_event_loop_block_seconds",
+    "Duration of event loop stalls detected by the watchdog",
+    ("tool",),
+    buckets=(0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60),
+)
+
+
+def _attribute(frame) -> str:
+    """沿调用栈向外查找工具调度函数的栈帧，返回正在执行的工具名"""
+    while frame is not None:
+        if frame.f_code.co_name == "_execute" and frame.f_globals.get("__name__") == "tools":
+            return str(frame.f_locals.get("name", ""))
+        frame = frame.f_back
+    return ""
+
+
+def _format_stack(frame) -> str:
+    """格式化调用栈，去掉事件循环自身的栈帧，从被执行的回调开始"""
+    entries = traceback.extract_stack(frame)
+    for index in range(len(entries) - 1, -1, -1):
+        if entries[index].filename.endswith(os.path.join("asyncio", "events.py")):
+            entries = entries[index + 1:]
+            break
+    return "".join(traceback.format_list(entries))
+
+
+class LoopWatchdog:
+    """
+    事件循环阻塞检测
+
+    事件循环上的心跳协程每隔interval秒更新一次时间戳；独立的监视线程发现时间戳超过threshold秒
+    没有更新时，说明某个回调正在阻塞事件循环，立即抓取事件循环线程当前的调用栈，并沿栈帧找到
+    正在执行的工具调用。阻塞结束后把阻塞时长记录到日志和 mcp_event_loop_block_seconds。
+    """
+
+    def __init__(self, threshold: float = WATCHDOG_THRESHOLD, interval: Optional[float] = None):
+        self.threshold = threshold
+        self.interval = interval or max(threshold / 4, 0.005)
+        self._beat = time.monotonic()
+        self._loop_thread_id: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    async def _heartbeat(self):
+        while True:
+            self._beat = time.monotonic()
+            await asyncio.sleep(self.interval)
+
+    def start(self):
+        """在事件循环线程中调用，启动心跳协程和监视线程"""
+        self._loop_thread_id = threading.get_ident()
+        self._beat = time.monotonic()
+        self._task = asyncio.get_running_loop().create_task(self._heartbeat())
+        self._thread = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._task is not None:
+            self._task.cancel()
+
+    def _watch(self):
+        # 当前阻塞: (阻塞前最后一次心跳的时间, 工具名, 调用栈)
+        stall = None
+        while not self._stop.wait(self.interval):
+            beat = self._beat
+            if stall is not None and beat != stall[0]:
+                # 心跳恢复，阻塞结束；实际阻塞时长不含正常的心跳间隔
+                self._report(beat - stall[0] - self.interval, stall[1], stall[2])
+                stall = None
+            if stall is None and time.monotonic() - beat > self.threshold:
+                frame = sys._current_frames().get(self._loop_thread_id)
+                stall = (beat, _attribute(frame), _format_stack(frame))
+                del frame
+
+    def _report(self, duration: float, tool: str, stack: str):
+        LOOP_BLOCKS.inc(tool)
+        LOOP_BLOCK_DURATION.observe(duration, tool)
+        logger.warning(
+            "事件循环被阻塞 %.3f 秒 (工具: %s)，阻塞时的调用栈:\n%s", duration, tool or "-", stack
+        )
+
+
+_WATCHDOG: Optional[LoopWatchdog] = None
+
+
+def start_watchdog(threshold: float = WATCHDOG_THRESHOLD) -> LoopWatchdog:
+    """在当前事件循环上启动阻塞检测（重复调用只启动一次），同时启动事件循环延迟监控"""
+    global _WATCHDOG
+    if _WATCHDOG is None:
+        _WATCHDOG = LoopWatchdog(threshold)
+        _WATCHDOG.start()
+        metrics.start_loop_lag_monitor()
+    return _WATCHDOG
+
+
+def start_watchdog_from_env() -> Optional[LoopWatchdog]:
+    """MCP_LOOP_WATCHDOG 启用时启动阻塞检测"""
+    if not WATCHDOG_ENABLED:
+        return None
+    return start_watchdog()
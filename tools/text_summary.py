@@ -1,13 +1,16 @@
 import mcp.types as types
+import logging
 import re
 
+logger = logging.getLogger(__name__)
+
 
 async def summarize_text(
     text: str, 
     max_sentences: int = 3
 ) -> list[types.TextContent]:
     """生成文本摘要（简单版本）"""
-    print(f"生成摘要，最大句子数: {max_sentences}")
+    logger.debug("生成摘要，最大句子数: %s", max_sentences)
     
     # 分割文本为句子
     sentences = re.split(r'(?<=[.!?])\s+', text)
@@ -35,10 +38,6 @@ async def text_summary_tool(
         raise ValueError("Missing required argument 'text'")
     
     max_sentences = arguments.get("max_sentences", 3)
-    try:
-        max_sentences = int(max_sentences)
-    except (ValueError, TypeError):
-        max_sentences = 3
     
     return await summarize_text(arguments["text"], max_sentences)
 
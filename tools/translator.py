@@ -1,7 +1,15 @@
 import mcp.types as types
-import httpx
+import logging
 import json
 
+from tools.runtime.cache import uncacheable
+from tools.runtime.clients import http_client
+
+logger = logging.getLogger(__name__)
+
+# 相同文本的翻译结果缓存1天
+TOOL_OPTIONS = {"timeout": 20, "cache_ttl": 86400}
+
 
 async def translate_text(
     text: str,
@@ -12,7 +20,7 @@ async def translate_text(
     翻译文本到目标语言
     使用免费的翻译API
     """
-    print(f"翻译文本，目标语言: {target_lang}, 源语言: {source_lang}")
+    logger.debug("翻译文本，目标语言: %s, 源语言: %s", target_lang, source_lang)
     
     # 这里使用 LibreTranslate API，也可以替换为其他翻译服务
     # 如果需要使用其他服务，请替换以下URL和参数
@@ -30,15 +38,15 @@ async def translate_text(
     }
     
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.post(url, json=data, headers=headers, timeout=10.0)
+        async with http_client(timeout=10.0) as client:
+            response = await client.post(url, json=data, headers=headers)
             response.raise_for_status()
             
             result = response.json()
             translated_text = result.get("translatedText", "")
             
             if not translated_text:
-                return [types.TextContent(type="text", text=f"翻译失败: {result.get('error', '未知错误')}")]
+                return uncacheable([types.TextContent(type="text", text=f"翻译失败: {result.get('error', '未知错误')}")])
             
             output = f"原文 [{source_lang}]: {text}\n\n"
             output += f"译文 [{target_lang}]: {translated_text}"
@@ -48,20 +56,20 @@ async def translate_text(
     except Exception as e:
         fallback_output = f"翻译服务不可用，错误: {str(e)}\n\n"
         fallback_output += "提示: 这是一个演示工具，依赖于免费的公共API，可能受到限制。"
-        return [types.TextContent(type="text", text=fallback_output)]
+        return uncacheable([types.TextContent(type="text", text=fallback_output)])
 
 
 async def get_supported_languages() -> list[dict]:
     """获取支持的语言列表"""
     try:
-        async with httpx.AsyncClient() as client:
+        async with http_client(timeout=10.0) as client:
             response = await client.get("https://libretranslate.de/languages")
             response.raise_for_status()
             
             languages = response.json()
             return languages
     except Exception as e:
-        print(f"获取语言列表失败: {e}")
+        logger.warning("获取语言列表失败: %s", e)
         # 返回一些常用语言作为备用
         return [
             {"code": "en", "name": "English"},
@@ -1,7 +1,15 @@
-import httpx
 import mcp.types as types
+import logging
 import json
 
+from tools.runtime.cache import uncacheable
+from tools.runtime.clients import http_client
+
+logger = logging.getLogger(__name__)
+
+# 天气数据变化缓慢，缓存10分钟
+TOOL_OPTIONS = {"timeout": 15, "cache_ttl": 600}
+
 
 async def get_weather(
     city: str,
@@ -14,8 +22,8 @@ async def get_weather(
         "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/133.0.0.0 Safari/537.36"
     }
     
-    async with httpx.AsyncClient(follow_redirects=True, headers=headers) as client:
-        print(f"获取天气数据: {city}")
+    async with http_client(follow_redirects=True, headers=headers) as client:
+        logger.debug("获取天气数据: %s", city)
         response = await client.get(url)
         response.raise_for_status()
         
@@ -23,7 +31,6 @@ async def get_weather(
             weather_data = response.json()
             # 提取一些基本信息
             current = weather_data.get("current_condition", [{}])[0]
-            print(current)
             temp_c = current.get("temp_C", "未知")
             humidity = current.get("humidity", "未知")
             weather_desc = current.get("weatherDesc", [{}])[0].get("value", "未知")
@@ -36,11 +43,11 @@ async def get_weather(
             result += f"湿度: {humidity}%"
             result += f"日期: {date}\n"
 
-            print(result)
+            logger.debug("天气查询结果: %s", result.replace("\n", "; "))
             
             return [types.TextContent(type="text", text=result)]
         except (json.JSONDecodeError, KeyError) as e:
-            return [types.TextContent(type="text", text=f"获取天气信息失败: {str(e)}")]
+            return uncacheable([types.TextContent(type="text", text=f"获取天气信息失败: {str(e)}")])
 
 
 async def weather_tool(
@@ -1,9 +1,90 @@
 import mcp.types as types
+import logging
 import httpx
 import re
 from bs4 import BeautifulSoup
 from urllib.parse import urlparse
 
+from tools.runtime.cache import uncacheable
+from tools.runtime.clients import http_client
+from tools.runtime.executor import run_cpu_bound
+
+logger = logging.getLogger(__name__)
+
+# 时限包括下载和HTML解析；抓取结果缓存5分钟
+TOOL_OPTIONS = {"timeout": 60, "cache_ttl": 300}
+
+
+def extract_content(
+    html_content: str,
+    url: str,
+    selector: str = None,
+    extract_type: str = "text"
+) -> tuple[str, str, str]:
+    """
+    解析HTML并提取内容（CPU密集，在工作进程中执行）
+    返回 (标题, 提取结果, 错误信息)，没有错误时错误信息为None
+    """
+    soup = BeautifulSoup(html_content, 'html.parser')
+    
+    # 获取网页标题
+    title = str(soup.title.string) if soup.title and soup.title.string else "无标题"
+    
+    # 根据提供的选择器提取内容
+    if selector:
+        elements = soup.select(selector)
+        if not elements:
+            return title, "", f"错误: 未找到匹配选择器 '{selector}' 的元素"
+    else:
+        # 如果没有选择器，处理整个body
+        elements = [soup.body] if soup.body else [soup]
+    
+    # 根据提取类型获取内容
+    result = ""
+    
+    if extract_type == "text":
+        # 提取纯文本
+        for element in elements:
+            # 移除script和style内容
+            for script in element.find_all(["script", "style"]):
+                script.decompose()
+            text = element.get_text(separator="\n").strip()
+            # 删除多余空行
+            text = re.sub(r'\n\s*\n', '\n\n', text)
+            result += text + "\n\n"
+        
+    elif extract_type == "html":
+        # 提取HTML代码
+        for element in elements:
+            result += str(element) + "\n"
+        
+    elif extract_type == "links":
+        # 提取链接
+        links = []
+        base_url = "{0.scheme}://{0.netloc}".format(urlparse(url))
+        
+        for element in elements:
+            for link in element.find_all('a', href=True):
+                href = link['href']
+                # 处理相对URL
+                if href.startswith('/'):
+                    full_url = base_url + href
+                elif not href.startswith(('http://', 'https://')):
+                    full_url = url.rstrip('/') + '/' + href.lstrip('/')
+                else:
+                    full_url = href
+                
+                link_text = link.get_text().strip()
+                if link_text and full_url not in links:
+                    links.append(f"[{link_text}]({full_url})")
+        
+        result = "\n".join(links)
+    
+    else:
+        return title, "", f"错误: 不支持的提取类型 '{extract_type}'"
+    
+    return title, result, None
+
 
 async def scrape_webpage(
     url: str,
@@ -15,7 +96,7 @@ async def scrape_webpage(
     支持抓取全部内容或通过CSS选择器抓取特定内容
     可以提取文本、HTML或链接
     """
-    print(f"抓取网页: {url}, 选择器: {selector}, 提取类型: {extract_type}")
+    logger.debug("抓取网页: %s, 选择器: %s, 提取类型: %s", url, selector, extract_type)
     
     # 验证URL
     if not url.startswith(('http://', 'https://')):
@@ -33,75 +114,16 @@ async def scrape_webpage(
         }
         
         # 发送HTTP请求
-        async with httpx.AsyncClient(timeout=30.0) as client:
+        async with http_client() as client:
             response = await client.get(url, headers=headers, follow_redirects=True)
             response.raise_for_status()  # 如果请求失败，抛出异常
             
-            # 获取网页内容
-            html_content = response.text
-            soup = BeautifulSoup(html_content, 'html.parser')
-            
-            # 获取网页标题
-            title = soup.title.string if soup.title else "无标题"
-            
-            # 根据提供的选择器提取内容
-            if selector:
-                elements = soup.select(selector)
-                if not elements:
-                    return [types.TextContent(
-                        type="text", 
-                        text=f"错误: 未找到匹配选择器 '{selector}' 的元素"
-                    )]
-            else:
-                # 如果没有选择器，处理整个body
-                elements = [soup.body] if soup.body else [soup]
-            
-            # 根据提取类型获取内容
-            result = ""
-            
-            if extract_type == "text":
-                # 提取纯文本
-                for element in elements:
-                    # 移除script和style内容
-                    for script in element.find_all(["script", "style"]):
-                        script.decompose()
-                    text = element.get_text(separator="\n").strip()
-                    # 删除多余空行
-                    text = re.sub(r'\n\s*\n', '\n\n', text)
-                    result += text + "\n\n"
-                
-            elif extract_type == "html":
-                # 提取HTML代码
-                for element in elements:
-                    result += str(element) + "\n"
-                
-            elif extract_type == "links":
-                # 提取链接
-                links = []
-                base_url = "{0.scheme}://{0.netloc}".format(urlparse(url))
-                
-                for element in elements:
-                    for link in element.find_all('a', href=True):
-                        href = link['href']
-                        # 处理相对URL
-                        if href.startswith('/'):
-                            full_url = base_url + href
-                        elif not href.startswith(('http://', 'https://')):
-                            full_url = url.rstrip('/') + '/' + href.lstrip('/')
-                        else:
-                            full_url = href
-                        
-                        link_text = link.get_text().strip()
-                        if link_text and full_url not in links:
-                            links.append(f"[{link_text}]({full_url})")
-                
-                result = "\n".join(links)
-            
-            else:
-                return [types.TextContent(
-                    type="text", 
-                    text=f"错误: 不支持的提取类型 '{extract_type}'"
-                )]
+            # 获取网页内容，HTML解析在进程池中执行
+            title, result, error = await run_cpu_bound(
+                extract_content, response.text, url, selector, extract_type
+            )
+            if error:
+                return [types.TextContent(type="text", text=error)]
             
             # 如果结果太长，进行截断
             if len(result) > 7000:
@@ -122,20 +144,20 @@ async def scrape_webpage(
             return [types.TextContent(type="text", text=output)]
             
     except httpx.RequestError as e:
-        return [types.TextContent(
+        return uncacheable([types.TextContent(
             type="text", 
             text=f"请求错误: {str(e)}"
-        )]
+        )])
     except httpx.HTTPStatusError as e:
-        return [types.TextContent(
+        return uncacheable([types.TextContent(
             type="text", 
             text=f"HTTP错误: {e.response.status_code} {e.response.reason_phrase}"
-        )]
+        )])
     except Exception as e:
-        return [types.TextContent(
+        return uncacheable([types.TextContent(
             type="text", 
             text=f"发生错误: {str(e)}"
-        )]
+        )])
 
 
 async def web_scraper_tool(